@@ -0,0 +1,301 @@
+import atexit
+import json
+import os
+import tempfile
+import numpy
+import config
+
+# Registry of instantiated backends, so every engine shares the same FFT plans/wisdom
+_backends = {}
+
+
+class NumpyBackend:
+    """CPU backend: NumPy arrays with multithreaded FFTs from scipy.fft (or pyFFTW when available)."""
+    name = "numpy"
+
+    def __init__(self, workers=None, use_fftw=None):
+        import scipy.fft
+
+        self.xp = numpy
+        self.workers = config.FFT_WORKERS if workers is None else workers
+        if self.workers is not None and self.workers < 0:
+            self.workers = os.cpu_count() or 1
+        self._fft = scipy.fft
+        self.fftw = None
+        self._plans = {}
+        try:
+            import numexpr
+        except ImportError:
+            numexpr = None
+        self._numexpr = numexpr
+
+        if use_fftw is None:
+            use_fftw = config.USE_FFTW
+        if use_fftw:
+            try:
+                import pyfftw
+                import pyfftw.interfaces.scipy_fft
+            except ImportError:
+                pyfftw = None
+            if pyfftw is not None:
+                self.fftw = pyfftw
+                pyfftw.interfaces.cache.enable()
+                self._load_wisdom()
+                self._fft = pyfftw.interfaces.scipy_fft
+                # Plans are measured lazily, so the wisdom is written once the process is done planning
+                atexit.register(self.save_wisdom)
+
+    def _load_wisdom(self):
+        path = config.FFTW_WISDOM_PATH
+        if path and os.path.exists(path):
+            # FFTW wisdom is a tuple of ASCII strings (double, single, long double)
+            with open(path) as f:
+                wisdom = json.load(f)
+            self.fftw.import_wisdom(tuple(w.encode("latin-1") for w in wisdom))
+
+    def save_wisdom(self):
+        """Persists the FFTW plans gathered so far so the next process skips planning."""
+        path = config.FFTW_WISDOM_PATH
+        if self.fftw is None or not path:
+            return
+        wisdom = [w.decode("latin-1") for w in self.fftw.export_wisdom()]
+        # Write to a temporary file of this process first, so processes exiting together never
+        # share one and a concurrent reader never sees a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            # mkstemp creates the file readable by its owner only; wisdom is shared like any cache file
+            os.chmod(tmp_path, 0o644)
+            with os.fdopen(fd, "w") as f:
+                json.dump(wisdom, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _plan(self, kind, a, s=None):
+        # Planned pyFFTW transforms, built once per input layout and reused every step
+        key = (kind, a.shape, a.dtype.str, s)
+        plan = self._plans.get(key)
+        if plan is None:
+            template = self.fftw.empty_aligned(a.shape, dtype=a.dtype)
+            if kind == "rfft2":
+                plan = self.fftw.builders.rfft2(template, threads=self.workers, planner_effort="FFTW_MEASURE")
+            else:
+                plan = self.fftw.builders.irfft2(template, s=s, threads=self.workers, planner_effort="FFTW_MEASURE")
+            self._plans[key] = plan
+        return plan
+
+    def empty(self, shape, dtype):
+        if self.fftw is not None:
+            return self.fftw.empty_aligned(shape, dtype=dtype)
+        return numpy.empty(shape, dtype=dtype)
+
+    def rfft2(self, a, out=None):
+        # `out` is filled when the transform can write in place (pyFFTW); otherwise a new array is returned
+        if out is not None and self.fftw is not None:
+            return self._plan("rfft2", a)(a, output_array=out)
+        return self._fft.rfft2(a, workers=self.workers)
+
+    def irfft2(self, a, s, out=None):
+        # With `out`, the input spectrum is treated as scratch and may be overwritten
+        if out is not None and self.fftw is not None:
+            return self._plan("irfft2", a, tuple(s))(a, output_array=out)
+        if out is not None:
+            return self._fft.irfft2(a, s=s, workers=self.workers, overwrite_x=True)
+        return self._fft.irfft2(a, s=s, workers=self.workers)
+
+    def growth_update(self, world, potential, mu, sigma, timestep, out):
+        """Writes clip(world + timestep * growth(potential), 0, 1) into `out`, overwriting `potential`."""
+        # numexpr has no float16, so a float16 world stored from float32 arithmetic takes the ufunc path
+        if self._numexpr is not None and world.dtype == potential.dtype == out.dtype != numpy.float16:
+            scalar = potential.dtype.type
+            self._numexpr.evaluate(
+                "w + dt * (exp(-((p - mu) ** 2) * k) * 2 - 1)",
+                local_dict={"w": world, "p": potential, "mu": scalar(mu),
+                            "k": scalar(1 / (2 * sigma**2)), "dt": scalar(timestep)},
+                out=out)
+            return numpy.clip(out, 0, 1, out=out)
+        # Same arithmetic as the canonical growth, but as in-place ufuncs on `potential`
+        numpy.subtract(potential, mu, out=potential)
+        numpy.square(potential, out=potential)
+        numpy.multiply(potential, -1 / (2 * sigma**2), out=potential)
+        numpy.exp(potential, out=potential)
+        numpy.multiply(potential, 2, out=potential)
+        numpy.subtract(potential, 1, out=potential)
+        numpy.multiply(potential, timestep, out=potential)
+        numpy.add(world, potential, out=out)
+        return numpy.clip(out, 0, 1, out=out)
+
+    def convolve2d(self, world, kernel):
+        # scipy.signal and scipy.ndimage are imported on first use; they dominate startup time
+        from scipy.signal import convolve2d
+        return convolve2d(world, kernel, mode='same', boundary='wrap')
+
+    def correlate1d(self, world, weights, axis):
+        from scipy.ndimage import correlate1d
+        return correlate1d(world, weights, axis=axis, mode='wrap')
+
+    def zoom(self, world, factors):
+        # Linear interpolation on the torus
+        from scipy.ndimage import zoom
+        return zoom(world, factors, order=1, mode='grid-wrap', grid_mode=True)
+
+    def random(self, shape):
+        return numpy.random.rand(*shape).astype(numpy.float32)
+
+    def seed(self, seed):
+        numpy.random.seed(seed)
+
+    def get_rng_state(self):
+        return _get_numpy_rng_state()
+
+    def set_rng_state(self, state):
+        _set_numpy_rng_state(state)
+
+    def asnumpy(self, a, out=None):
+        if out is None:
+            return numpy.asarray(a)
+        out[...] = a
+        return out
+
+    def empty_host(self, shape, dtype):
+        return numpy.empty(shape, dtype=dtype)
+
+    def synchronize(self):
+        pass
+
+
+class CupyBackend:
+    """GPU backend: CuPy arrays and cuFFT."""
+    name = "cupy"
+
+    def __init__(self):
+        import cupy
+        from cupyx.scipy.ndimage import correlate1d, zoom
+        from cupyx.scipy.signal import convolve2d
+
+        # CuPy imports fine on machines without a GPU; report that the same way as a missing package
+        try:
+            cupy.cuda.runtime.getDeviceCount()
+        except Exception as e:
+            raise ImportError(f"CuPy is installed but no CUDA device is usable: {e}") from e
+
+        self.xp = cupy
+        self._convolve2d = convolve2d
+        self._correlate1d = correlate1d
+        self._zoom = zoom
+        # Growth and clip fused into one pass over the grid; the arithmetic runs in the dtype F of
+        # the potential and the world is stored as T (float16 worlds are computed on in float32)
+        self._growth_update = cupy.ElementwiseKernel(
+            'T w, F p, F mu, F sigma, F dt',
+            'T out',
+            '''
+            F d = p - mu;
+            F v = (F)w + dt * (exp(-(d * d) / (2 * sigma * sigma)) * 2 - 1);
+            out = (T)(v < 0 ? (F)0 : (v > 1 ? (F)1 : v));
+            ''',
+            'lenia_growth_update')
+
+    def empty(self, shape, dtype):
+        return self.xp.empty(shape, dtype=dtype)
+
+    def rfft2(self, a, out=None):
+        # cuFFT outputs come from CuPy's memory pool, so `out` is not needed to avoid device allocations
+        return self.xp.fft.rfft2(a)
+
+    def irfft2(self, a, s, out=None):
+        return self.xp.fft.irfft2(a, s=s)
+
+    def growth_update(self, world, potential, mu, sigma, timestep, out):
+        """Writes clip(world + timestep * growth(potential), 0, 1) into `out`."""
+        scalar = potential.dtype.type
+        return self._growth_update(world, potential, scalar(mu), scalar(sigma), scalar(timestep), out)
+
+    def convolve2d(self, world, kernel):
+        return self._convolve2d(world, kernel, mode='same', boundary='wrap')
+
+    def correlate1d(self, world, weights, axis):
+        return self._correlate1d(world, weights, axis=axis, mode='wrap')
+
+    def zoom(self, world, factors):
+        return self._zoom(world, factors, order=1, mode='grid-wrap', grid_mode=True)
+
+    def random(self, shape):
+        # Drawn on the host so the RNG state can be checkpointed (cuRAND state cannot be read back)
+        # and a seed gives the same world on every backend
+        return self.xp.asarray(numpy.random.rand(*shape).astype(numpy.float32))
+
+    def seed(self, seed):
+        numpy.random.seed(seed)
+        self.xp.random.seed(seed)
+
+    def get_rng_state(self):
+        return _get_numpy_rng_state()
+
+    def set_rng_state(self, state):
+        _set_numpy_rng_state(state)
+
+    def asnumpy(self, a, out=None):
+        # Copying into a pinned `out` buffer avoids a host allocation and a staging copy
+        return self.xp.asnumpy(a, out=out)
+
+    def empty_host(self, shape, dtype):
+        """Page-locked host array, the fastest target for device-to-host copies."""
+        import cupyx
+        return cupyx.empty_pinned(shape, dtype=dtype)
+
+    def synchronize(self):
+        self.xp.cuda.get_current_stream().synchronize()
+
+
+def _get_numpy_rng_state():
+    # The legacy global RNG (MT19937) as plain JSON-serializable values
+    name, key, pos, has_gauss, cached_gaussian = numpy.random.get_state()
+    return {"name": name, "key": key.tolist(), "pos": int(pos), "has_gauss": int(has_gauss), "cached_gaussian": float(cached_gaussian)}
+
+
+def _set_numpy_rng_state(state):
+    numpy.random.set_state((state["name"], numpy.array(state["key"], dtype=numpy.uint32),
+                            state["pos"], state["has_gauss"], state["cached_gaussian"]))
+
+
+BACKENDS = {
+    "numpy": NumpyBackend,
+    "cupy": CupyBackend,
+}
+
+
+def available_backends():
+    """Returns the names of the backends that can be imported on this machine."""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_backend(name=None):
+    """Returns the shared backend instance for `name` ("numpy", "cupy" or "auto").
+
+    Passing a backend instance returns it unchanged, so engines can accept either.
+    "auto" prefers CuPy and falls back to NumPy when CuPy (or a GPU) is unavailable.
+    """
+    if name is None:
+        name = config.BACKEND
+    if not isinstance(name, str):
+        return name
+
+    if name == "auto":
+        try:
+            return get_backend("cupy")
+        except ImportError:
+            return get_backend("numpy")
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', expected one of {['auto', *BACKENDS]}")
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
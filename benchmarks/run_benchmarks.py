@@ -0,0 +1,224 @@
+"""Engine throughput benchmarks over grid sizes, radii, kernel shapes, engines and backends.
+
+Each case reports steps/sec, per-step latency percentiles, peak host memory during a step and
+the time to rebuild the kernel after a radius change. Results are written as JSON and can be
+compared against a stored baseline; the run fails when any case is slower than the baseline
+by more than the threshold.
+
+    python benchmarks/run_benchmarks.py --quick
+    python benchmarks/run_benchmarks.py --output results.json --save-baseline
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# Add project root to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy
+import config
+import kernels
+from backend import get_backend
+from convolution import STRATEGIES
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+GRID_SIZES = [128, 256, 512, 1024, 2048, 4096]
+RADII = [5, 13, 25, 50]
+SHAPES = ["ring", "gaussian", "square"]
+ENGINES = ["fft", "fft-inplace", "direct", "separable", "box", "numba"]
+QUICK = {"grid_sizes": [128, 256], "radii": [5, 13], "shapes": ["ring", "square"], "engines": ["fft", "fft-inplace", "box"]}
+
+# Skip cases whose estimated cost per step (from the convolution cost model) is above this many
+# operations, so the full matrix does not spend hours on direct convolution of 4096 grids
+MAX_COST = 2e10
+
+
+def make_engine(engine, backend, grid_shape, radius, shape):
+    """Builds the engine for `engine` with a `shape` kernel of `radius`."""
+    if engine in ("fft", "fft-inplace"):
+        from lenia_core import Lenia
+        lenia = Lenia(backend=backend, inplace=engine == "fft-inplace", grid_shape=grid_shape, kernel_radius=radius)
+    elif engine == "numba":
+        from lenia_core_numba import LeniaNumba
+        lenia = LeniaNumba(backend=backend, grid_shape=grid_shape, kernel_radius=radius)
+    else:
+        from lenia_core_auto import LeniaAuto
+        # Built with the default shape, which the strategy may not support until the shape is set
+        lenia = LeniaAuto(backend=backend, strategy=engine, grid_shape=grid_shape, kernel_radius=radius)
+    lenia.set_kernel_shape(shape)
+    return lenia
+
+
+def supports(engine, shape, backend="numpy"):
+    if engine == "numba":
+        # CPU only, and only when Numba is installed
+        import lenia_core_numba
+        return lenia_core_numba.available() and get_backend(backend).name == "numpy"
+    strategy = "fft" if engine.startswith("fft") else engine
+    return shape in STRATEGIES[strategy].shapes
+
+
+def estimated_cost(engine, grid_size, radius, shape):
+    if engine == "numba":
+        from lenia_core_numba import LeniaNumba
+        return LeniaNumba.cost(radius, shape, (grid_size, grid_size))
+    strategy = "fft" if engine.startswith("fft") else engine
+    return STRATEGIES[strategy].cost(radius, shape, (grid_size, grid_size))
+
+
+def case_key(case):
+    return f"{case['backend']}:{case['engine']}:{case['grid_size']}:r{case['radius']}:{case['shape']}"
+
+
+@contextlib.contextmanager
+def fixed_strategies():
+    """Turns off autotuning and the strategy table, so cases time exactly their engine and write nothing."""
+    saved = config.AUTOTUNE, config.STRATEGY_TABLE_PATH
+    config.AUTOTUNE, config.STRATEGY_TABLE_PATH = False, None
+    try:
+        yield
+    finally:
+        config.AUTOTUNE, config.STRATEGY_TABLE_PATH = saved
+
+
+def run_case(backend, engine, grid_size, radius, shape, min_steps=5, min_seconds=1.0):
+    """Times one configuration and returns its result record."""
+    with fixed_strategies():
+        return _run_case(backend, engine, grid_size, radius, shape, min_steps, min_seconds)
+
+
+def _run_case(backend, engine, grid_size, radius, shape, min_steps, min_seconds):
+    backend = get_backend(backend)
+    kernels.clear_cache()
+    lenia = make_engine(engine, backend, (grid_size, grid_size), radius, shape)
+
+    # Warm up plans, caches and buffers
+    for _ in range(2):
+        lenia.update()
+    backend.synchronize()
+
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < min_steps or time.perf_counter() - start < min_seconds:
+        step_start = time.perf_counter()
+        lenia.update()
+        backend.synchronize()
+        latencies.append(time.perf_counter() - step_start)
+    total = time.perf_counter() - start
+
+    # Peak host memory of one step (device memory is not visible to tracemalloc)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    lenia.update()
+    backend.synchronize()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Rebuild the kernel for another radius with an empty cache, as a slider move would
+    kernels.clear_cache()
+    rebuild_start = time.perf_counter()
+    lenia.set_kernel_radius(radius + 1)
+    backend.synchronize()
+    rebuild = time.perf_counter() - rebuild_start
+
+    latencies = numpy.array(latencies)
+    return {
+        "backend": backend.name,
+        "engine": engine,
+        "grid_size": grid_size,
+        "radius": radius,
+        "shape": shape,
+        "steps": len(latencies),
+        "steps_per_sec": len(latencies) / total,
+        "latency_p50": float(numpy.percentile(latencies, 50)),
+        "latency_p90": float(numpy.percentile(latencies, 90)),
+        "latency_p99": float(numpy.percentile(latencies, 99)),
+        "peak_memory_bytes": peak - before,
+        "kernel_rebuild_seconds": rebuild,
+    }
+
+
+def run_matrix(backends, engines, grid_sizes, radii, shapes, min_seconds=1.0, log=print):
+    results = []
+    for backend in backends:
+        for grid_size in grid_sizes:
+            for radius in radii:
+                if 2 * radius + 1 > grid_size:
+                    continue
+                for shape in shapes:
+                    for engine in engines:
+                        if not supports(engine, shape, backend) or estimated_cost(engine, grid_size, radius, shape) > MAX_COST:
+                            continue
+                        result = run_case(backend, engine, grid_size, radius, shape, min_seconds=min_seconds)
+                        results.append(result)
+                        log(f"{case_key(result):<40} {result['steps_per_sec']:>10.1f} steps/s  "
+                            f"p50 {result['latency_p50'] * 1000:8.2f} ms  p99 {result['latency_p99'] * 1000:8.2f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns (key, baseline steps/sec, current steps/sec) for every case slower than the baseline by more than `threshold`."""
+    previous = {case_key(case): case for case in baseline["results"]}
+    regressions = []
+    for case in results:
+        old = previous.get(case_key(case))
+        if old is not None and case["steps_per_sec"] < old["steps_per_sec"] * (1 - threshold):
+            regressions.append((case_key(case), old["steps_per_sec"], case["steps_per_sec"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Lenia engine throughput.')
+    parser.add_argument('--backend', nargs='+', default=['numpy'], help='Backends to run (default: numpy, CPU only).')
+    parser.add_argument('--engine', nargs='+', default=ENGINES, choices=ENGINES)
+    parser.add_argument('--grid-size', nargs='+', type=int, default=GRID_SIZES)
+    parser.add_argument('--radius', nargs='+', type=int, default=RADII)
+    parser.add_argument('--shape', nargs='+', default=SHAPES, choices=SHAPES)
+    parser.add_argument('--quick', action='store_true', help='Small matrix for a fast check.')
+    parser.add_argument('--min-seconds', type=float, default=1.0, help='Minimum timed duration per case.')
+    parser.add_argument('--output', help='Write the results JSON here.')
+    parser.add_argument('--baseline', help=f'Compare against this results JSON (default: {DEFAULT_BASELINE} if it exists).')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed relative slowdown before a case counts as a regression.')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the default baseline.')
+    args = parser.parse_args(argv)
+
+    matrix = {"grid_sizes": args.grid_size, "radii": args.radius, "shapes": args.shape, "engines": args.engine}
+    if args.quick:
+        matrix = QUICK
+    results = run_matrix(args.backend, matrix["engines"], matrix["grid_sizes"], matrix["radii"], matrix["shapes"], args.min_seconds)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "processor": platform.processor(), "cpus": os.cpu_count(),
+                    "python": platform.python_version(), "numpy": numpy.__version__},
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline_path = args.baseline or (DEFAULT_BASELINE if os.path.exists(DEFAULT_BASELINE) and not args.save_baseline else None)
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old:.1f} -> {new:.1f} steps/s ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions against {baseline_path} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
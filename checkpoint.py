@@ -0,0 +1,105 @@
+"""Checkpoint files holding an engine's world, parameters and RNG state.
+
+Layout: the 8-byte magic, a little-endian uint32 header length, a JSON header, then the raw
+world bytes starting at a 64-byte aligned offset so they can be memory-mapped on restore.
+"""
+import json
+import os
+import struct
+import numpy
+
+MAGIC = b"LENIACKP"
+VERSION = 1
+ALIGNMENT = 64
+# Engine attributes saved with every checkpoint (batched and multi-channel engines also save their kernel table)
+PARAMS = ["kernel_radius", "kernel_shape", "mu", "sigma", "timestep"]
+
+
+def write_checkpoint(path, world, header):
+    """Writes `world` (a host array) and the JSON-serializable `header` atomically to `path`."""
+    world = numpy.ascontiguousarray(world)
+    header = dict(header, version=VERSION, dtype=world.dtype.str, shape=list(world.shape))
+    header_bytes = json.dumps(header).encode()
+    offset = len(MAGIC) + 4 + len(header_bytes)
+    padding = -offset % ALIGNMENT
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * padding)
+        f.write(world.tobytes())
+    # Replace in one step so a crash mid-write leaves the previous checkpoint intact
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(path, mmap=True):
+    """Returns (world, header). With `mmap` the world is a copy-on-write memory map of the file."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Lenia checkpoint")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length))
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported checkpoint version {header['version']}")
+        offset = len(MAGIC) + 4 + header_length
+        offset += -offset % ALIGNMENT
+        dtype = numpy.dtype(header["dtype"])
+        shape = tuple(header["shape"])
+        if mmap:
+            world = numpy.memmap(path, dtype=dtype, mode="c", offset=offset, shape=shape)
+        else:
+            f.seek(offset)
+            world = numpy.fromfile(f, dtype=dtype, count=int(numpy.prod(shape))).reshape(shape)
+    return world, header
+
+
+def _to_json(value, backend):
+    if hasattr(value, "shape"):
+        return backend.asnumpy(value).tolist()
+    return value
+
+
+def save_engine(engine, path, metadata=None):
+    """Saves an engine's world, parameters and the backend RNG state."""
+    backend = engine.backend
+    params = {name: _to_json(getattr(engine, name), backend) for name in PARAMS}
+    if hasattr(engine, "kernels"):
+        # (radius, shape) pairs for BatchedLenia, dicts for MultiChannelLenia
+        params["kernels"] = [kernel if isinstance(kernel, dict) else list(kernel) for kernel in engine.kernels]
+    if hasattr(engine, "kernel_index"):
+        params["kernel_index"] = _to_json(engine.kernel_index, backend)
+    header = {
+        "engine": type(engine).__name__,
+        "params": params,
+        "rng_state": backend.get_rng_state(),
+        "metadata": metadata or {},
+    }
+    write_checkpoint(path, backend.asnumpy(engine.get_world()), header)
+
+
+def load_engine(engine, path, mmap=True):
+    """Restores a checkpoint written by `save_engine` into `engine` and returns its metadata."""
+    world, header = read_checkpoint(path, mmap=mmap)
+    if header["engine"] != type(engine).__name__:
+        raise ValueError(f"Checkpoint was written by {header['engine']}, not {type(engine).__name__}")
+    if world.shape != engine.get_world().shape:
+        raise ValueError(f"Checkpoint world {world.shape} does not match the engine grid {engine.get_world().shape}")
+
+    params = header["params"]
+    engine.kernel_shape = params["kernel_shape"]
+    engine.set_kernel_radius(params["kernel_radius"])
+    if "kernel_index" in params:
+        engine.set_kernels([tuple(kernel) for kernel in params["kernels"]], params["kernel_index"])
+    elif "kernels" in params:
+        engine.set_kernels(params["kernels"])
+    engine.set_mu(params["mu"])
+    engine.set_sigma(params["sigma"])
+    engine.set_timestep(params["timestep"])
+
+    xp = engine.xp
+    # NumPy engines keep the memory map itself, so pages are only read when first touched
+    engine.world = world if xp is numpy else xp.asarray(world)
+    engine.backend.set_rng_state(header["rng_state"])
+    return header["metadata"]
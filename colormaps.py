@@ -0,0 +1,43 @@
+"""Colormap lookup tables for turning world values in [0, 1] into RGB.
+
+Tables come from matplotlib when it is installed; otherwise they are interpolated from the
+17 anchor colours below (sampled from the matplotlib maps), which is accurate to a few levels.
+"""
+import numpy
+
+# 17 evenly spaced sRGB samples of each map, from 0 to 1
+_ANCHORS = {
+    "viridis": [(68, 1, 84), (72, 24, 106), (71, 45, 123), (66, 64, 134), (59, 82, 139), (51, 99, 141), (44, 114, 142), (38, 130, 142), (33, 145, 140), (31, 160, 136), (40, 174, 128), (63, 188, 115), (94, 201, 98), (132, 212, 75), (173, 220, 48), (216, 226, 25), (253, 231, 37)],
+    "magma": [(0, 0, 4), (10, 8, 34), (29, 17, 71), (54, 16, 107), (81, 18, 124), (106, 28, 129), (131, 38, 129), (156, 46, 127), (183, 55, 121), (208, 65, 111), (231, 82, 99), (245, 107, 92), (252, 137, 97), (254, 167, 114), (254, 196, 136), (253, 226, 163), (252, 253, 191)],
+    "inferno": [(0, 0, 4), (11, 7, 36), (33, 12, 74), (61, 9, 101), (87, 16, 110), (113, 25, 110), (138, 34, 106), (163, 44, 97), (188, 55, 84), (210, 70, 68), (228, 90, 49), (241, 115, 29), (249, 142, 9), (252, 172, 17), (249, 203, 53), (242, 234, 105), (252, 255, 164)],
+    "plasma": [(13, 8, 135), (49, 5, 151), (76, 2, 161), (102, 0, 167), (126, 3, 168), (149, 17, 161), (170, 35, 149), (188, 53, 135), (204, 71, 120), (218, 90, 106), (230, 108, 92), (240, 128, 78), (248, 149, 64), (253, 172, 51), (253, 197, 39), (248, 223, 37), (240, 249, 33)],
+    "cividis": [(0, 34, 78), (0, 46, 106), (26, 56, 111), (50, 67, 109), (67, 78, 108), (83, 90, 109), (97, 101, 111), (111, 112, 115), (125, 124, 120), (140, 136, 120), (155, 148, 118), (171, 160, 114), (188, 174, 108), (205, 187, 99), (222, 201, 88), (240, 216, 70), (254, 232, 56)],
+    "gray": [(0, 0, 0), (255, 255, 255)],
+}
+
+COLORMAPS = list(_ANCHORS)
+
+
+def get_lut(name, size=256):
+    """Returns a (size, 3) uint8 lookup table for the colormap `name`."""
+    if name not in _ANCHORS:
+        raise ValueError(f"Unknown colormap '{name}', expected one of {COLORMAPS}")
+    positions = numpy.linspace(0, 1, size)
+    try:
+        import matplotlib
+        colors = matplotlib.colormaps[name](positions)[:, :3] * 255
+    except ImportError:
+        anchors = numpy.array(_ANCHORS[name], dtype=numpy.float64)
+        anchor_positions = numpy.linspace(0, 1, len(anchors))
+        colors = numpy.stack([numpy.interp(positions, anchor_positions, anchors[:, c]) for c in range(3)], axis=-1)
+    return numpy.rint(colors).astype(numpy.uint8)
+
+
+def apply_lut(world, lut, xp=numpy):
+    """Maps a world (floats in [0, 1], or uint8 levels) to an (..., 3) uint8 image through `lut`."""
+    lut = xp.asarray(lut)
+    if world.dtype == xp.uint8:
+        if len(lut) == 256:
+            return lut[world]
+        world = world / 255
+    return lut[xp.rint(xp.clip(world, 0, 1) * (len(lut) - 1)).astype(xp.int32)]
@@ -1,3 +1,8 @@
+import os
+
+# Directory of this file; cache files are kept here rather than in the working directory
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Simulation parameters
 GRID_SIZE = 800
 TIMESTEP = 0.1
@@ -12,3 +17,29 @@ MU_MIN = 0.05
 MU_MAX = 0.3
 SIGMA_MIN = 0.005
 SIGMA_MAX = 0.05
+
+# Compute backend: "auto" (CuPy if a GPU is available, else NumPy), "cupy" or "numpy"
+BACKEND = "auto"
+# Threads used by the CPU FFTs (-1 = all cores)
+FFT_WORKERS = -1
+# Use pyFFTW for the CPU FFTs when it is installed, caching plans in the wisdom file
+# (saved when the process exits; LENIA_FFTW_WISDOM_PATH overrides the path, also for child processes)
+USE_FFTW = True
+FFTW_WISDOM_PATH = os.environ.get("LENIA_FFTW_WISDOM_PATH", os.path.join(PROJECT_DIR, ".fftw_wisdom.json"))
+
+# Number of kernels/spectra kept by the kernel cache (see kernels.py)
+KERNEL_CACHE_SIZE = 32
+
+# Convolution autotuning (see convolution.py): time each strategy once per configuration
+# and remember the fastest in this table
+AUTOTUNE = True
+STRATEGY_TABLE_PATH = os.path.join(PROJECT_DIR, ".lenia_strategies.json")
+
+# Largest world view in the window, in pixels; larger worlds are panned and zoomed (see viewport.py)
+VIEW_SIZE_MAX = 1024
+
+# Default display colormap (see colormaps.py)
+COLORMAP = "viridis"
+
+# Durations kept per phase by the profiler (see profiling.py)
+PROFILE_SAMPLES = 512
@@ -0,0 +1,216 @@
+import json
+import math
+import os
+import tempfile
+import time
+import numpy
+import config
+import grid
+import kernels
+from backend import get_backend
+
+
+class FFTConvolution:
+    """Toroidal convolution through the cached kernel spectrum: O(N log N), independent of radius."""
+    name = "fft"
+    shapes = kernels.KERNEL_SHAPES
+
+    def __init__(self, radius, shape, grid_shape, backend):
+        self.backend = backend
+        self.grid_shape = tuple(grid_shape)
+        # Slow FFT lengths are wrap-padded to fast ones (see grid.py)
+        self.layout = grid.FFTLayout(self.grid_shape, radius, backend.xp)
+        self.kernel_fft = kernels.get_kernel_fft(radius, shape, self.layout.shape, backend)
+
+    @staticmethod
+    def cost(radius, shape, grid_shape):
+        fft_shape = grid.fft_shape(grid_shape, radius)
+        n = fft_shape[0] * fft_shape[1]
+        # Forward and inverse real transforms plus the spectral multiply
+        return 2.5 * n * math.log2(n) + 4 * n
+
+    def potential(self, world):
+        layout = self.layout
+        world_fft = self.backend.rfft2(layout.pad(world))
+        return layout.crop(self.backend.irfft2(world_fft * self.kernel_fft, s=layout.shape))
+
+
+class DirectConvolution:
+    """Direct spatial convolution with wrap-around boundaries: O(N * R^2)."""
+    name = "direct"
+    shapes = kernels.KERNEL_SHAPES
+
+    def __init__(self, radius, shape, grid_shape, backend):
+        self.backend = backend
+        self.kernel = kernels.get_kernel(radius, shape, backend)
+
+    @staticmethod
+    def cost(radius, shape, grid_shape):
+        return 2 * grid_shape[0] * grid_shape[1] * (2 * radius + 1)**2
+
+    def potential(self, world):
+        return self.backend.convolve2d(world, self.kernel)
+
+
+class SeparableConvolution:
+    """Two 1-D wrapped passes for kernels that factor into rows and columns: O(N * R)."""
+    name = "separable"
+    shapes = kernels.SEPARABLE_SHAPES
+
+    def __init__(self, radius, shape, grid_shape, backend):
+        self.backend = backend
+        self.weights = kernels.create_kernel_1d(radius, shape, backend.xp)
+
+    @staticmethod
+    def cost(radius, shape, grid_shape):
+        return 2 * 2 * grid_shape[0] * grid_shape[1] * (2 * radius + 1)
+
+    def potential(self, world):
+        rows = self.backend.correlate1d(world, self.weights, axis=0)
+        return self.backend.correlate1d(rows, self.weights, axis=1)
+
+
+class BoxConvolution:
+    """Box filter for the square kernel from wrapped running sums: O(N), independent of radius."""
+    name = "box"
+    shapes = ["square"]
+
+    def __init__(self, radius, shape, grid_shape, backend):
+        self.backend = backend
+        self.radius = int(radius)
+        self.scale = 1.0 / (2 * self.radius + 1)**2
+
+    @staticmethod
+    def cost(radius, shape, grid_shape):
+        return 12 * grid_shape[0] * grid_shape[1]
+
+    def _box_sum(self, a, axis):
+        # Pad with R+1 wrapped cells before and R after, so a difference of the running sum
+        # at distance 2R+1 is the sum over the toroidal window [i-R, i+R]
+        xp = self.backend.xp
+        r = self.radius
+        n = a.shape[axis]
+        before = xp.take(a, xp.arange(n - r - 1, n) % n, axis=axis)
+        after = xp.take(a, xp.arange(r) % n, axis=axis)
+        # Accumulate in float64 so long running sums do not lose the small differences
+        running = xp.cumsum(xp.concatenate([before, a, after], axis=axis), axis=axis, dtype=xp.float64)
+        upper = xp.take(running, xp.arange(2 * r + 1, 2 * r + 1 + n), axis=axis)
+        lower = xp.take(running, xp.arange(n), axis=axis)
+        return upper - lower
+
+    def potential(self, world):
+        box = self._box_sum(self._box_sum(world, 0), 1)
+        return (box * self.scale).astype(world.dtype)
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (FFTConvolution, DirectConvolution, SeparableConvolution, BoxConvolution)
+}
+
+
+def candidates(radius, shape, grid_shape, prune=8.0):
+    """Lists the strategies supporting `shape`, dropping those the cost model rates `prune`x worse than the best."""
+    supported = [strategy for strategy in STRATEGIES.values() if shape in strategy.shapes]
+    costs = {strategy.name: strategy.cost(radius, shape, grid_shape) for strategy in supported}
+    cheapest = min(costs.values())
+    return [strategy for strategy in supported if costs[strategy.name] <= prune * cheapest]
+
+
+def _table_key(radius, shape, grid_shape, backend):
+    return f"{backend.name}:{grid_shape[0]}x{grid_shape[1]}:r{int(radius)}:{shape}"
+
+
+# path -> ((modification time, size), table): the table is parsed again only when the file changes
+_tables = {}
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_table(path=None):
+    """Returns the autotuning table; treat it as read-only (save_table writes a new one)."""
+    path = config.STRATEGY_TABLE_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return {}
+    stamp = _stamp(path)
+    cached = _tables.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path) as f:
+            cached = _tables[path] = (stamp, json.load(f))
+    return cached[1]
+
+
+def save_table(table, path=None):
+    path = config.STRATEGY_TABLE_PATH if path is None else path
+    if not path:
+        return
+    # Write to a temporary file of this process first, so concurrent writers never share one
+    # and concurrent readers never see a half-written table
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        # mkstemp makes the file private; the table stays readable by other users as before
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, "w") as f:
+            json.dump(table, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    _tables[path] = (_stamp(path), table)
+
+
+def autotune(radius, shape, grid_shape, backend=None, repeats=3, path=None):
+    """Times every candidate strategy on a random world, records the winner in the table and returns its name."""
+    backend = get_backend(backend)
+    grid_shape = tuple(grid_shape)
+    # A local generator, so tuning does not advance the global RNG that --seed and checkpoints rely on
+    world = backend.xp.asarray(numpy.random.default_rng(0).random(grid_shape, dtype=numpy.float32))
+    timings = {}
+    for strategy in candidates(radius, shape, grid_shape):
+        convolution = strategy(radius, shape, grid_shape, backend)
+        # One untimed call so plan creation and kernel caching are not counted
+        convolution.potential(world)
+        backend.synchronize()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            convolution.potential(world)
+        backend.synchronize()
+        timings[strategy.name] = (time.perf_counter() - start) / repeats
+
+    best = min(timings, key=timings.get)
+    table = dict(load_table(path))
+    table[_table_key(radius, shape, grid_shape, backend)] = {"strategy": best, "seconds": timings}
+    save_table(table, path)
+    return best
+
+
+def select_strategy(radius, shape, grid_shape, backend=None, tune=None):
+    """Returns the name of the fastest strategy for this configuration.
+
+    Uses the persisted autotuning table when it has an entry. Otherwise runs `autotune` once
+    (when `tune`, default config.AUTOTUNE) or falls back to the cost model.
+    """
+    backend = get_backend(backend)
+    grid_shape = tuple(grid_shape)
+    entry = load_table().get(_table_key(radius, shape, grid_shape, backend))
+    if entry is not None and entry["strategy"] in STRATEGIES:
+        return entry["strategy"]
+    if config.AUTOTUNE if tune is None else tune:
+        return autotune(radius, shape, grid_shape, backend)
+    return min(candidates(radius, shape, grid_shape), key=lambda s: s.cost(radius, shape, grid_shape)).name
+
+
+def make_convolution(radius, shape, grid_shape, backend=None, strategy="auto"):
+    """Builds the convolution object for `strategy`, resolving "auto" with `select_strategy`."""
+    backend = get_backend(backend)
+    kernels.validate_radius(radius, grid_shape)
+    if strategy == "auto":
+        strategy = select_strategy(radius, shape, grid_shape, backend)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown convolution strategy '{strategy}', expected one of {['auto', *STRATEGIES]}")
+    if shape not in STRATEGIES[strategy].shapes:
+        raise ValueError(f"Strategy '{strategy}' does not support the '{shape}' kernel")
+    return STRATEGIES[strategy](radius, shape, grid_shape, backend)
@@ -0,0 +1,93 @@
+"""World grid shapes, FFT-friendly layouts and resizing.
+
+Engines take a per-instance `grid_shape`: None (config.GRID_SIZE square), an int (square),
+an (height, width) pair or a "HxW" string.
+
+FFTs of lengths with large prime factors are several times slower than those of nearby
+"fast" lengths (products of 2, 3 and 5). When an axis has a slow length n, `FFTLayout`
+wrap-pads the world by the kernel radius R to next_fast_len(n + 2R) before the transform and
+crops the potential afterwards. Every output cell then only sees cells inside the padded copy,
+so the result is exactly the toroidal convolution on the original n-cell axis.
+"""
+import numpy
+import scipy.fft
+import config
+
+
+def grid_shape(shape=None):
+    """Normalizes a grid shape to an (height, width) tuple of ints."""
+    if shape is None:
+        shape = config.GRID_SIZE
+    if isinstance(shape, str):
+        shape = [int(n) for n in shape.lower().split("x")]
+        if len(shape) == 1:
+            shape = shape[0]
+    if numpy.ndim(shape) == 0:
+        shape = (shape, shape)
+    shape = tuple(int(n) for n in shape)
+    if len(shape) != 2 or min(shape) < 1:
+        raise ValueError(f"Grid shape must be a positive size or (height, width) pair, got {shape}")
+    return shape
+
+
+def is_fast_len(n):
+    return scipy.fft.next_fast_len(n, real=True) == n
+
+
+def fft_shape(grid_shape, radius):
+    """Returns the shape the world is transformed at for a kernel of `radius` (see FFTLayout)."""
+    return tuple(n if is_fast_len(n) else scipy.fft.next_fast_len(n + 2 * int(radius), real=True) for n in grid_shape)
+
+
+class FFTLayout:
+    """Maps a (..., H, W) world onto the FFT grid it is convolved on, and the potential back.
+
+    On axes with a fast length the world is used as is; on the others it is wrap-padded so
+    that cell i lands at i + radius of a next_fast_len(n + 2 * radius) axis.
+    """
+
+    def __init__(self, grid_shape, radius, xp=numpy):
+        self.xp = xp
+        self.grid_shape = tuple(grid_shape)
+        self.radius = int(radius)
+        self.shape = fft_shape(self.grid_shape, radius)
+        self.padded = self.shape != self.grid_shape
+        self.offsets = tuple(0 if n == m else int(radius) for n, m in zip(self.grid_shape, self.shape))
+        # Source cell of every padded cell along each axis
+        self._indices = [xp.asarray((numpy.arange(m) - offset) % n)
+                         for n, m, offset in zip(self.grid_shape, self.shape, self.offsets)]
+
+    def pad(self, world, out=None, rows=None):
+        """Returns the world on the FFT grid; `out` and `rows` are optional (..., H', W) and (..., H', W') buffers."""
+        if not self.padded:
+            return world
+        xp = self.xp
+        rows = xp.take(world, self._indices[0], axis=-2, out=rows)
+        return xp.take(rows, self._indices[1], axis=-1, out=out)
+
+    def crop(self, potential):
+        """Returns the (..., H, W) view of a potential computed on the FFT grid."""
+        if not self.padded:
+            return potential
+        (top, left), (height, width) = self.offsets, self.grid_shape
+        return potential[..., top:top + height, left:left + width]
+
+
+def resize_world(world, shape, backend, resample=True):
+    """Returns a (..., H, W) world resized to `shape`.
+
+    With `resample` the world is linearly interpolated on the torus, so patterns keep their
+    place but change scale; otherwise the torus is cropped or tiled, keeping the cell scale.
+    """
+    xp = backend.xp
+    shape = grid_shape(shape)
+    old_shape = world.shape[-2:]
+    if tuple(old_shape) == shape:
+        return world
+    if resample:
+        factors = [1] * (world.ndim - 2) + [new / old for new, old in zip(shape, old_shape)]
+        world = backend.zoom(world, factors)
+        return xp.clip(world, 0, 1).astype(xp.float32)
+    for axis, n in zip((-2, -1), shape):
+        world = xp.take(world, xp.arange(n) % world.shape[axis], axis=axis)
+    return world
@@ -0,0 +1,267 @@
+import math
+import threading
+from collections import OrderedDict
+import config
+import grid
+from backend import get_backend
+
+KERNEL_SHAPES = ["ring", "gaussian", "square"]
+# Multi-ring kernel of the original Lenia; built by the factory below but, needing its ring
+# heights `beta`, only offered by engines with a kernel table (see lenia_core_multichannel.py)
+SHELL_SHAPES = ["shell"]
+# Shapes whose 2-D kernel is the outer product of a 1-D kernel with itself
+SEPARABLE_SHAPES = ["gaussian", "square"]
+
+# LRU caches shared by every engine; guarded by a lock so precomputation can run on a worker thread
+_lock = threading.Lock()
+_kernel_cache = OrderedDict()
+_spectrum_cache = OrderedDict()
+_stats = {"hits": 0, "misses": 0}
+_maxsize = config.KERNEL_CACHE_SIZE
+
+
+def create_kernel(radius, shape, xp, dtype=None, beta=None):
+    """Builds the normalized (2R+1, 2R+1) spatial kernel for `shape` (`beta` only applies to "shell")."""
+    dtype = xp.float32 if dtype is None else dtype
+    radius = int(radius)
+    x, y = xp.ogrid[-radius:radius+1, -radius:radius+1]
+    distance = xp.sqrt(x**2 + y**2)
+    kernel = xp.zeros((2 * radius + 1, 2 * radius + 1), dtype=dtype)
+
+    if shape == "ring":
+        kernel[(distance > radius * 0.38) & (distance < radius * 0.62)] = 1
+    elif shape == "gaussian":
+        # A smoother Gaussian kernel is generally better
+        kernel = xp.exp(-(distance**2) / (2 * (radius / 3)**2)).astype(dtype)
+    elif shape == "square":
+        kernel[(-radius <= x) & (x <= radius) & (-radius <= y) & (y <= radius)] = 1
+    elif shape == "shell":
+        # len(beta) concentric rings over distances [0, R), ring i peaking at beta[i] with the
+        # exponential core exp(4 - 1 / (r (1 - r))) of the original Lenia
+        heights = xp.asarray([1.0] if beta is None else beta, dtype=dtype)
+        shells = len(heights) * distance / radius
+        ring = xp.minimum(shells.astype(xp.int32), len(heights) - 1)
+        r = shells % 1
+        core = xp.exp(4 - 1 / xp.maximum(r * (1 - r), 1e-9))
+        kernel = xp.where(shells < len(heights), heights[ring] * core, 0).astype(dtype)
+
+    if xp.sum(kernel) > 0:
+        kernel = kernel / xp.sum(kernel)
+
+    return kernel
+
+
+def create_kernel_1d(radius, shape, xp, dtype=None):
+    """Builds the normalized (2R+1,) factor of a separable kernel: outer(k, k) == create_kernel()."""
+    if shape not in SEPARABLE_SHAPES:
+        raise ValueError(f"Kernel shape '{shape}' is not separable, expected one of {SEPARABLE_SHAPES}")
+    dtype = xp.float32 if dtype is None else dtype
+    radius = int(radius)
+    x = xp.arange(-radius, radius + 1)
+
+    if shape == "gaussian":
+        kernel = xp.exp(-(x**2) / (2 * (radius / 3)**2)).astype(dtype)
+    else:
+        kernel = xp.ones(2 * radius + 1, dtype=dtype)
+
+    return kernel / xp.sum(kernel)
+
+
+def max_radius(grid_shape):
+    """Largest radius whose (2R+1, 2R+1) footprint fits in `grid_shape`."""
+    return (min(grid_shape) - 1) // 2
+
+
+def validate_radius(radius, grid_shape):
+    """Raises ValueError when the kernel footprint is wider than the grid, where it would wrap onto itself."""
+    if int(radius) > max_radius(grid_shape):
+        raise ValueError(f"Kernel radius {int(radius)} needs a grid of at least {2 * int(radius) + 1} cells "
+                         f"per side, got {'x'.join(str(n) for n in grid_shape)} (max radius {max_radius(grid_shape)})")
+
+
+def _wrap_kernel(kernel, out, xp):
+    # Writes a (2R+1, 2R+1) kernel into the (..., H, W) array `out` with its centre on the origin
+    # of the torus: the same layout as padding it at the corner and rolling by -R, without the
+    # full-size roll copy
+    radius = kernel.shape[-1] // 2
+    rows = xp.arange(-radius, radius + 1) % out.shape[-2]
+    cols = xp.arange(-radius, radius + 1) % out.shape[-1]
+    out[..., rows[:, None], cols[None, :]] = kernel
+
+
+def create_kernel_fft(radius, shape, grid_shape, backend, dtype=None, beta=None):
+    """Returns the rfft2 of the kernel wrapped onto a `grid_shape` torus, centred on the origin."""
+    return create_kernel_ffts([(radius, shape, beta)], grid_shape, backend, dtype)[0]
+
+
+def create_kernel_ffts(specs, grid_shape, backend, dtype=None):
+    """Builds the spectra of many kernels at once as a (K, H, W//2+1) stack.
+
+    `specs` are (radius, shape) or (radius, shape, beta) tuples. Every kernel is written straight
+    into its wrapped position in one (K, H, W) array, which takes a single batched rfft2.
+    """
+    xp = backend.xp
+    dtype = xp.float32 if dtype is None else dtype
+    grid_shape = tuple(int(n) for n in grid_shape)
+    wrapped = xp.zeros((len(specs), *grid_shape), dtype=dtype)
+    for k, (radius, shape, *beta) in enumerate(specs):
+        validate_radius(radius, grid_shape)
+        _wrap_kernel(create_kernel(radius, shape, xp, dtype, beta[0] if beta else None), wrapped[k], xp)
+    return backend.rfft2(wrapped)
+
+
+def gaussian_spectrum(radius, grid_shape, xp, dtype=None):
+    """Closed-form rfft2 of the untruncated gaussian kernel (sigma = R/3) on a `grid_shape` torus.
+
+    No spatial kernel or FFT is involved, so the radius is not limited by the grid. The
+    "gaussian" kernel of create_kernel stops at |x|, |y| <= R (3 sigma); without that cut this
+    spectrum is within about 1% of its rfft2.
+    """
+    dtype = xp.float32 if dtype is None else dtype
+    sigma = radius / 3
+    # Sampling the gaussian on the integers periodizes its spectrum (Poisson summation); aliases
+    # further than `reach` periods away are below float64 resolution
+    reach = math.ceil(math.sqrt(37) / (math.pi * sigma * math.sqrt(2))) + 1
+    aliases = xp.arange(-reach, reach + 1)[:, None]
+
+    def axis(frequencies, n):
+        spectrum = xp.exp(-2 * math.pi**2 * sigma**2 * (frequencies[None, :] / n - aliases)**2).sum(axis=0)
+        return spectrum / spectrum[0]
+
+    height, width = (int(n) for n in grid_shape)
+    rows = axis(xp.fft.fftfreq(height, 1 / height), height)
+    cols = axis(xp.arange(width // 2 + 1), width)
+    return (rows[:, None] * cols[None, :]).astype(xp.result_type(dtype, xp.complex64))
+
+
+def _cached(cache, key, build):
+    with _lock:
+        if key in cache:
+            _stats["hits"] += 1
+            cache.move_to_end(key)
+            return cache[key]
+        _stats["misses"] += 1
+
+    # Build outside the lock so a slow transform does not block other lookups
+    value = build()
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > _maxsize:
+            cache.popitem(last=False)
+    return value
+
+
+def _beta_key(beta):
+    return None if beta is None else tuple(float(b) for b in beta)
+
+
+def get_kernel(radius, shape, backend=None, dtype=None, beta=None):
+    """Returns the memoized spatial kernel. The result is shared and must not be modified in place."""
+    backend = get_backend(backend)
+    dtype = backend.xp.dtype(backend.xp.float32 if dtype is None else dtype)
+    key = (int(radius), shape, dtype.str, backend.name, _beta_key(beta))
+    return _cached(_kernel_cache, key, lambda: create_kernel(radius, shape, backend.xp, dtype, beta))
+
+
+def get_kernel_fft(radius, shape, grid_shape, backend=None, dtype=None, beta=None, analytic=False):
+    """Returns the memoized kernel spectrum. The result is shared and must not be modified in place.
+
+    With `analytic`, the "gaussian" spectrum comes from gaussian_spectrum instead of a transform.
+    """
+    backend = get_backend(backend)
+    dtype = backend.xp.dtype(backend.xp.float32 if dtype is None else dtype)
+    grid_shape = tuple(int(n) for n in grid_shape)
+    if analytic:
+        if shape != "gaussian":
+            raise ValueError(f"Only the gaussian kernel has an analytic spectrum, not '{shape}'")
+        key = (int(radius), "gaussian-analytic", grid_shape, dtype.str, backend.name, None)
+        return _cached(_spectrum_cache, key, lambda: gaussian_spectrum(radius, grid_shape, backend.xp, dtype))
+    key = (int(radius), shape, grid_shape, dtype.str, backend.name, _beta_key(beta))
+    return _cached(_spectrum_cache, key, lambda: create_kernel_fft(radius, shape, grid_shape, backend, dtype, beta))
+
+
+def get_kernel_ffts(specs, grid_shape, backend=None, dtype=None):
+    """Returns the (K, H, W//2+1) stack of the spectra of `specs` (see create_kernel_ffts).
+
+    Spectra already in the cache are reused; the missing ones are built together in one batch.
+    """
+    backend = get_backend(backend)
+    dtype = backend.xp.dtype(backend.xp.float32 if dtype is None else dtype)
+    grid_shape = tuple(int(n) for n in grid_shape)
+    specs = [(int(radius), shape, beta[0] if beta else None) for radius, shape, *beta in specs]
+    keys = [(radius, shape, grid_shape, dtype.str, backend.name, _beta_key(beta)) for radius, shape, beta in specs]
+    spectra = {}
+    with _lock:
+        for key in keys:
+            if key in _spectrum_cache:
+                _spectrum_cache.move_to_end(key)
+                spectra[key] = _spectrum_cache[key]
+        _stats["hits"] += sum(key in spectra for key in keys)
+        missing = list(dict.fromkeys(key for key in keys if key not in spectra))
+        _stats["misses"] += len(missing)
+
+    if missing:
+        built = create_kernel_ffts([specs[keys.index(key)] for key in missing], grid_shape, backend, dtype)
+        with _lock:
+            for key, spectrum in zip(missing, built):
+                spectra[key] = _spectrum_cache[key] = spectrum
+                _spectrum_cache.move_to_end(key)
+            while len(_spectrum_cache) > _maxsize:
+                _spectrum_cache.popitem(last=False)
+    return backend.xp.stack([spectra[key] for key in keys])
+
+
+def precompute_kernels(grid_shape, shapes=None, radii=None, backend=None, dtype=None, background=True):
+    """Fills the spectrum cache for every (radius, shape) pair, by default on a daemon thread.
+
+    Defaults to every shape over config.RADIUS_MIN..RADIUS_MAX, up to the largest radius that fits
+    the grid. `grid_shape` is the world shape; each spectrum is built at the FFT shape the engines
+    use for it (see grid.fft_shape). The cache is grown to hold all requested spectra so they are not evicted by their own precomputation.
+    """
+    global _maxsize
+    shapes = KERNEL_SHAPES if shapes is None else shapes
+    radii = range(config.RADIUS_MIN, min(config.RADIUS_MAX, max_radius(grid_shape)) + 1) if radii is None else radii
+    pairs = [(radius, shape) for shape in shapes for radius in radii]
+    with _lock:
+        _maxsize = max(_maxsize, len(pairs))
+
+    def run():
+        for radius, shape in pairs:
+            get_kernel_fft(radius, shape, grid.fft_shape(grid_shape, radius), backend, dtype)
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="kernel-precompute", daemon=True)
+    thread.start()
+    return thread
+
+
+def cache_info():
+    """Returns hit/miss counters and the current size of the kernel caches."""
+    with _lock:
+        return {
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "kernels": len(_kernel_cache),
+            "spectra": len(_spectrum_cache),
+            "maxsize": _maxsize,
+        }
+
+
+def set_cache_size(maxsize):
+    global _maxsize
+    with _lock:
+        _maxsize = max(1, int(maxsize))
+        for cache in (_kernel_cache, _spectrum_cache):
+            while len(cache) > _maxsize:
+                cache.popitem(last=False)
+
+
+def clear_cache():
+    with _lock:
+        _kernel_cache.clear()
+        _spectrum_cache.clear()
+        _stats["hits"] = 0
+        _stats["misses"] = 0
@@ -1,61 +1,160 @@
-import cupy as np
+import checkpoint
 import config
+import grid
+import kernels
+import profiling
+from backend import get_backend
+
+# Precision modes: the dtype the world is stored in and the dtype of the FFT and growth arithmetic.
+# Spectra are complex64 for float32 arithmetic and complex128 for float64.
+PRECISIONS = {
+    "float32": ("float32", "float32"),
+    "float16": ("float16", "float32"),
+    "float64": ("float64", "float64"),
+}
 
 class Lenia:
-    def __init__(self):
-        self.kernel_radius = config.KERNEL_RADIUS
+    def __init__(self, backend=None, inplace=False, grid_shape=None, precision="float32", kernel_radius=None):
+        self.backend = get_backend(backend)
+        self.xp = self.backend.xp
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {list(PRECISIONS)}")
+        self.precision = precision
+        self.dtype, self.compute_dtype = (self.xp.dtype(name) for name in PRECISIONS[precision])
+        # In-place mode reuses preallocated spectrum/potential buffers and double-buffers the world
+        self.inplace = inplace
+        self._buffers = None
+        # Per-phase timings; replace with a profiling.Profiler to record them
+        self.profiler = profiling.DISABLED
+        # Dynamics metrics (see metrics.py); None skips them entirely
+        self.metrics = None
+        self.kernel_radius = config.KERNEL_RADIUS if kernel_radius is None else max(1, int(kernel_radius))
         self.timestep = config.TIMESTEP
         self.mu = 0.15
         self.sigma = 0.015
         self.kernel_shape = "gaussian" # Default to a better kernel
-        self.kernel_shapes = ["ring", "gaussian", "square"]
-        self.world = np.random.rand(config.GRID_SIZE, config.GRID_SIZE, dtype=np.float32)
+        self.kernel_shapes = list(kernels.KERNEL_SHAPES)
+        self.grid_shape = grid.grid_shape(grid_shape)
+        self.world = self.backend.random(self.grid_shape).astype(self.dtype, copy=False)
+        self._set_layout(self.kernel_radius)
         self.kernel_fft = self._create_kernel_fft(self.kernel_radius, self.kernel_shape)
 
-    def _create_kernel_fft(self, radius, shape):
-        radius = int(radius)
-        x, y = np.ogrid[-radius:radius+1, -radius:radius+1]
-        distance = np.sqrt(x**2 + y**2)
-        kernel = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=np.float32)
-
-        if shape == "ring":
-            kernel[(distance > radius * 0.38) & (distance < radius * 0.62)] = 1
-        elif shape == "gaussian":
-            # A smoother Gaussian kernel is generally better
-            kernel = np.exp(-(distance**2) / (2 * (radius / 3)**2))
-        elif shape == "square":
-            kernel[(-radius <= x) & (x <= radius) & (-radius <= y) & (y <= radius)] = 1
-
-        if np.sum(kernel) > 0:
-            kernel = kernel / np.sum(kernel)
-
-        # Pad kernel to world size and shift for FFT
-        padded_kernel = np.zeros((config.GRID_SIZE, config.GRID_SIZE), dtype=np.float32)
-        pad_x, pad_y = (config.GRID_SIZE - kernel.shape[0]) // 2, (config.GRID_SIZE - kernel.shape[1]) // 2
-        padded_kernel[pad_x:pad_x+kernel.shape[0], pad_y:pad_y+kernel.shape[1]] = kernel
-        padded_kernel = np.roll(padded_kernel, (-radius, -radius), axis=(0, 1))
-        
-        return np.fft.rfft2(padded_kernel)
+    def _set_layout(self, radius):
+        # FFT grid for kernels up to `radius`; slow FFT lengths are wrap-padded to fast ones (see grid.py)
+        kernels.validate_radius(radius, self.grid_shape)
+        self.layout = grid.FFTLayout(self.grid_shape, radius, self.xp)
+
+    def _create_kernel_fft(self, radius, shape, beta=None):
+        return kernels.get_kernel_fft(radius, shape, self.layout.shape, self.backend, dtype=self.compute_dtype, beta=beta)
 
     def _growth(self, x):
         # Canonical Lenia growth function
+        np = self.xp
         return np.exp(-((x - self.mu)**2) / (2 * self.sigma**2)) * 2 - 1
 
     def update(self):
-        world_fft = np.fft.rfft2(self.world)
-        potential_fft = world_fft * self.kernel_fft
-        potential = np.fft.irfft2(potential_fft, s=self.world.shape)
+        if self.inplace:
+            self._update_inplace()
+            return
+
+        profiler = self.profiler
+        layout = self.layout
+        previous = self.world
+        # Worlds stored in float16 are computed on in float32
+        world = previous.astype(self.compute_dtype, copy=False)
+        with profiler.phase("fft"):
+            world_fft = self.backend.rfft2(layout.pad(world))
+        with profiler.phase("multiply"):
+            potential_fft = world_fft * self.kernel_fft
+        with profiler.phase("ifft"):
+            potential = layout.crop(self.backend.irfft2(potential_fft, s=layout.shape))
+
+        with profiler.phase("growth"):
+            world = world + self.timestep * self._growth(potential)
+        with profiler.phase("clip"):
+            self.world = self.xp.clip(world, 0, 1).astype(self.dtype, copy=False)
+        if self.metrics is not None:
+            with profiler.phase("metrics"):
+                # The spectrum of an unpadded world already holds the harmonics the metrics need
+                harmonics = None
+                if self.metrics.due() and not layout.padded:
+                    harmonics = self.metrics.spectrum_harmonics(world_fft)
+                self.metrics.update(self, self.world, previous, harmonics)
+
+    def _ensure_buffers(self):
+        np = self.xp
+        if self.world.dtype != self.dtype:
+            self.world = self.world.astype(self.dtype)
+        shape = self.world.shape
+        fft_shape = (*shape[:-2], *self.layout.shape)
+        compute, complex_dtype = self.compute_dtype, np.result_type(self.compute_dtype, np.complex64)
+        buffers = self._buffers
+        if buffers is None or buffers["world_back"].shape != shape or buffers["potential"].shape != fft_shape \
+                or buffers["potential"].dtype != compute or buffers["world_back"].dtype != self.dtype:
+            spectrum_shape = (*fft_shape[:-1], fft_shape[-1] // 2 + 1)
+            buffers = self._buffers = {
+                "spectrum": self.backend.empty(spectrum_shape, complex_dtype),
+                "potential": self.backend.empty(fft_shape, compute),
+                "world_back": self.backend.empty(shape, self.dtype),
+                "kernel_source": None,
+            }
+            if self.dtype != compute:
+                buffers["compute"] = self.backend.empty(shape, compute)
+            if self.layout.padded:
+                buffers["rows"] = self.backend.empty((*fft_shape[:-1], shape[-1]), compute)
+                buffers["padded"] = self.backend.empty(fft_shape, compute)
+        if buffers["kernel_source"] is not self.kernel_fft:
+            # Keep a copy in the spectrum dtype so the spectral multiply never promotes
+            buffers["kernel_source"] = self.kernel_fft
+            buffers["kernel_fft"] = self.kernel_fft.astype(complex_dtype)
+        return buffers
 
-        growth_val = self._growth(potential)
-        self.world = np.clip(self.world + self.timestep * growth_val, 0, 1)
+    def _update_inplace(self):
+        buffers = self._ensure_buffers()
+        profiler = self.profiler
+        layout = self.layout
+        world = self.world
+        with profiler.phase("fft"):
+            source = world
+            if "compute" in buffers:
+                source = buffers["compute"]
+                self.xp.copyto(source, world)
+            padded = layout.pad(source, out=buffers.get("padded"), rows=buffers.get("rows"))
+            world_fft = self.backend.rfft2(padded, out=buffers["spectrum"])
+        harmonics = None
+        if self.metrics is not None and self.metrics.due() and not layout.padded:
+            # Read before the multiply overwrites the spectrum
+            harmonics = self.metrics.spectrum_harmonics(world_fft)
+        with profiler.phase("multiply"):
+            self.xp.multiply(world_fft, buffers["kernel_fft"], out=world_fft)
+        with profiler.phase("ifft"):
+            potential = layout.crop(self.backend.irfft2(world_fft, s=layout.shape, out=buffers["potential"]))
+
+        # Write the next state into the back buffer, then swap; growth and clip are one fused phase here
+        with profiler.phase("growth"):
+            world_next = self.backend.growth_update(world, potential, self.mu, self.sigma, self.timestep, out=buffers["world_back"])
+        buffers["world_back"] = world
+        self.world = world_next
+        if self.metrics is not None:
+            with profiler.phase("metrics"):
+                self.metrics.update(self, world_next, world, harmonics)
 
     def get_world(self):
         return self.world
 
     def set_kernel_radius(self, radius):
-        self.kernel_radius = max(1, radius)
+        radius = max(1, radius)
+        self._set_layout(radius)
+        self.kernel_radius = radius
         self.kernel_fft = self._create_kernel_fft(self.kernel_radius, self.kernel_shape)
 
+    def resize(self, grid_shape, resample=True):
+        """Changes the grid to `grid_shape`, interpolating the world (`resample`) or cropping/tiling it."""
+        kernels.validate_radius(self.layout.radius, grid.grid_shape(grid_shape))
+        self.world = grid.resize_world(self.world, grid_shape, self.backend, resample).astype(self.dtype, copy=False)
+        self.grid_shape = grid.grid_shape(grid_shape)
+        self.set_kernel_radius(self.kernel_radius)
+
     def set_timestep(self, timestep):
         self.timestep = max(0.01, timestep)
 
@@ -71,4 +170,12 @@ class Lenia:
         self.sigma = sigma
 
     def randomize_world(self):
-        self.world = np.random.rand(config.GRID_SIZE, config.GRID_SIZE, dtype=np.float32)
\ No newline at end of file
+        self.world = self.backend.random(self.grid_shape).astype(self.dtype, copy=False)
+
+    def save_checkpoint(self, path, metadata=None):
+        """Saves the world, parameters and RNG state; `metadata` is any JSON-serializable dict."""
+        checkpoint.save_engine(self, path, metadata)
+
+    def load_checkpoint(self, path):
+        """Restores a checkpoint written by save_checkpoint and returns its metadata."""
+        return checkpoint.load_engine(self, path)
@@ -0,0 +1,99 @@
+import checkpoint
+import config
+import grid
+import kernels
+import profiling
+from backend import get_backend
+from convolution import STRATEGIES, make_convolution
+
+class LeniaAuto:
+    """Lenia engine that picks its convolution (FFT, direct, separable or box filter) per configuration.
+
+    With strategy="auto" the fastest strategy for the current grid, radius, shape and backend is
+    looked up in the autotuning table (see convolution.py) whenever the kernel changes.
+    """
+
+    def __init__(self, backend=None, strategy="auto", grid_shape=None, kernel_radius=None):
+        self.backend = get_backend(backend)
+        self.xp = self.backend.xp
+        # Per-phase timings; replace with a profiling.Profiler to record them
+        self.profiler = profiling.DISABLED
+        # Dynamics metrics (see metrics.py); None skips them entirely
+        self.metrics = None
+        self.strategy = strategy
+        self.kernel_radius = config.KERNEL_RADIUS if kernel_radius is None else max(1, int(kernel_radius))
+        self.timestep = config.TIMESTEP
+        self.mu = 0.15
+        self.sigma = 0.015
+        self.kernel_shape = "gaussian" # Default to a better kernel
+        self.kernel_shapes = list(kernels.KERNEL_SHAPES)
+        self.grid_shape = grid.grid_shape(grid_shape)
+        self.world = self.backend.random(self.grid_shape)
+        self.convolution = self._create_convolution(self.kernel_radius, self.kernel_shape)
+
+    def _create_convolution(self, radius, shape):
+        strategy = self.strategy
+        if strategy != "auto" and shape not in STRATEGIES[strategy].shapes:
+            # A fixed strategy that cannot handle this shape falls back to the automatic choice
+            strategy = "auto"
+        return make_convolution(radius, shape, self.grid_shape, self.backend, strategy)
+
+    def _growth(self, x):
+        # Canonical Lenia growth function
+        np = self.xp
+        return np.exp(-((x - self.mu)**2) / (2 * self.sigma**2)) * 2 - 1
+
+    def update(self):
+        profiler = self.profiler
+        previous = self.world
+        with profiler.phase("convolve"):
+            potential = self.convolution.potential(previous)
+
+        with profiler.phase("growth"):
+            world = previous + self.timestep * self._growth(potential)
+        with profiler.phase("clip"):
+            self.world = self.xp.clip(world, 0, 1)
+        if self.metrics is not None:
+            with profiler.phase("metrics"):
+                self.metrics.update(self, self.world, previous)
+
+    def get_world(self):
+        return self.world
+
+    def set_kernel_radius(self, radius):
+        kernels.validate_radius(max(1, radius), self.grid_shape)
+        self.kernel_radius = max(1, radius)
+        self.convolution = self._create_convolution(self.kernel_radius, self.kernel_shape)
+
+    def resize(self, grid_shape, resample=True):
+        """Changes the grid to `grid_shape`, interpolating the world (`resample`) or cropping/tiling it."""
+        kernels.validate_radius(self.kernel_radius, grid.grid_shape(grid_shape))
+        self.world = grid.resize_world(self.world, grid_shape, self.backend, resample)
+        self.grid_shape = grid.grid_shape(grid_shape)
+        # The fastest strategy depends on the grid size
+        self.convolution = self._create_convolution(self.kernel_radius, self.kernel_shape)
+
+    def set_timestep(self, timestep):
+        self.timestep = max(0.01, timestep)
+
+    def set_kernel_shape(self, shape):
+        if shape in self.kernel_shapes:
+            self.kernel_shape = shape
+            self.convolution = self._create_convolution(self.kernel_radius, self.kernel_shape)
+
+    def set_mu(self, mu):
+        self.mu = mu
+
+    def set_sigma(self, sigma):
+        self.sigma = sigma
+
+    def randomize_world(self):
+        self.world = self.backend.random(self.grid_shape)
+
+    def save_checkpoint(self, path, metadata=None):
+        """Saves the world, parameters and RNG state; `metadata` is any JSON-serializable dict."""
+        checkpoint.save_engine(self, path, metadata)
+
+    def load_checkpoint(self, path):
+        """Restores a checkpoint written by save_checkpoint and returns its metadata."""
+        return checkpoint.load_engine(self, path)
@@ -0,0 +1,124 @@
+import grid
+import kernels as kernel_factory
+from lenia_core import Lenia
+
+class BatchedLenia(Lenia):
+    """Steps a (B, H, W) stack of independent worlds with one batched FFT per update.
+
+    Every world has its own mu, sigma, timestep and kernel. Kernels are listed once in
+    `kernels` as (radius, shape) pairs and each world picks one through `kernel_index`.
+    """
+
+    def __init__(self, batch_size, mu=0.15, sigma=0.015, timestep=None, kernels=None, kernel_index=0, backend=None, grid_shape=None, kernel_radius=None):
+        super().__init__(backend=backend, grid_shape=grid_shape, kernel_radius=kernel_radius)
+        self.batch_size = int(batch_size)
+        self.world = self.backend.random((self.batch_size, *self.grid_shape))
+        self.set_mu(mu)
+        self.set_sigma(sigma)
+        self.set_timestep(self.timestep if timestep is None else timestep)
+        if kernels is None:
+            kernels = [(self.kernel_radius, self.kernel_shape)]
+        self.set_kernels(kernels, kernel_index)
+
+    def _per_world(self, value, dtype=None):
+        # Broadcasts a scalar or a length-B sequence to a (B,) device array
+        xp = self.xp
+        dtype = xp.float32 if dtype is None else dtype
+        values = xp.asarray(value, dtype=dtype)
+        if values.ndim == 0:
+            values = xp.full(self.batch_size, values, dtype=dtype)
+        if values.shape != (self.batch_size,):
+            raise ValueError(f"Expected a scalar or {self.batch_size} values, got shape {values.shape}")
+        return values
+
+    def _growth(self, x):
+        # Canonical Lenia growth function, with per-world mu/sigma broadcast over (H, W)
+        np = self.xp
+        mu = self.mu[:, None, None]
+        sigma = self.sigma[:, None, None]
+        return np.exp(-((x - mu)**2) / (2 * sigma**2)) * 2 - 1
+
+    def update(self):
+        profiler = self.profiler
+        layout = self.layout
+        with profiler.phase("fft"):
+            world_fft = self.backend.rfft2(layout.pad(self.world))
+        with profiler.phase("multiply"):
+            world_fft *= self.world_kernel_fft
+        with profiler.phase("ifft"):
+            potential = layout.crop(self.backend.irfft2(world_fft, s=layout.shape))
+
+        with profiler.phase("growth"):
+            world = self.world + self.timestep[:, None, None] * self._growth(potential)
+        with profiler.phase("clip"):
+            self.world = self.xp.clip(world, 0, 1)
+
+    def get_world(self, index=None):
+        if index is None:
+            return self.world
+        return self.world[index]
+
+    def set_world(self, index, world):
+        self.world[index] = self.xp.asarray(world, dtype=self.xp.float32)
+
+    def set_kernels(self, kernels, kernel_index=None):
+        """Replaces the kernel table; `kernels` is a list of (radius, shape) pairs."""
+        self.kernels = [(max(1, int(radius)), shape) for radius, shape in kernels]
+        for _, shape in self.kernels:
+            if shape not in self.kernel_shapes:
+                raise ValueError(f"Unknown kernel shape '{shape}', expected one of {self.kernel_shapes}")
+        # The padding of slow FFT lengths must cover the largest kernel
+        self._set_layout(max(radius for radius, _ in self.kernels))
+        # Spectra missing from the cache are built together with one batched FFT
+        self.kernel_ffts = kernel_factory.get_kernel_ffts(self.kernels, self.layout.shape, self.backend, dtype=self.compute_dtype)
+        self.set_kernel_index(self.kernel_index if kernel_index is None else kernel_index)
+
+    def set_kernel_index(self, kernel_index):
+        kernel_index = self._per_world(kernel_index, dtype=self.xp.int64)
+        if int(kernel_index.min()) < 0 or int(kernel_index.max()) >= len(self.kernels):
+            raise ValueError(f"Kernel indices must be in [0, {len(self.kernels)})")
+        self.kernel_index = kernel_index
+        if len(self.kernels) == 1:
+            # A single shared spectrum broadcasts over the batch instead of being copied B times
+            self.world_kernel_fft = self.kernel_ffts[0]
+        else:
+            self.world_kernel_fft = self.kernel_ffts[kernel_index]
+
+    def keep(self, indices):
+        """Keeps only the worlds at `indices`, in that order, with their parameters and kernels."""
+        indices = self.xp.asarray(indices, dtype=self.xp.int64)
+        self.world = self.world[indices]
+        self.mu = self.mu[indices]
+        self.sigma = self.sigma[indices]
+        self.timestep = self.timestep[indices]
+        self.batch_size = int(indices.size)
+        self.set_kernel_index(self.kernel_index[indices])
+
+    def set_kernel_radius(self, radius):
+        # Applies one kernel to every world, like the single-world engine
+        self.kernel_radius = max(1, radius)
+        self.set_kernels([(self.kernel_radius, self.kernel_shape)], 0)
+
+    def resize(self, grid_shape, resample=True):
+        """Changes the grid of every world to `grid_shape`, keeping the kernel table."""
+        kernel_factory.validate_radius(self.layout.radius, grid.grid_shape(grid_shape))
+        self.world = grid.resize_world(self.world, grid_shape, self.backend, resample)
+        self.grid_shape = grid.grid_shape(grid_shape)
+        self.set_kernels(self.kernels)
+
+    def set_kernel_shape(self, shape):
+        if shape in self.kernel_shapes:
+            self.kernel_shape = shape
+            self.set_kernels([(self.kernel_radius, self.kernel_shape)], 0)
+
+    def set_timestep(self, timestep):
+        self.timestep = self.xp.maximum(self._per_world(timestep), 0.01)
+
+    def set_mu(self, mu):
+        self.mu = self._per_world(mu)
+
+    def set_sigma(self, sigma):
+        self.sigma = self._per_world(sigma)
+
+    def randomize_world(self):
+        self.world = self.backend.random((self.batch_size, *self.grid_shape))
@@ -0,0 +1,310 @@
+"""Domain-decomposed Lenia: the world is split into horizontal strips, one per worker process.
+
+Each worker keeps its strip in private memory and, every step, swaps kernel-radius-wide halos
+with the workers above and below (the strips form a ring, so the torus wraps vertically; every
+strip spans the full width, so it wraps horizontally on its own). It then convolves its strip
+plus halos locally, either with an FFT or directly, and updates its own rows. The result
+matches the single-process engines at the same toroidal boundary.
+
+Workers only talk to each other through a `Transport`. `SharedMemoryTransport` runs on one
+machine with multiprocessing shared memory; an MPI transport only needs the same three methods
+(exchange as two Sendrecv calls, publish/fetch as Gatherv/Scatterv of the strips).
+"""
+import abc
+import multiprocessing
+import traceback
+import weakref
+from multiprocessing import shared_memory
+import numpy
+import checkpoint
+import config
+import grid
+import kernels
+import profiling
+
+
+class Transport(abc.ABC):
+    """Moves halos and strips between the worker of rank `rank` and the rest of the ring."""
+
+    @abc.abstractmethod
+    def exchange(self, top, bottom):
+        """Sends this strip's first and last rows to the ranks above and below.
+
+        Returns (above, below): the last rows of the strip above and the first rows of the
+        strip below, as many rows as were sent.
+        """
+
+    @abc.abstractmethod
+    def publish(self, rows):
+        """Writes this worker's rows into the gathered world."""
+
+    @abc.abstractmethod
+    def fetch(self):
+        """Returns a copy of this worker's rows of the gathered world."""
+
+
+class SharedMemoryTransport(Transport):
+    """Transport between processes on one machine.
+
+    The world and two halo slots per rank live in shared memory; a barrier orders the writes
+    and reads of every exchange.
+    """
+
+    def __init__(self, rank, size, rows, world_name, halo_name, grid_shape, max_radius, barrier):
+        self.rank = rank
+        self.size = size
+        self.rows = rows
+        self.barrier = barrier
+        self._world_memory = shared_memory.SharedMemory(name=world_name)
+        self._halo_memory = shared_memory.SharedMemory(name=halo_name)
+        self.world = numpy.ndarray(grid_shape, dtype=numpy.float32, buffer=self._world_memory.buf)
+        # [0] holds the first rows of every strip, [1] the last rows
+        self.halos = numpy.ndarray((2, size, max_radius, grid_shape[1]), dtype=numpy.float32, buffer=self._halo_memory.buf)
+
+    def exchange(self, top, bottom):
+        radius = top.shape[0]
+        self.halos[0, self.rank, :radius] = top
+        self.halos[1, self.rank, :radius] = bottom
+        self.barrier.wait()
+        above = self.halos[1, (self.rank - 1) % self.size, :radius].copy()
+        below = self.halos[0, (self.rank + 1) % self.size, :radius].copy()
+        # Nobody may overwrite a slot before its neighbours have read it
+        self.barrier.wait()
+        return above, below
+
+    def publish(self, rows):
+        self.world[slice(*self.rows)] = rows
+
+    def fetch(self):
+        return self.world[slice(*self.rows)].copy()
+
+    def close(self):
+        del self.world, self.halos
+        self._world_memory.close()
+        self._halo_memory.close()
+
+
+class StripWorker:
+    """Steps one strip of the world; runs inside a worker process."""
+
+    def __init__(self, transport, grid_shape, method):
+        from backend import NumpyBackend
+        self.transport = transport
+        self.grid_shape = grid_shape
+        self.method = method
+        # One FFT thread per worker: the workers already occupy the cores
+        self.backend = NumpyBackend(workers=1)
+        self.world = transport.fetch()
+
+    def configure(self, params):
+        self.radius = params["kernel_radius"]
+        self.mu = params["mu"]
+        self.sigma = params["sigma"]
+        self.timestep = params["timestep"]
+        strip_shape = (self.world.shape[0] + 2 * self.radius, self.grid_shape[1])
+        if self.method == "fft":
+            self.layout = grid.FFTLayout(strip_shape, self.radius)
+            self.kernel = kernels.get_kernel_fft(self.radius, params["kernel_shape"], self.layout.shape, self.backend)
+        else:
+            self.kernel = kernels.get_kernel(self.radius, params["kernel_shape"], self.backend)
+
+    def _growth(self, x):
+        # Canonical Lenia growth function
+        return numpy.exp(-((x - self.mu)**2) / (2 * self.sigma**2)) * 2 - 1
+
+    def step(self):
+        radius = self.radius
+        above, below = self.transport.exchange(self.world[:radius], self.world[-radius:])
+        strip = numpy.concatenate([above, self.world, below])
+        if self.method == "fft":
+            layout = self.layout
+            potential = layout.crop(self.backend.irfft2(self.backend.rfft2(layout.pad(strip)) * self.kernel, s=layout.shape))
+        else:
+            potential = self.backend.convolve2d(strip, self.kernel)
+        # Rows within the radius of the strip's ends saw the wrong wrap; only the owned rows are kept
+        potential = potential[radius:radius + self.world.shape[0]]
+        self.world = numpy.clip(self.world + self.timestep * self._growth(potential), 0, 1)
+
+
+def _worker_main(connection, transport_args, grid_shape, method):
+    transport = SharedMemoryTransport(*transport_args)
+    worker = StripWorker(transport, grid_shape, method)
+    while True:
+        command, argument = connection.recv()
+        try:
+            if command == "stop":
+                break
+            if command == "configure":
+                worker.configure(argument)
+            elif command == "step":
+                for _ in range(argument):
+                    worker.step()
+            elif command == "publish":
+                transport.publish(worker.world)
+            elif command == "fetch":
+                worker.world = transport.fetch()
+            connection.send(("ok", None))
+        except Exception:
+            # Release the other workers if they are waiting for this one at the barrier
+            transport.barrier.abort()
+            connection.send(("error", traceback.format_exc()))
+    transport.close()
+    connection.close()
+
+
+def _release(processes, connections, memories):
+    for connection in connections:
+        try:
+            connection.send(("stop", None))
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for memory in memories:
+        memory.close()
+        memory.unlink()
+
+
+class LeniaDistributed:
+    """Lenia engine that steps horizontal strips of the world in `workers` processes.
+
+    `method` is "fft" (local FFT of each strip with its halos) or "direct" (spatial convolution).
+    Every strip must be at least `max_radius` rows high. Call close() (or use a `with` block)
+    to stop the workers and free the shared memory.
+    """
+
+    def __init__(self, workers=None, grid_shape=None, method="fft", max_radius=None, start_method="spawn", kernel_radius=None):
+        from backend import get_backend
+        if method not in ("fft", "direct"):
+            raise ValueError(f"Unknown method '{method}', expected 'fft' or 'direct'")
+        self.backend = get_backend("numpy")
+        self.xp = numpy
+        self.method = method
+        # Per-phase timings are not collected inside the workers; update() counts as one phase
+        self.profiler = profiling.DISABLED
+        self.kernel_radius = config.KERNEL_RADIUS if kernel_radius is None else max(1, int(kernel_radius))
+        self.timestep = config.TIMESTEP
+        self.mu = 0.15
+        self.sigma = 0.015
+        self.kernel_shape = "gaussian" # Default to a better kernel
+        self.kernel_shapes = list(kernels.KERNEL_SHAPES)
+        self.grid_shape = grid.grid_shape(grid_shape)
+        self.max_radius = max(config.RADIUS_MAX, self.kernel_radius) if max_radius is None else max_radius
+        self.workers = multiprocessing.cpu_count() if workers is None else int(workers)
+
+        height, width = self.grid_shape
+        bounds = numpy.linspace(0, height, self.workers + 1).astype(int)
+        self.strips = [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+        self._validate_radius(self.kernel_radius)
+        if min(stop - start for start, stop in self.strips) < self.max_radius:
+            raise ValueError(f"{self.workers} strips of a {height}-row grid are thinner than the maximum kernel radius {self.max_radius}")
+
+        world_bytes = height * width * 4
+        self._world_memory = shared_memory.SharedMemory(create=True, size=world_bytes)
+        self._halo_memory = shared_memory.SharedMemory(create=True, size=2 * self.workers * self.max_radius * width * 4)
+        self._world = numpy.ndarray(self.grid_shape, dtype=numpy.float32, buffer=self._world_memory.buf)
+        self._world[...] = self.backend.random(self.grid_shape)
+        self._published = True
+
+        context = multiprocessing.get_context(start_method)
+        barrier = context.Barrier(self.workers)
+        self._connections = []
+        self._processes = []
+        for rank, rows in enumerate(self.strips):
+            parent, child = context.Pipe()
+            transport_args = (rank, self.workers, rows, self._world_memory.name, self._halo_memory.name,
+                              self.grid_shape, self.max_radius, barrier)
+            process = context.Process(target=_worker_main, args=(child, transport_args, self.grid_shape, method),
+                                      name=f"lenia-strip-{rank}", daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._finalizer = weakref.finalize(self, _release, self._processes, self._connections,
+                                           [self._world_memory, self._halo_memory])
+        self._configure()
+
+    def _command(self, command, argument=None):
+        for connection in self._connections:
+            connection.send((command, argument))
+        errors = [message for status, message in (connection.recv() for connection in self._connections) if status == "error"]
+        if errors:
+            raise RuntimeError(f"Strip worker failed:\n{errors[0]}")
+
+    def _validate_radius(self, radius):
+        if radius > self.max_radius:
+            raise ValueError(f"Kernel radius {radius} exceeds max_radius {self.max_radius}")
+        kernels.validate_radius(radius, self.grid_shape)
+
+    def _configure(self):
+        self._command("configure", {name: getattr(self, name) for name in ("kernel_radius", "kernel_shape", "mu", "sigma", "timestep")})
+
+    def update(self, steps=1):
+        """Advances `steps` steps; the workers exchange halos among themselves in between."""
+        with self.profiler.phase("step"):
+            self._command("step", int(steps))
+        self._published = False
+
+    @property
+    def world(self):
+        return self.get_world()
+
+    @world.setter
+    def world(self, world):
+        self._world[...] = numpy.asarray(world, dtype=numpy.float32)
+        self._command("fetch")
+        self._published = True
+
+    def get_world(self):
+        """Returns a copy of the gathered world."""
+        if not self._published:
+            self._command("publish")
+            self._published = True
+        return self._world.copy()
+
+    def set_kernel_radius(self, radius):
+        # Checked before it is stored, so a rejected radius leaves the engine as it was
+        radius = max(1, radius)
+        self._validate_radius(radius)
+        self.kernel_radius = radius
+        self._configure()
+
+    def set_timestep(self, timestep):
+        self.timestep = max(0.01, timestep)
+        self._configure()
+
+    def set_kernel_shape(self, shape):
+        if shape in self.kernel_shapes:
+            self.kernel_shape = shape
+            self._configure()
+
+    def set_mu(self, mu):
+        self.mu = mu
+        self._configure()
+
+    def set_sigma(self, sigma):
+        self.sigma = sigma
+        self._configure()
+
+    def randomize_world(self):
+        self.world = self.backend.random(self.grid_shape)
+
+    def save_checkpoint(self, path, metadata=None):
+        """Saves the world, parameters and RNG state; `metadata` is any JSON-serializable dict."""
+        checkpoint.save_engine(self, path, metadata)
+
+    def load_checkpoint(self, path):
+        """Restores a checkpoint written by save_checkpoint and returns its metadata."""
+        return checkpoint.load_engine(self, path)
+
+    def close(self):
+        """Stops the workers and frees the shared memory."""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,146 @@
+import kernels as kernel_factory
+from lenia_core import Lenia
+
+# Fields of a kernel entry and their defaults. `r` is the kernel radius relative to
+# kernel_radius, `beta` the ring heights of the "shell" shape, `weight` scales the kernel's
+# growth before it is added to its `target` channel, and `source` is the channel it reads.
+KERNEL_DEFAULTS = {
+    "r": 1.0,
+    "shape": "shell",
+    "beta": [1.0],
+    "mu": 0.15,
+    "sigma": 0.015,
+    "weight": 1.0,
+    "source": 0,
+    "target": 0,
+}
+
+
+class MultiChannelLenia(Lenia):
+    """Steps a (C, H, W) world with K kernels, each with its own growth parameters and channels.
+
+    Every step transforms the C channels once, multiplies the spectra of the kernels' source
+    channels by the stacked (K, H, W//2+1) kernel spectra in one batched multiply and inverse
+    FFT, and adds each kernel's weighted growth to its target channel:
+
+        world[c] += timestep * sum(weight[k] * growth_k(potential[k]) for k with target[k] == c)
+    """
+
+    def __init__(self, channels, kernels=None, kernel_radius=None, timestep=None, backend=None, grid_shape=None):
+        super().__init__(backend=backend, grid_shape=grid_shape, kernel_radius=kernel_radius)
+        self.channels = int(channels)
+        self.kernel_shapes = list(kernel_factory.KERNEL_SHAPES) + list(kernel_factory.SHELL_SHAPES)
+        self.kernel_shape = KERNEL_DEFAULTS["shape"]
+        if timestep is not None:
+            self.set_timestep(timestep)
+        self.world = self.backend.random((self.channels, *self.grid_shape))
+        self.set_kernels([{}] if kernels is None else kernels)
+
+    def _per_kernel(self, value, dtype=None):
+        # Broadcasts a scalar or a length-K sequence to a (K,) device array
+        xp = self.xp
+        dtype = xp.float32 if dtype is None else dtype
+        values = xp.asarray(value, dtype=dtype).reshape(-1)
+        if values.size == 1:
+            values = xp.full(len(self._kernels), values[0], dtype=dtype)
+        if values.shape != (len(self._kernels),):
+            raise ValueError(f"Expected a scalar or {len(self._kernels)} values, got shape {values.shape}")
+        return values
+
+    def _growth(self, x):
+        # Canonical Lenia growth function, with per-kernel mu/sigma broadcast over (H, W)
+        np = self.xp
+        mu = self.mu[:, None, None]
+        sigma = self.sigma[:, None, None]
+        return np.exp(-((x - mu)**2) / (2 * sigma**2)) * 2 - 1
+
+    def _radius(self, kernel):
+        return max(1, int(round(kernel["r"] * self.kernel_radius)))
+
+    @property
+    def kernels(self):
+        """The kernel table as a list of dicts, including the current growth parameters and weights."""
+        mu, sigma, weight = (self.backend.asnumpy(values).tolist() for values in (self.mu, self.sigma, self.weight))
+        return [dict(kernel, mu=mu[k], sigma=sigma[k], weight=weight[k]) for k, kernel in enumerate(self._kernels)]
+
+    def set_kernels(self, kernels):
+        """Replaces the kernel table; each entry is a dict with any of the KERNEL_DEFAULTS fields."""
+        table = []
+        for kernel in kernels:
+            unknown = set(kernel) - set(KERNEL_DEFAULTS)
+            if unknown:
+                raise ValueError(f"Unknown kernel fields {sorted(unknown)}, expected some of {list(KERNEL_DEFAULTS)}")
+            kernel = dict(KERNEL_DEFAULTS, **kernel)
+            if kernel["shape"] not in self.kernel_shapes:
+                raise ValueError(f"Unknown kernel shape '{kernel['shape']}', expected one of {self.kernel_shapes}")
+            for field in ("source", "target"):
+                if not 0 <= kernel[field] < self.channels:
+                    raise ValueError(f"Kernel {field} channel {kernel[field]} out of range for {self.channels} channels")
+            kernel["beta"] = [float(b) for b in kernel["beta"]]
+            table.append(kernel)
+        if not table:
+            raise ValueError("At least one kernel is required")
+        self._kernels = table
+        self.set_mu([kernel["mu"] for kernel in table])
+        self.set_sigma([kernel["sigma"] for kernel in table])
+        self.set_weights([kernel["weight"] for kernel in table])
+        self.sources = self.xp.asarray([kernel["source"] for kernel in table])
+        self._build_kernel_ffts()
+
+    def _build_kernel_ffts(self):
+        # The padding of slow FFT lengths must cover the largest kernel
+        self._set_layout(max(self._radius(kernel) for kernel in self._kernels))
+        # Spectra missing from the cache are built together with one batched FFT
+        self.kernel_ffts = kernel_factory.get_kernel_ffts(
+            [(self._radius(kernel), kernel["shape"], kernel["beta"] if kernel["shape"] == "shell" else None) for kernel in self._kernels],
+            self.layout.shape, self.backend, dtype=self.compute_dtype)
+
+    def set_weights(self, weight):
+        self.weight = self._per_kernel(weight)
+        # (C, K) matrix that sums the weighted growth of every kernel into its target channel
+        targets = self.xp.asarray([kernel["target"] for kernel in self._kernels])
+        self.target_weights = (self.xp.arange(self.channels)[:, None] == targets[None, :]) * self.weight[None, :]
+
+    def update(self):
+        profiler = self.profiler
+        layout = self.layout
+        with profiler.phase("fft"):
+            world_fft = self.backend.rfft2(layout.pad(self.world))
+        with profiler.phase("multiply"):
+            # One spectrum per kernel, gathered from its source channel
+            potential_fft = world_fft[self.sources] * self.kernel_ffts
+        with profiler.phase("ifft"):
+            potential = layout.crop(self.backend.irfft2(potential_fft, s=layout.shape))
+
+        with profiler.phase("growth"):
+            growth = self.xp.tensordot(self.target_weights, self._growth(potential), axes=1)
+            world = self.world + self.timestep * growth
+        with profiler.phase("clip"):
+            self.world = self.xp.clip(world, 0, 1)
+
+    def get_world(self, channel=None):
+        if channel is None:
+            return self.world
+        return self.world[channel]
+
+    def set_kernel_radius(self, radius):
+        # Every kernel keeps its radius relative to kernel_radius
+        self.kernel_radius = max(1, radius)
+        self._build_kernel_ffts()
+
+    def set_kernel_shape(self, shape):
+        # Applies one shape to every kernel, like the single-kernel engine
+        if shape in self.kernel_shapes:
+            self.kernel_shape = shape
+            for kernel in self._kernels:
+                kernel["shape"] = shape
+            self._build_kernel_ffts()
+
+    def set_mu(self, mu):
+        self.mu = self._per_kernel(mu)
+
+    def set_sigma(self, sigma):
+        self.sigma = self._per_kernel(sigma)
+
+    def randomize_world(self):
+        self.world = self.backend.random((self.channels, *self.grid_shape))
@@ -0,0 +1,142 @@
+"""Direct-convolution Lenia on the CPU, compiled with Numba.
+
+Each step wrap-pads the world by the kernel radius, then one parallel pass computes every
+cell's potential straight from the padded world and applies growth and clip before moving
+on, so the potential never goes to memory. Kernels are stored as runs of consecutive non-zero
+weights per kernel row: a ring of radius R only visits its ~0.24 (2R+1)^2 non-zero offsets,
+and every run is a contiguous, vectorizable loop along a row.
+
+Rows are split into bands across the threads, and every band is processed in column blocks
+so the rows of the padded world it reads stay in cache while the kernel sweeps over them.
+The work is O(H W nnz) against O(H W log HW) for the FFT, so this wins for small radii; see
+scripts/benchmark_numba.py for the crossover on a given machine.
+
+Numba is optional: importing this module works without it, and LeniaNumba raises ImportError.
+"""
+import numpy
+import kernels
+from lenia_core_spatial import LeniaSpatial
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Rows per parallel band and columns per cache block
+BAND_ROWS = 8
+BLOCK_COLUMNS = 512
+
+_compiled = None
+
+
+def available():
+    return numba is not None
+
+
+def _compile():
+    # Compiled on first use, so importing the module costs nothing
+    global _compiled
+    if _compiled is not None:
+        return _compiled
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def step(padded, out, run_rows, run_columns, run_starts, weights, radius, mu, sigma, timestep, band_rows, block_columns):
+        height, width = out.shape
+        inverse_variance = numpy.float32(-0.5 / (sigma * sigma))
+        bands = (height + band_rows - 1) // band_rows
+        for band in numba.prange(bands):
+            potential = numpy.empty(block_columns, dtype=numpy.float32)
+            for left in range(0, width, block_columns):
+                columns = min(block_columns, width - left)
+                for y in range(band * band_rows, min((band + 1) * band_rows, height)):
+                    potential[:columns] = 0
+                    for run in range(run_rows.size):
+                        source = padded[y + radius + run_rows[run]]
+                        start = left + radius + run_columns[run]
+                        for k in range(run_starts[run], run_starts[run + 1]):
+                            weight = weights[k]
+                            offset = start + k - run_starts[run]
+                            for x in range(columns):
+                                potential[x] += weight * source[offset + x]
+                    # Growth and clip in the same pass
+                    for x in range(columns):
+                        d = potential[x] - mu
+                        value = padded[y + radius, left + radius + x] + timestep * (numpy.float32(2) * numpy.exp(d * d * inverse_variance) - numpy.float32(1))
+                        out[y, left + x] = min(max(value, numpy.float32(0)), numpy.float32(1))
+
+    _compiled = step
+    return step
+
+
+def kernel_runs(kernel):
+    """Splits a (2R+1, 2R+1) kernel into runs of consecutive non-zero weights along its rows.
+
+    Returns (rows, columns, starts, weights): run i covers weights[starts[i]:starts[i+1]] at
+    row offset rows[i] and column offsets columns[i], columns[i] + 1, ..., relative to the centre.
+    """
+    kernel = numpy.asarray(kernel, dtype=numpy.float32)
+    radius = kernel.shape[0] // 2
+    rows, columns, starts, weights = [], [], [0], []
+    for dy in range(kernel.shape[0]):
+        nonzero = numpy.flatnonzero(kernel[dy])
+        if nonzero.size == 0:
+            continue
+        # Split where the non-zero columns are not consecutive
+        for run in numpy.split(nonzero, numpy.flatnonzero(numpy.diff(nonzero) > 1) + 1):
+            rows.append(dy - radius)
+            columns.append(int(run[0]) - radius)
+            weights.extend(kernel[dy, run])
+            starts.append(len(weights))
+    return (numpy.array(rows, dtype=numpy.int64), numpy.array(columns, dtype=numpy.int64),
+            numpy.array(starts, dtype=numpy.int64), numpy.array(weights, dtype=numpy.float32))
+
+
+class LeniaNumba(LeniaSpatial):
+    """LeniaSpatial with a compiled, multithreaded direct convolution fused with growth and clip.
+
+    Runs on the NumPy backend only. `threads` caps Numba's thread count (default: all cores).
+    get_world() alternates between two buffers, like the in-place FFT update.
+    """
+
+    def __init__(self, backend="numpy", grid_shape=None, threads=None, kernel_radius=None):
+        if numba is None:
+            raise ImportError("LeniaNumba needs Numba (pip install numba)")
+        super().__init__(backend=backend, grid_shape=grid_shape, kernel_radius=kernel_radius)
+        if self.backend.name != "numpy":
+            raise ValueError(f"LeniaNumba runs on the CPU and needs the numpy backend, not '{self.backend.name}'")
+        self.threads = threads
+        self._step = _compile()
+        self._back = None
+
+    def _create_kernel(self, radius, shape):
+        kernel = super()._create_kernel(radius, shape)
+        self._runs = kernel_runs(kernel)
+        return kernel
+
+    @staticmethod
+    def cost(radius, shape, grid_shape):
+        """Multiply-adds per step: one per non-zero kernel weight per cell."""
+        nonzero = numpy.count_nonzero(kernels.get_kernel(radius, shape, "numpy"))
+        return 2 * grid_shape[0] * grid_shape[1] * nonzero
+
+    def update(self):
+        profiler = self.profiler
+        previous = self.world
+        if previous.dtype != numpy.float32 or not previous.flags.c_contiguous:
+            previous = self.world = numpy.ascontiguousarray(previous, dtype=numpy.float32)
+        if self._back is None or self._back.shape != previous.shape or self._back is previous:
+            self._back = numpy.empty_like(previous)
+        if self.threads is not None:
+            numba.set_num_threads(self.threads)
+
+        radius = self.kernel_radius
+        with profiler.phase("pad"):
+            padded = numpy.pad(previous, radius, mode="wrap")
+        # Convolution, growth and clip are one fused phase here
+        with profiler.phase("convolve"):
+            self._step(padded, self._back, *self._runs, radius, numpy.float32(self.mu), numpy.float32(self.sigma),
+                       numpy.float32(self.timestep), BAND_ROWS, BLOCK_COLUMNS)
+        self.world, self._back = self._back, previous
+        if self.metrics is not None:
+            with profiler.phase("metrics"):
+                self.metrics.update(self, self.world, previous)
@@ -0,0 +1,163 @@
+import math
+import scipy.fft
+import kernels
+from lenia_core import Lenia
+
+
+def _tile_starts(n, length):
+    # Tiles of `length` cells from the start of the axis; when they do not divide it, the last
+    # tile ends at the edge and overlaps the one before, so every tile has the same shape
+    starts = list(range(0, n - length + 1, length))
+    if starts[-1] + length < n:
+        starts.append(n - length)
+    return starts
+
+
+def _tile_any(mask, starts, length, axis, xp):
+    # Whether each tile along `axis` holds a True cell
+    mask = xp.moveaxis(mask, axis, 0)
+    count = mask.shape[0] // length
+    tiles = mask[:count * length].reshape(count, length, *mask.shape[1:]).any(axis=1)
+    if len(starts) > count:
+        tiles = xp.concatenate([tiles, mask[starts[-1]:].any(axis=0)[None]])
+    return xp.moveaxis(tiles, 0, axis)
+
+
+class LeniaSparse(Lenia):
+    """Lenia engine that only updates the tiles of the world near live cells.
+
+    The world is split into tiles of `tile_size` cells (the last tile of an axis that is not a
+    multiple of it overlaps the one before). A tile is active when any tile
+    within the kernel radius holds mass; each step gathers the active tiles with a kernel-radius
+    halo into a (n, H', W') stack, convolves them with one batched FFT and writes the centres
+    back. Inactive tiles only see empty cells, and an empty cell stays empty whenever
+    growth(0) <= 0 (true for any mu above ~2.3 sigma), so the result matches the dense update.
+
+    When growth(0) > 0, or more than `dense_fraction` of the tiles are active, the step falls
+    back to the full-grid FFT of Lenia. Sparse steps update the world array in place.
+    """
+
+    def __init__(self, backend=None, grid_shape=None, tile_size=128, dense_fraction=0.5, kernel_radius=None):
+        self.tile_size = int(tile_size)
+        self.dense_fraction = dense_fraction
+        super().__init__(backend=backend, grid_shape=grid_shape, kernel_radius=kernel_radius)
+        self._set_tiles()
+        # Which tiles held mass after the last step, and the world array that map describes
+        self._occupied = None
+        self._tracked_world = None
+        self.active_tiles = 0
+        self.last_mode = None
+
+    def _set_tiles(self):
+        self.tile_shape = tuple(min(self.tile_size, n) for n in self.grid_shape)
+        starts = [_tile_starts(n, length) for n, length in zip(self.grid_shape, self.tile_shape)]
+        self.tile_counts = tuple(len(axis_starts) for axis_starts in starts)
+        self._tile_starts = starts
+        self._tile_origins = [self.xp.asarray(axis_starts) for axis_starts in starts]
+
+    def _create_kernel_fft(self, radius, shape, beta=None):
+        # Spectra are built on first use: the full-grid one only for dense steps (it is as large
+        # as the world), the tile-window one for sparse steps
+        self._window_kernel_fft = None
+        return None
+
+    def _window_shape(self):
+        return tuple(scipy.fft.next_fast_len(n + 2 * self.kernel_radius, real=True) for n in self.tile_shape)
+
+    def _growth_of_empty(self):
+        return 2 * math.exp(-self.mu**2 / (2 * self.sigma**2)) - 1
+
+    def _occupancy(self, world):
+        occupied = world > 0
+        for axis, (starts, length) in enumerate(zip(self._tile_starts, self.tile_shape)):
+            occupied = _tile_any(occupied, starts, length, axis, self.xp)
+        return occupied
+
+    def _dilate(self, occupied):
+        # Toroidal dilation by the number of tiles the kernel radius reaches into
+        xp = self.xp
+        active = occupied
+        for axis, (n, tile) in enumerate(zip(self.grid_shape, self.tile_shape)):
+            # The overlapping last tile is a shorter step between tiles, which a radius can cross too
+            reach = math.ceil(self.kernel_radius / tile) + (1 if n % tile else 0)
+            reach = min(reach, occupied.shape[axis] // 2)
+            grown = active.copy()
+            for shift in range(1, reach + 1):
+                grown |= xp.roll(active, shift, axis=axis) | xp.roll(active, -shift, axis=axis)
+            active = grown
+        return active
+
+    def update(self):
+        xp = self.xp
+        if self.world.dtype != xp.float32:
+            self.world = self.world.astype(xp.float32)
+        if self._growth_of_empty() > 0:
+            self._dense_update()
+            return
+
+        profiler = self.profiler
+        with profiler.phase("tiles"):
+            if self._occupied is None or self._tracked_world is not self.world:
+                self._occupied = self._occupancy(self.world)
+            active = self._dilate(self._occupied)
+            tile_y, tile_x = xp.nonzero(active)
+        self.active_tiles = int(tile_y.size)
+        if self.active_tiles == 0:
+            # Nothing alive and growth(0) <= 0: the world stays empty
+            self.last_mode = "empty"
+            if self.metrics is not None:
+                self.metrics.update(self, self.world, self.world)
+            return
+        if self.active_tiles > self.dense_fraction * active.size:
+            self._dense_update()
+            return
+        self.last_mode = "sparse"
+        # The world is updated in place; the metrics need the previous one on sampled steps
+        previous = self.world.copy() if self.metrics is not None and self.metrics.due() else self.world
+
+        radius = self.kernel_radius
+        (th, tw), (height, width) = self.tile_shape, self.grid_shape
+        window_shape = self._window_shape()
+        if self._window_kernel_fft is None:
+            self._window_kernel_fft = kernels.get_kernel_fft(radius, self.kernel_shape, window_shape, self.backend)
+
+        with profiler.phase("tiles"):
+            # Each window starts R cells before its tile and wraps around the torus
+            row_origins, col_origins = self._tile_origins
+            rows = (row_origins[tile_y][:, None] - radius + xp.arange(window_shape[0])[None, :]) % height
+            cols = (col_origins[tile_x][:, None] - radius + xp.arange(window_shape[1])[None, :]) % width
+            windows = self.world[rows[:, :, None], cols[:, None, :]]
+        with profiler.phase("fft"):
+            windows_fft = self.backend.rfft2(windows)
+        with profiler.phase("multiply"):
+            windows_fft *= self._window_kernel_fft
+        with profiler.phase("ifft"):
+            potential = self.backend.irfft2(windows_fft, s=window_shape)[:, radius:radius + th, radius:radius + tw]
+
+        with profiler.phase("growth"):
+            tiles = windows[:, radius:radius + th, radius:radius + tw] + self.timestep * self._growth(potential)
+        with profiler.phase("clip"):
+            tiles = xp.clip(tiles, 0, 1)
+        with profiler.phase("tiles"):
+            # Overlapping tiles computed the same values for the cells they share
+            self.world[rows[:, radius:radius + th, None], cols[:, None, radius:radius + tw]] = tiles
+            # Only active tiles can have changed
+            self._occupied[tile_y, tile_x] = (tiles > 0).any(axis=(1, 2))
+            self._tracked_world = self.world
+        if self.metrics is not None:
+            with profiler.phase("metrics"):
+                self.metrics.update(self, self.world, previous)
+
+    def _dense_update(self):
+        self.last_mode = "dense"
+        self.active_tiles = self.tile_counts[0] * self.tile_counts[1]
+        if self.kernel_fft is None:
+            self.kernel_fft = super()._create_kernel_fft(self.kernel_radius, self.kernel_shape)
+        super().update()
+        self._occupied = None
+
+    def resize(self, grid_shape, resample=True):
+        """Changes the grid to `grid_shape`, interpolating the world (`resample`) or cropping/tiling it."""
+        super().resize(grid_shape, resample)
+        self._set_tiles()
+        self._occupied = None
@@ -1,54 +1,65 @@
-import cupy as np
-from cupyx.scipy.signal import convolve2d
+import checkpoint
 import config
+import grid
+import kernels
+import profiling
+from backend import get_backend
 
 class LeniaSpatial:
-    def __init__(self):
-        self.kernel_radius = config.KERNEL_RADIUS
+    def __init__(self, backend=None, grid_shape=None, kernel_radius=None):
+        self.backend = get_backend(backend)
+        self.xp = self.backend.xp
+        # Per-phase timings; replace with a profiling.Profiler to record them
+        self.profiler = profiling.DISABLED
+        # Dynamics metrics (see metrics.py); None skips them entirely
+        self.metrics = None
+        self.kernel_radius = config.KERNEL_RADIUS if kernel_radius is None else max(1, int(kernel_radius))
         self.timestep = config.TIMESTEP
         self.mu = 0.15
         self.sigma = 0.015
         self.kernel_shape = "gaussian" # Default to a better kernel
-        self.kernel_shapes = ["ring", "gaussian", "square"]
-        self.world = np.random.rand(config.GRID_SIZE, config.GRID_SIZE, dtype=np.float32)
+        self.kernel_shapes = list(kernels.KERNEL_SHAPES)
+        self.grid_shape = grid.grid_shape(grid_shape)
+        self.world = self.backend.random(self.grid_shape)
         self.kernel = self._create_kernel(self.kernel_radius, self.kernel_shape)
 
     def _create_kernel(self, radius, shape):
-        radius = int(radius)
-        x, y = np.ogrid[-radius:radius+1, -radius:radius+1]
-        distance = np.sqrt(x**2 + y**2)
-        kernel = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=np.float32)
-
-        if shape == "ring":
-            kernel[(distance > radius * 0.38) & (distance < radius * 0.62)] = 1
-        elif shape == "gaussian":
-            # A smoother Gaussian kernel is generally better
-            kernel = np.exp(-(distance**2) / (2 * (radius / 3)**2))
-        elif shape == "square":
-            kernel[(-radius <= x) & (x <= radius) & (-radius <= y) & (y <= radius)] = 1
-
-        if np.sum(kernel) > 0:
-            kernel = kernel / np.sum(kernel)
-        
-        return kernel
+        kernels.validate_radius(radius, self.grid_shape)
+        return kernels.get_kernel(radius, shape, self.backend)
 
     def _growth(self, x):
         # Canonical Lenia growth function
+        np = self.xp
         return np.exp(-((x - self.mu)**2) / (2 * self.sigma**2)) * 2 - 1
 
     def update(self):
-        potential = convolve2d(self.world, self.kernel, mode='same', boundary='wrap')
+        profiler = self.profiler
+        previous = self.world
+        with profiler.phase("convolve"):
+            potential = self.backend.convolve2d(previous, self.kernel)
 
-        growth_val = self._growth(potential)
-        self.world = np.clip(self.world + self.timestep * growth_val, 0, 1)
+        with profiler.phase("growth"):
+            world = previous + self.timestep * self._growth(potential)
+        with profiler.phase("clip"):
+            self.world = self.xp.clip(world, 0, 1)
+        if self.metrics is not None:
+            with profiler.phase("metrics"):
+                self.metrics.update(self, self.world, previous)
 
     def get_world(self):
         return self.world
 
     def set_kernel_radius(self, radius):
+        kernels.validate_radius(max(1, radius), self.grid_shape)
         self.kernel_radius = max(1, radius)
         self.kernel = self._create_kernel(self.kernel_radius, self.kernel_shape)
 
+    def resize(self, grid_shape, resample=True):
+        """Changes the grid to `grid_shape`, interpolating the world (`resample`) or cropping/tiling it."""
+        kernels.validate_radius(self.kernel_radius, grid.grid_shape(grid_shape))
+        self.world = grid.resize_world(self.world, grid_shape, self.backend, resample)
+        self.grid_shape = grid.grid_shape(grid_shape)
+
     def set_timestep(self, timestep):
         self.timestep = max(0.01, timestep)
 
@@ -64,4 +75,12 @@ class LeniaSpatial:
         self.sigma = sigma
 
     def randomize_world(self):
-        self.world = np.random.rand(config.GRID_SIZE, config.GRID_SIZE, dtype=np.float32)
+        self.world = self.backend.random(self.grid_shape)
+
+    def save_checkpoint(self, path, metadata=None):
+        """Saves the world, parameters and RNG state; `metadata` is any JSON-serializable dict."""
+        checkpoint.save_engine(self, path, metadata)
+
+    def load_checkpoint(self, path):
+        """Restores a checkpoint written by save_checkpoint and returns its metadata."""
+        return checkpoint.load_engine(self, path)
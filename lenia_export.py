@@ -0,0 +1,336 @@
+"""Exports a simulation, or a stored snapshot run, as an animated GIF, APNG or MP4.
+
+    python lenia_export.py ring.mp4 --grid-size 1024 --radius 13 --shape ring --frames 600 --every 2
+    python lenia_export.py ring.gif --downscale 4 --colormap magma --fps 20
+    python lenia_export.py run.png --from runs/ring/snapshots          # APNG of a lenia_run store
+
+Frames are streamed: every frame is downscaled by mean pooling and quantized to 256 levels on
+the engine's device, so only a small uint8 image reaches the host. The levels are then colored
+through the colormap's lookup table and encoded while the simulation keeps going.
+- With a local ffmpeg, frames are piped to it as raw RGB, and ffmpeg encodes in its own process.
+- Otherwise Pillow encodes every frame in a pool of worker processes. The frames are joined into
+  one GIF or APNG as they come back. MP4 needs ffmpeg.
+At most a few frames per worker are in flight, so memory use does not grow with the length of
+the animation.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy
+import colormaps
+import config
+
+FORMATS = {".gif": "gif", ".png": "apng", ".apng": "apng", ".mp4": "mp4"}
+# Frames in flight per encoder worker
+QUEUE_DEPTH = 2
+
+
+def render(world, downscale, xp=numpy):
+    """Returns the world mean-pooled by `downscale` and quantized to uint8 levels, on its device."""
+    world = xp.asarray(world)
+    if world.dtype == xp.uint8:
+        # Snapshot stores may already hold levels
+        world = world.astype(xp.float32) / 255
+    if downscale > 1:
+        height, width = (n - n % downscale for n in world.shape)
+        world = world[:height, :width].reshape(height // downscale, downscale, width // downscale, downscale).mean(axis=(1, 3))
+    return xp.rint(xp.clip(world, 0, 1) * 255).astype(xp.uint8)
+
+
+def engine_frames(lenia, frames, every=1, downscale=1):
+    """Steps `lenia` and yields `frames` host uint8 level images, one every `every` steps (the first is the start)."""
+    for index in range(frames):
+        if index:
+            for _ in range(every):
+                lenia.update()
+        yield lenia.backend.asnumpy(render(lenia.get_world(), downscale, lenia.xp))
+
+
+def snapshot_frames(reader, downscale=1, every=1):
+    """Yields level images of every `every`-th frame of a snapshots.SnapshotReader."""
+    for index in range(0, len(reader), every):
+        yield render(reader[index], downscale)
+
+
+def _encode_gif_frame(levels, palette):
+    # A single-frame GIF; Pillow may reorder or trim the palette, so the writer keeps each frame's own table
+    from PIL import Image
+    image = Image.frombytes("P", (levels.shape[1], levels.shape[0]), numpy.ascontiguousarray(levels).tobytes())
+    image.putpalette(palette)
+    buffer = io.BytesIO()
+    image.save(buffer, format="GIF")
+    return buffer.getvalue()
+
+
+def _encode_png_frame(levels, lut):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.fromarray(lut[levels]).save(buffer, format="PNG", compress_level=6)
+    return buffer.getvalue()
+
+
+def _png_chunks(data):
+    # (type, payload) of every chunk after the PNG signature
+    position = 8
+    while position < len(data):
+        length, kind = struct.unpack(">I4s", data[position:position + 8])
+        yield kind, data[position + 8:position + 8 + length]
+        position += 12 + length
+
+
+def _chunk(kind, payload):
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+class _PoolWriter:
+    """Encodes frames in worker processes and writes the results in order as they finish."""
+
+    def __init__(self, path, encode, workers):
+        self.file = open(path, "wb")
+        self.encode = encode
+        self.pool = None
+        self.pending = deque()
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            self.depth = workers * QUEUE_DEPTH
+
+    def write(self, levels):
+        if self.pool is None:
+            self._write_encoded(self.encode(levels))
+            return
+        self.pending.append(self.pool.submit(self.encode, levels))
+        # Wait for the oldest frame once the queue is full: memory stays bounded
+        while len(self.pending) >= self.depth or (self.pending and self.pending[0].done()):
+            self._write_encoded(self.pending.popleft().result())
+
+    def close(self, complete=True):
+        """Writes the remaining frames and the end of the file; with complete=False only releases the pool and file."""
+        try:
+            if complete:
+                while self.pending:
+                    self._write_encoded(self.pending.popleft().result())
+                self._finish()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+            self.file.close()
+
+
+class GifWriter(_PoolWriter):
+    """Streams an animated GIF; frames are LZW-encoded by Pillow in `workers` processes."""
+
+    def __init__(self, path, shape, fps, lut, workers=1, loop=0):
+        from functools import partial
+        super().__init__(path, partial(_encode_gif_frame, palette=lut.tobytes()), workers)
+        self.delay = max(2, round(100 / fps))
+        height, width = shape
+        # Header without a global colour table, then the looping extension
+        self.file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+        self.file.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00")
+
+    def _write_encoded(self, data):
+        packed = data[10]
+        table_size = 3 * 2 ** ((packed & 0x07) + 1) if packed & 0x80 else 0
+        table = data[13:13 + table_size]
+        position = 13 + table_size
+        while data[position] == 0x21:
+            # Skip extensions: label, then data sub-blocks up to an empty one
+            position += 2
+            while data[position]:
+                position += data[position] + 1
+            position += 1
+        descriptor = bytearray(data[position:position + 10])
+        if table:
+            # The frame's global table becomes its local table
+            descriptor[9] = (descriptor[9] & 0x40) | 0x80 | (packed & 0x07)
+        # Graphic control extension: frame delay in centiseconds
+        self.file.write(b"\x21\xf9\x04\x00" + struct.pack("<H", self.delay) + b"\x00\x00")
+        self.file.write(bytes(descriptor) + table + data[position + 10:-1])
+
+    def _finish(self):
+        self.file.write(b"\x3b")
+
+
+class ApngWriter(_PoolWriter):
+    """Streams an animated PNG of `frames` frames; frames are PNG-encoded by Pillow in `workers` processes."""
+
+    def __init__(self, path, shape, fps, lut, frames, workers=1, loop=0):
+        from functools import partial
+        super().__init__(path, partial(_encode_png_frame, lut=lut), workers)
+        self.shape = shape
+        self.frames = frames
+        self.loop = loop
+        self.fps = fps
+        self.written = 0
+        self.sequence = 0
+
+    def _write_encoded(self, data):
+        if self.written == self.frames:
+            raise ValueError(f"The APNG was declared with {self.frames} frames")
+        chunks = list(_png_chunks(data))
+        height, width = self.shape
+        if self.written == 0:
+            self.file.write(data[:8])
+            self.file.write(_chunk(b"IHDR", dict(chunks)[b"IHDR"]))
+            self.file.write(_chunk(b"acTL", struct.pack(">II", self.frames, self.loop)))
+        # Frame control: full-frame region, delay 1/fps, no disposal or blending
+        self.file.write(_chunk(b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, width, height, 0, 0, 1, int(self.fps), 0, 0)))
+        self.sequence += 1
+        for kind, payload in chunks:
+            if kind != b"IDAT":
+                continue
+            if self.written == 0:
+                # The first frame is also the default image
+                self.file.write(_chunk(b"IDAT", payload))
+            else:
+                self.file.write(_chunk(b"fdAT", struct.pack(">I", self.sequence) + payload))
+                self.sequence += 1
+        self.written += 1
+
+    def _finish(self):
+        if self.written != self.frames:
+            raise ValueError(f"The APNG was declared with {self.frames} frames but got {self.written}")
+        self.file.write(_chunk(b"IEND", b""))
+
+
+class FFmpegWriter:
+    """Pipes raw RGB frames to a local ffmpeg, which encodes them in its own process."""
+
+    def __init__(self, path, shape, fps, lut, format, ffmpeg="ffmpeg", loop=0):
+        height, width = shape
+        self.lut = lut
+        self._palette = None
+        command = [ffmpeg, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                   "-s", f"{width}x{height}", "-r", str(fps), "-i", "-"]
+        if format == "gif":
+            # The colormap is the palette, so frames are mapped exactly and nothing is buffered
+            self._palette = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+            from PIL import Image
+            Image.fromarray(lut.reshape(16, 16, 3)).save(self._palette, format="PNG")
+            self._palette.close()
+            command += ["-i", self._palette.name, "-lavfi", "paletteuse=dither=none", "-loop", str(loop)]
+        elif format == "apng":
+            command += ["-f", "apng", "-plays", str(loop)]
+        else:
+            # yuv420p needs even dimensions
+            command += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "18"]
+        self.process = subprocess.Popen(command + [path], stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, levels):
+        self.process.stdin.write(self.lut[levels].tobytes())
+
+    def close(self, complete=True):
+        """Waits for ffmpeg to finish; raises if it failed, unless complete=False."""
+        self.process.stdin.close()
+        error = self.process.stderr.read().decode(errors="replace")
+        self.process.wait()
+        if self._palette is not None:
+            os.unlink(self._palette.name)
+        if complete and self.process.returncode:
+            raise RuntimeError(f"ffmpeg failed: {error.strip()}")
+
+
+def open_writer(path, shape, frames, fps=30, colormap=None, encoder="auto", workers=None, loop=0):
+    """Returns a writer with write(levels) and close() for `path`; the format follows its extension.
+
+    `encoder` is "ffmpeg", "pillow" or "auto" (ffmpeg when it is on the PATH). `frames` is the
+    number of frames that will be written (APNG declares it up front).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown output format '{extension}', expected one of {sorted(FORMATS)}")
+    format = FORMATS[extension]
+    lut = colormaps.get_lut(colormap or config.COLORMAP)
+    ffmpeg = shutil.which("ffmpeg")
+    if encoder == "ffmpeg" or (encoder == "auto" and ffmpeg):
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg was not found on the PATH")
+        return FFmpegWriter(path, shape, fps, lut, format, ffmpeg, loop)
+    if format == "mp4":
+        raise RuntimeError("MP4 export needs ffmpeg on the PATH; use .gif or .png without it")
+    workers = os.cpu_count() if workers is None else workers
+    if format == "gif":
+        return GifWriter(path, shape, fps, lut, workers, loop)
+    return ApngWriter(path, shape, fps, lut, frames, workers, loop)
+
+
+def export(frames, path, shape, count, **options):
+    """Writes `count` level images from the iterable `frames` to `path` (see open_writer for `options`)."""
+    writer = open_writer(path, shape, count, **options)
+    written = 0
+    try:
+        for levels in frames:
+            writer.write(levels)
+            written += 1
+    except BaseException:
+        # Checking the frame count or ffmpeg's status here would hide the original error
+        writer.close(complete=False)
+        raise
+    writer.close()
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Export a Lenia simulation as an animated GIF, APNG or MP4.')
+    parser.add_argument('output', help='Output file: .gif, .png/.apng or .mp4.')
+    parser.add_argument('--from', dest='source', help='Export a snapshot store written by lenia_run.py instead of simulating.')
+    parser.add_argument('--config', help='JSON file with simulation parameters, as for lenia_run.py.')
+    parser.add_argument('--checkpoint', help='Start from a checkpoint written by save_checkpoint.')
+    parser.add_argument('--grid-size', help='Grid size: N or HxW.')
+    parser.add_argument('--radius', type=int)
+    parser.add_argument('--shape', choices=['ring', 'gaussian', 'square'])
+    parser.add_argument('--mu', type=float)
+    parser.add_argument('--sigma', type=float)
+    parser.add_argument('--timestep', type=float)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--backend', choices=['auto', 'cupy', 'numpy'])
+    parser.add_argument('--engine', choices=['fft', 'spatial', 'auto', 'sparse', 'numba'])
+    parser.add_argument('--frames', type=int, default=300, help='Number of frames (default: 300; with --from, all).')
+    parser.add_argument('--every', type=int, default=1, help='Simulation steps (or stored snapshots) per frame.')
+    parser.add_argument('--downscale', type=int, default=1, help='Mean-pool the world by this factor.')
+    parser.add_argument('--colormap', choices=colormaps.COLORMAPS, default=config.COLORMAP)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--encoder', choices=['auto', 'ffmpeg', 'pillow'], default='auto')
+    parser.add_argument('--workers', type=int, help='Pillow encoder processes (default: all cores).')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = dict(fps=args.fps, colormap=args.colormap, encoder=args.encoder, workers=args.workers)
+    if args.source:
+        from snapshots import SnapshotReader
+        reader = SnapshotReader(args.source)
+        count = len(range(0, len(reader), args.every))
+        shape = render(reader[0], args.downscale).shape
+        frames = snapshot_frames(reader, args.downscale, args.every)
+    else:
+        import lenia_run
+        params = dict(lenia_run.DEFAULTS)
+        if args.config:
+            with open(args.config) as f:
+                params.update(json.load(f))
+        for key in ("grid_size", "radius", "shape", "mu", "sigma", "timestep", "seed", "backend", "engine"):
+            if getattr(args, key) is not None:
+                params[key] = getattr(args, key)
+        lenia = lenia_run.build_engine(params)
+        if args.checkpoint:
+            lenia.load_checkpoint(args.checkpoint)
+        count = args.frames
+        shape = render(lenia.get_world(), args.downscale, lenia.xp).shape
+        frames = engine_frames(lenia, count, args.every, args.downscale)
+    written = export(frames, args.output, shape, count, **options)
+    print(f"{written} frames of {shape[1]}x{shape[0]} written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Headless Lenia runner: steps the engine as fast as possible and writes snapshots and metrics.
+
+Only the simulation engine is imported (no pygame/moderngl), so it starts quickly and runs
+on machines without a display:
+
+    python lenia_run.py --grid-size 512 --radius 13 --shape ring --steps 1000 --output runs/ring
+    python lenia_run.py --config sweep.json --seed 7
+    python lenia_run.py --output runs/ring --resume --steps 5000
+"""
+import argparse
+import json
+import os
+import time
+import config
+
+# Run parameters and their defaults; a JSON config file and the command line override them in that order
+DEFAULTS = {
+    "grid_size": config.GRID_SIZE,
+    "radius": config.KERNEL_RADIUS,
+    "shape": "gaussian",
+    "mu": 0.15,
+    "sigma": 0.015,
+    "timestep": config.TIMESTEP,
+    "steps": 100,
+    "seed": None,
+    "backend": config.BACKEND,
+    "engine": "fft",
+    "strategy": "auto",
+    "inplace": False,
+    "precision": "float32",
+    "snapshot_every": 0,
+    "snapshot_format": "chunked",
+    "snapshot_dtype": "float32",
+    "metrics_every": 10,
+    "dynamics": False,
+    "checkpoint_every": 0,
+    "resume": False,
+    "output": "lenia_run_output",
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run a Lenia simulation without the GUI.')
+    parser.add_argument('--config', help='JSON file with run parameters (keys as the options below, with underscores).')
+    parser.add_argument('--grid-size', help='Grid size: N for a square grid or HxW, e.g. 384x640.')
+    parser.add_argument('--radius', type=int)
+    parser.add_argument('--shape', choices=['ring', 'gaussian', 'square'])
+    parser.add_argument('--mu', type=float)
+    parser.add_argument('--sigma', type=float)
+    parser.add_argument('--timestep', type=float)
+    parser.add_argument('--steps', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--backend', choices=['auto', 'cupy', 'numpy'])
+    parser.add_argument('--engine', choices=['fft', 'spatial', 'auto', 'sparse', 'numba'], help='fft: Lenia, spatial: LeniaSpatial, auto: LeniaAuto, sparse: LeniaSparse, numba: LeniaNumba.')
+    parser.add_argument('--strategy', choices=['auto', 'fft', 'direct', 'separable', 'box'], help='Convolution strategy for --engine auto.')
+    parser.add_argument('--inplace', action='store_true', default=None, help='Use the in-place update of the fft engine.')
+    parser.add_argument('--precision', choices=['float32', 'float16', 'float64'], help='World storage/arithmetic precision of the fft engine (see PRECISIONS in lenia_core.py).')
+    parser.add_argument('--snapshot-every', type=int, help='Save the world every N steps (0 saves only the final world).')
+    parser.add_argument('--snapshot-format', choices=['chunked', 'memmap', 'npy'], help='Snapshot store (see snapshots.py); npy writes one file per snapshot.')
+    parser.add_argument('--snapshot-dtype', choices=['float32', 'float16', 'uint8'], help='Storage dtype for chunked/memmap snapshots.')
+    parser.add_argument('--metrics-every', type=int, help='Append a metrics record every N steps.')
+    parser.add_argument('--dynamics', action='store_true', default=None, help='Also write centre of mass, velocity, activity and stability every --metrics-every steps to dynamics.jsonl (see metrics.py).')
+    parser.add_argument('--checkpoint-every', type=int, help='Overwrite <output>/checkpoint.lenia every N steps.')
+    parser.add_argument('--resume', action='store_true', default=None, help='Continue from the checkpoint in the output directory.')
+    parser.add_argument('--output', help='Directory for snapshots and metrics.')
+    return parser.parse_args(argv)
+
+
+def load_params(args):
+    """Merges the defaults, the optional config file and the command line into one dict."""
+    params = dict(DEFAULTS)
+    if args.config:
+        with open(args.config) as f:
+            file_params = json.load(f)
+        unknown = set(file_params) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown parameters in {args.config}: {sorted(unknown)}")
+        params.update(file_params)
+    if args.resume:
+        # A resumed run starts from the parameters it was launched with
+        output = args.output or params["output"]
+        with open(os.path.join(output, "params.json")) as f:
+            params.update(json.load(f))
+    for key in DEFAULTS:
+        value = getattr(args, key)
+        if value is not None:
+            params[key] = value
+    return params
+
+
+def build_engine(params):
+    """Creates the engine described by `params`."""
+    import grid
+    grid_shape = grid.grid_shape(params["grid_size"])
+    radius = params["radius"]
+
+    from backend import get_backend
+    backend = get_backend(params["backend"])
+    if params["seed"] is not None:
+        backend.seed(params["seed"])
+
+    if params["precision"] != "float32" and params["engine"] != "fft":
+        raise ValueError(f"Precision '{params['precision']}' is only supported by the fft engine")
+    if params["engine"] == "spatial":
+        from lenia_core_spatial import LeniaSpatial
+        lenia = LeniaSpatial(backend=backend, grid_shape=grid_shape, kernel_radius=radius)
+    elif params["engine"] == "auto":
+        from lenia_core_auto import LeniaAuto
+        lenia = LeniaAuto(backend=backend, strategy=params["strategy"], grid_shape=grid_shape, kernel_radius=radius)
+    elif params["engine"] == "sparse":
+        from lenia_core_sparse import LeniaSparse
+        lenia = LeniaSparse(backend=backend, grid_shape=grid_shape, kernel_radius=radius)
+    elif params["engine"] == "numba":
+        from lenia_core_numba import LeniaNumba
+        lenia = LeniaNumba(backend=backend, grid_shape=grid_shape, kernel_radius=radius)
+    else:
+        from lenia_core import Lenia
+        lenia = Lenia(backend=backend, inplace=params["inplace"], grid_shape=grid_shape, precision=params["precision"],
+                      kernel_radius=radius)
+
+    lenia.set_kernel_shape(params["shape"])
+    lenia.set_mu(params["mu"])
+    lenia.set_sigma(params["sigma"])
+    lenia.set_timestep(params["timestep"])
+    return lenia
+
+
+def world_metrics(lenia, step, elapsed, steps_run):
+    xp = lenia.xp
+    world = lenia.get_world()
+    return {
+        "step": step,
+        "elapsed": elapsed,
+        "steps_per_sec": steps_run / elapsed if elapsed > 0 else None,
+        "mass": float(xp.sum(world, dtype=xp.float64)),
+        "mean": float(xp.mean(world, dtype=xp.float64)),
+        "max": float(xp.max(world)),
+    }
+
+
+def truncate_records(path, step):
+    """Drops the JSON-lines records of `path` after `step`, so a resumed run does not repeat them."""
+    if not os.path.exists(path):
+        return
+    kept = []
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by the interruption, and nothing after it is trusted
+                break
+            if record["step"] <= step:
+                kept.append(line)
+    with open(path, "w") as f:
+        f.writelines(kept)
+
+
+def run(params):
+    """Runs the simulation described by `params` and returns the final metrics record."""
+    import numpy
+
+    lenia = build_engine(params)
+    output = params["output"]
+    os.makedirs(output, exist_ok=True)
+    checkpoint_path = os.path.join(output, "checkpoint.lenia")
+
+    first_step = 1
+    if params["resume"]:
+        first_step = lenia.load_checkpoint(checkpoint_path)["step"] + 1
+        # Records written after the checkpoint are written again by this run. A dynamics record
+        # is numbered by the world its update starts from, so the checkpointed world's is redone too
+        truncate_records(os.path.join(output, "metrics.jsonl"), first_step - 1)
+        truncate_records(os.path.join(output, "dynamics.jsonl"), first_step - 2)
+    else:
+        with open(os.path.join(output, "params.json"), "w") as f:
+            json.dump(params, f, indent=2)
+
+    snapshot_every = params["snapshot_every"]
+    metrics_every = params["metrics_every"]
+    checkpoint_every = params["checkpoint_every"]
+    writer = None
+    if snapshot_every and params["snapshot_format"] != "npy":
+        from snapshots import SnapshotWriter
+        # A resumed run gets its own store rather than rewriting the frames already saved
+        store = "snapshots" if first_step == 1 else f"snapshots_from_{first_step:08d}"
+        writer = SnapshotWriter(os.path.join(output, store), lenia.get_world().shape,
+                                format=params["snapshot_format"], dtype=params["snapshot_dtype"],
+                                capacity=max(params["steps"] // snapshot_every, 1), asnumpy=lenia.backend.asnumpy)
+
+    dynamics_file = None
+    if params["dynamics"] and metrics_every:
+        from metrics import Metrics
+        dynamics_file = open(os.path.join(output, "dynamics.jsonl"), "w" if first_step == 1 else "a")
+        lenia.metrics = Metrics(metrics_every, callback=lambda record: dynamics_file.write(json.dumps(record) + "\n"),
+                                start=first_step - 1)
+
+    with open(os.path.join(output, "metrics.jsonl"), "w" if first_step == 1 else "a") as metrics_file:
+        start = time.perf_counter()
+        for step in range(first_step, params["steps"] + 1):
+            lenia.update()
+            if snapshot_every and step % snapshot_every == 0:
+                if writer is not None:
+                    writer.append(lenia.get_world())
+                else:
+                    numpy.save(os.path.join(output, f"world_{step:08d}.npy"), lenia.backend.asnumpy(lenia.get_world()))
+            if metrics_every and step % metrics_every == 0:
+                metrics_file.write(json.dumps(world_metrics(lenia, step, time.perf_counter() - start, step - first_step + 1)) + "\n")
+            if checkpoint_every and step % checkpoint_every == 0:
+                metrics_file.flush()
+                if dynamics_file is not None:
+                    dynamics_file.flush()
+                lenia.save_checkpoint(checkpoint_path, {"step": step})
+
+        lenia.backend.synchronize()
+        final = world_metrics(lenia, params["steps"], time.perf_counter() - start, params["steps"] - first_step + 1)
+        if not (metrics_every and params["steps"] % metrics_every == 0):
+            metrics_file.write(json.dumps(final) + "\n")
+
+    if writer is not None:
+        writer.close()
+    if dynamics_file is not None:
+        dynamics_file.close()
+
+    numpy.save(os.path.join(output, "world_final.npy"), lenia.backend.asnumpy(lenia.get_world()))
+    return final
+
+
+def main(argv=None):
+    params = load_params(parse_args(argv))
+    final = run(params)
+    print(f"{final['step']} steps in {final['elapsed']:.2f}s ({final['steps_per_sec'] or 0:.1f} steps/s), "
+          f"results in {params['output']}")
+
+
+if __name__ == "__main__":
+    main()
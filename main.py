@@ -5,20 +5,50 @@ import moderngl
 import argparse
 from lenia_core import Lenia
 from lenia_core_spatial import LeniaSpatial
+from lenia_core_auto import LeniaAuto
+from pipeline import SimulationPipeline
+from profiling import Profiler
+from viewport import POOLS, Viewport
+import colormaps
+import grid
+import kernels
 import config
 
 # --- Argument Parsing ---
 parser = argparse.ArgumentParser(description='Lenia Simulation')
 parser.add_argument('--smoke-test', action='store_true', help='Run in a non-interactive mode for a few frames and exit.')
+parser.add_argument('--grid-size', default=str(config.GRID_SIZE), help='Grid size: N for a square grid or HxW, e.g. 600x1000.')
 parser.add_argument('--spatial', action='store_true', help='Use spatial convolution instead of FFT.')
+parser.add_argument('--backend', choices=['auto', 'cupy', 'numpy'], default=config.BACKEND, help='Array backend used by the simulation.')
+parser.add_argument('--inplace', action='store_true', help='Use the preallocated, fused in-place FFT update.')
+parser.add_argument('--strategy', choices=['auto', 'fft', 'direct', 'separable', 'box'], help='Convolution strategy; "auto" picks the fastest for the current kernel.')
+parser.add_argument('--precompute-kernels', action='store_true', help='Precompute kernel spectra for every slider radius in the background.')
+parser.add_argument('--steps-per-frame', type=int, default=1, help='Simulation steps per displayed frame.')
+parser.add_argument('--colormap', choices=colormaps.COLORMAPS, default=config.COLORMAP, help='Initial colormap (can be changed in the control panel).')
+parser.add_argument('--texture-format', choices=['r8', 'r32f'], default='r8', help='World texture format: r8 quantizes on the compute device before the copy, r32f uploads float32.')
+parser.add_argument('--view-size', help=f'Size of the world view in pixels: N or HxW (default: the grid size, at most {config.VIEW_SIZE_MAX} per side). Drag to pan, scroll to zoom.')
+parser.add_argument('--pool', choices=POOLS, default='mean', help='How zoomed-out views combine cells: mean shows density, max keeps thin structures visible.')
+parser.add_argument('--threaded', action='store_true', help='Free-run the simulation on a worker thread; the display shows the latest finished frame.')
+parser.add_argument('--profile', action='store_true', help='Time every phase of the update and display loop and show the timings in an overlay.')
+parser.add_argument('--profile-dump', metavar='PATH', help='Periodically write the phase timings here (Prometheus text for .prom/.txt, JSON otherwise); implies --profile.')
+parser.add_argument('--profile-interval', type=float, default=5.0, help='Seconds between profile dumps.')
 args = parser.parse_args()
+args.profile = args.profile or args.profile_dump is not None
+GRID_HEIGHT, GRID_WIDTH = grid.grid_shape(args.grid_size)
+# The window shows a view of the world; worlds larger than the view are panned and zoomed
+if args.view_size:
+    VIEW_HEIGHT, VIEW_WIDTH = grid.grid_shape(args.view_size)
+else:
+    VIEW_HEIGHT, VIEW_WIDTH = (min(n, config.VIEW_SIZE_MAX) for n in (GRID_HEIGHT, GRID_WIDTH))
+# Zoom factor per mouse wheel step
+ZOOM_STEP = 1.25
 
 # Initialize Pygame
 pygame.init()
 
 # Screen dimensions
 UI_HEIGHT = 150
-WINDOW_SIZE = (config.GRID_SIZE, config.GRID_SIZE + UI_HEIGHT)
+WINDOW_SIZE = (VIEW_WIDTH, VIEW_HEIGHT + UI_HEIGHT)
 
 # --- Pygame and OpenGL setup ---
 pygame.display.set_mode(WINDOW_SIZE, pygame.OPENGL | pygame.DOUBLEBUF)
@@ -41,8 +71,24 @@ fragment_shader = '''
     void main() { f_color = texture(u_texture, v_uv); }
 '''
 
-lenia_program = ctx.program(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
+# The world is a single-channel texture holding the viewport's frame (see viewport.py); the
+# colormap is applied here through a 256x1 lookup texture
+lenia_fragment_shader = '''
+    #version 330
+    uniform sampler2D u_texture; uniform sampler2D u_lut;
+    uniform vec2 u_origin; uniform vec2 u_extent; uniform vec2 u_frame; uniform vec2 u_texture_size;
+    in vec2 v_uv; out vec4 f_color;
+    void main() {
+        // Frame cell under this pixel; a frame covering the whole world wraps like the world
+        vec2 cell = mod(u_origin + v_uv * u_extent, u_frame);
+        float value = clamp(texture(u_texture, cell / u_texture_size).r, 0.0, 1.0);
+        f_color = vec4(texture(u_lut, vec2(value * (255.0 / 256.0) + 0.5 / 256.0, 0.5)).rgb, 1.0);
+    }
+'''
+
+lenia_program = ctx.program(vertex_shader=vertex_shader, fragment_shader=lenia_fragment_shader)
 lenia_program['u_texture'].value = 0
+lenia_program['u_lut'].value = 2
 
 gui_program = ctx.program(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
 gui_program['u_texture'].value = 1
@@ -75,29 +121,74 @@ vao_lenia = ctx.vertex_array(lenia_program, [(vbo_lenia, '2f 2f', 'in_vert', 'in
 vbo_gui = ctx.buffer(vertices_gui.astype('f4').tobytes())
 vao_gui = ctx.vertex_array(gui_program, [(vbo_gui, '2f 2f', 'in_vert', 'in_uv')], index_buffer=ibo)
 
-# Lenia texture
-lenia_texture = ctx.texture((config.GRID_SIZE, config.GRID_SIZE), 3)
-lenia_texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+# Profiler overlay in the top-left corner of the world view
+OVERLAY_SIZE = (240, 160)
+overlay_right_ndc = 2 * OVERLAY_SIZE[0] / WINDOW_SIZE[0] - 1.0
+overlay_bottom_ndc = 1.0 - 2 * OVERLAY_SIZE[1] / WINDOW_SIZE[1]
+vertices_overlay = np.array([
+    -1.0,              overlay_bottom_ndc, 0.0, 0.0,  # bottom left
+    overlay_right_ndc, overlay_bottom_ndc, 1.0, 0.0,  # bottom right
+    -1.0,              1.0,                0.0, 1.0,  # top left
+    overlay_right_ndc, 1.0,                1.0, 1.0,  # top right
+])
+vbo_overlay = ctx.buffer(vertices_overlay.astype('f4').tobytes())
+vao_overlay = ctx.vertex_array(gui_program, [(vbo_overlay, '2f 2f', 'in_vert', 'in_uv')], index_buffer=ibo)
+
+# Colormap lookup texture
+lut_texture = ctx.texture((256, 1), 3, colormaps.get_lut(args.colormap).tobytes())
+lut_texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
+lut_texture.repeat_x = False
+lut_texture.repeat_y = False
 
 # GUI texture (sized to the UI panel)
-gui_texture = ctx.texture((config.GRID_SIZE, UI_HEIGHT), 4) # RGBA
+gui_texture = ctx.texture((VIEW_WIDTH, UI_HEIGHT), 4) # RGBA
 gui_texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
 
+# Profiler overlay texture and the surface its text is drawn on
+overlay_texture = ctx.texture(OVERLAY_SIZE, 4) # RGBA
+overlay_surface = pygame.Surface(OVERLAY_SIZE, pygame.SRCALPHA)
+overlay_font = pygame.font.SysFont('monospace', 12)
+
 # --- GUI Setup ---
 manager = pygame_gui.UIManager(WINDOW_SIZE, enable_live_theme_updates=False)
 # The offscreen surface for the GUI must be the full window size
 gui_surface = pygame.Surface(WINDOW_SIZE, pygame.SRCALPHA)
-if args.spatial:
-    lenia = LeniaSpatial()
+# Kernels may not be wider than the grid
+MAX_RADIUS = min(config.RADIUS_MAX, kernels.max_radius((GRID_HEIGHT, GRID_WIDTH)))
+config.KERNEL_RADIUS = min(config.KERNEL_RADIUS, MAX_RADIUS)
+if args.strategy:
+    lenia = LeniaAuto(backend=args.backend, strategy=args.strategy, grid_shape=(GRID_HEIGHT, GRID_WIDTH))
+elif args.spatial:
+    lenia = LeniaSpatial(backend=args.backend, grid_shape=(GRID_HEIGHT, GRID_WIDTH))
 else:
-    lenia = Lenia()
+    lenia = Lenia(backend=args.backend, inplace=args.inplace, grid_shape=(GRID_HEIGHT, GRID_WIDTH))
+    if args.precompute_kernels:
+        kernels.precompute_kernels(lenia.grid_shape, backend=lenia.backend)
+
+# The engine and the pipeline record their phases into the same profiler as the display loop
+profiler = Profiler(enabled=args.profile, synchronize=lenia.backend.synchronize)
+lenia.profiler = profiler
+
+# Only the visible part of the world, pooled to the view's resolution on the compute device, is copied
+viewport = Viewport((GRID_HEIGHT, GRID_WIDTH), (VIEW_HEIGHT, VIEW_WIDTH), pool=args.pool, xp=lenia.xp)
+
+# Simulation stepping is decoupled from drawing: the loop below only displays finished frames
+pipeline = SimulationPipeline(lenia, steps_per_frame=args.steps_per_frame, threaded=args.threaded,
+                              quantize=args.texture_format == 'r8', view=viewport.extract)
+
+# Lenia texture: one channel per frame cell, uint8 levels (R8) or float32 (R32F), sized for the largest frame
+texture_dtype = 'f1' if args.texture_format == 'r8' else 'f4'
+frame_rows, frame_columns = viewport.max_frame_shape()
+lenia_texture = ctx.texture((frame_columns, frame_rows), 1, dtype=texture_dtype)
+lenia_texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+lenia_program['u_texture_size'].value = (frame_columns, frame_rows)
 
 # Create GUI elements. The panel is positioned at the bottom of the window.
-ui_panel = pygame_gui.elements.UIPanel(relative_rect=pygame.Rect((0, config.GRID_SIZE, config.GRID_SIZE, UI_HEIGHT)), manager=manager)
+ui_panel = pygame_gui.elements.UIPanel(relative_rect=pygame.Rect((0, VIEW_HEIGHT, VIEW_WIDTH, UI_HEIGHT)), manager=manager)
 
 # First Column
 pygame_gui.elements.UILabel(relative_rect=pygame.Rect((10, 5, 100, 20)), text='Kernel Radius', manager=manager, container=ui_panel)
-radius_slider = pygame_gui.elements.UIHorizontalSlider(relative_rect=pygame.Rect((120, 5, 120, 20)), start_value=lenia.kernel_radius, value_range=(config.RADIUS_MIN, config.RADIUS_MAX), manager=manager, container=ui_panel, click_increment=1)
+radius_slider = pygame_gui.elements.UIHorizontalSlider(relative_rect=pygame.Rect((120, 5, 120, 20)), start_value=lenia.kernel_radius, value_range=(config.RADIUS_MIN, MAX_RADIUS), manager=manager, container=ui_panel, click_increment=1)
 
 pygame_gui.elements.UILabel(relative_rect=pygame.Rect((10, 35, 100, 20)), text='Timestep', manager=manager, container=ui_panel)
 timestep_slider = pygame_gui.elements.UIHorizontalSlider(relative_rect=pygame.Rect((120, 35, 120, 20)), start_value=lenia.timestep, value_range=(config.TIMESTEP_MIN, config.TIMESTEP_MAX), manager=manager, container=ui_panel, click_increment=0.01)
@@ -112,12 +203,23 @@ mu_slider = pygame_gui.elements.UIHorizontalSlider(relative_rect=pygame.Rect((36
 pygame_gui.elements.UILabel(relative_rect=pygame.Rect((250, 35, 100, 20)), text='Growth Sigma', manager=manager, container=ui_panel)
 sigma_slider = pygame_gui.elements.UIHorizontalSlider(relative_rect=pygame.Rect((360, 35, 120, 20)), start_value=lenia.sigma, value_range=(config.SIGMA_MIN, config.SIGMA_MAX), manager=manager, container=ui_panel, click_increment=0.001)
 
+pygame_gui.elements.UILabel(relative_rect=pygame.Rect((490, 5, 140, 20)), text='Colormap', manager=manager, container=ui_panel)
+colormap_dropdown = pygame_gui.elements.UIDropDownMenu(options_list=colormaps.COLORMAPS, starting_option=args.colormap, relative_rect=pygame.Rect((490, 30, 140, 25)), manager=manager, container=ui_panel)
+
+stats_label = pygame_gui.elements.UILabel(relative_rect=pygame.Rect((250, 65, 230, 25)), text='', manager=manager, container=ui_panel)
+
 randomize_button = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((-160, 5, 150, 85)), text='Randomize World', manager=manager, container=ui_panel, anchors={'right': 'right'})
 
 # Main loop
 clock = pygame.time.Clock()
 running = True
 frame_count = 0
+displayed_frame_id = None
+dragging = False
+stats_timer = 0.0
+profile_dump_timer = 0.0
+if args.threaded:
+    pipeline.start()
 while running:
     time_delta = clock.tick(60) / 1000.0
 
@@ -131,46 +233,95 @@ while running:
         # Pass events to the manager. It will handle all GUI events correctly.
         manager.process_events(event)
 
-        if event.type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
-            if event.ui_element == radius_slider: lenia.set_kernel_radius(event.value)
-            elif event.ui_element == timestep_slider: lenia.set_timestep(event.value)
-            elif event.ui_element == mu_slider: lenia.set_mu(event.value)
-            elif event.ui_element == sigma_slider: lenia.set_sigma(event.value)
-        if event.type == pygame_gui.UI_DROP_DOWN_MENU_CHANGED:
-            if event.ui_element == shape_dropdown: lenia.set_kernel_shape(event.text)
-        if event.type == pygame_gui.UI_BUTTON_PRESSED:
-            if event.ui_element == randomize_button: lenia.randomize_world()
+        # The viewport has its own lock, so panning and zooming never wait for a simulation step.
+        # View rows grow upwards, like the texture; the world view is the top of the window
+        if event.type == pygame.MOUSEWHEEL:
+            x, y = pygame.mouse.get_pos()
+            if y < VIEW_HEIGHT: viewport.zoom_at(ZOOM_STEP ** event.y, VIEW_HEIGHT - y, x)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and event.pos[1] < VIEW_HEIGHT: dragging = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1: dragging = False
+        elif event.type == pygame.MOUSEMOTION and dragging: viewport.pan(-event.rel[1], event.rel[0])
+
+        # The simulation may be stepping on the worker thread, so change it under the pipeline lock
+        # (taken only for control panel events, so other events never wait for a step)
+        if event.type not in (pygame_gui.UI_HORIZONTAL_SLIDER_MOVED, pygame_gui.UI_DROP_DOWN_MENU_CHANGED, pygame_gui.UI_BUTTON_PRESSED):
+            continue
+        with pipeline.lock:
+            if event.type == pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
+                if event.ui_element == radius_slider: lenia.set_kernel_radius(event.value)
+                elif event.ui_element == timestep_slider: lenia.set_timestep(event.value)
+                elif event.ui_element == mu_slider: lenia.set_mu(event.value)
+                elif event.ui_element == sigma_slider: lenia.set_sigma(event.value)
+            if event.type == pygame_gui.UI_DROP_DOWN_MENU_CHANGED:
+                if event.ui_element == shape_dropdown: lenia.set_kernel_shape(event.text)
+                elif event.ui_element == colormap_dropdown: lut_texture.write(colormaps.get_lut(event.text).tobytes())
+            if event.type == pygame_gui.UI_BUTTON_PRESSED:
+                if event.ui_element == randomize_button: lenia.randomize_world()
 
     manager.update(time_delta)
-    lenia.update()
+    pipeline.step_frame()
+
+    stats_timer += time_delta
+    if stats_timer >= 0.5:
+        stats_timer = 0.0
+        stats_label.set_text(f"Sim: {pipeline.steps_per_second():.1f} steps/s")
+        if args.profile:
+            overlay_surface.fill((0, 0, 0, 160))
+            for i, line in enumerate(profiler.summary_lines()):
+                overlay_surface.blit(overlay_font.render(line, True, (255, 255, 255)), (6, 4 + 14 * i))
+            overlay_texture.write(pygame.image.tostring(overlay_surface, 'RGBA', True))
+
+    if args.profile_dump:
+        profile_dump_timer += time_delta
+        if profile_dump_timer >= args.profile_interval:
+            profile_dump_timer = 0.0
+            profiler.dump(args.profile_dump)
 
     # --- Drawing ---
     ctx.clear(0.1, 0.1, 0.1)
 
-    # 1. Render Lenia to its texture
-    world_cpu = lenia.get_world().get()
-    texture_data = (np.stack([world_cpu] * 3, axis=-1) * 255).astype(np.uint8)
-    lenia_texture.write(texture_data.tobytes())
+    # 1. Render the latest finished frame to its texture (only when a new one is ready)
+    world_cpu, frame_id = pipeline.latest_frame()
+    placement = pipeline.latest_placement()
+    if frame_id != displayed_frame_id:
+        displayed_frame_id = frame_id
+        with profiler.phase("upload"):
+            if args.texture_format == 'r32f':
+                world_cpu = world_cpu.astype(np.float32, copy=False)
+            lenia_texture.write(world_cpu, viewport=(0, 0, world_cpu.shape[1], world_cpu.shape[0]))
+    # The current view is placed on the latest frame every draw, so panning does not wait for the simulation
+    (origin_row, origin_column), (extent_rows, extent_columns) = viewport.texture_coordinates(placement)
+    lenia_program['u_origin'].value = (origin_column, origin_row)
+    lenia_program['u_extent'].value = (extent_columns, extent_rows)
+    lenia_program['u_frame'].value = (world_cpu.shape[1], world_cpu.shape[0])
 
     # 2. Render GUI to its texture
-    gui_surface.fill((0, 0, 0, 0)) # Clear with transparent color
-    manager.draw_ui(gui_surface)
-    # Extract only the UI part of the surface for the texture
-    gui_data = pygame.image.tostring(gui_surface.subsurface(pygame.Rect(0, config.GRID_SIZE, config.GRID_SIZE, UI_HEIGHT)), 'RGBA', True)
-    gui_texture.write(gui_data)
+    with profiler.phase("gui"):
+        gui_surface.fill((0, 0, 0, 0)) # Clear with transparent color
+        manager.draw_ui(gui_surface)
+        # Extract only the UI part of the surface for the texture
+        gui_data = pygame.image.tostring(gui_surface.subsurface(pygame.Rect(0, VIEW_HEIGHT, VIEW_WIDTH, UI_HEIGHT)), 'RGBA', True)
+        gui_texture.write(gui_data)
 
     # 3. Render Lenia texture to its quad
     lenia_texture.use(location=0)
+    lut_texture.use(location=2)
     vao_lenia.render()
 
     # 4. Blend GUI texture on its quad
     ctx.enable(moderngl.BLEND)
     gui_texture.use(location=1)
     vao_gui.render()
+    if args.profile:
+        overlay_texture.use(location=1)
+        vao_overlay.render()
     ctx.disable(moderngl.BLEND)
 
-    pygame.display.set_caption(f"Lenia - FPS: {clock.get_fps():.2f}")
+    pygame.display.set_caption(f"Lenia - FPS: {clock.get_fps():.2f} - Sim: {pipeline.steps_per_second():.1f} steps/s")
     pygame.display.flip()
 
 # Quit Pygame
+pipeline.stop()
+if args.profile_dump:
+    profiler.dump(args.profile_dump)
 pygame.quit()
@@ -0,0 +1,153 @@
+"""Dynamics metrics computed inside the update step.
+
+Attach a `Metrics` to an engine to get a record of the world's dynamics every `every` steps:
+
+    lenia.metrics = Metrics(every=10, callback=print)
+
+    for record in metrics.stream(lenia, steps=1000, every=10):    # or as a generator
+        ...
+
+The engines hand their own intermediates to `Metrics.update`: the FFT engines pass the lowest
+harmonics of the world spectrum they already computed, so mass and centre of mass cost nothing
+extra. Everything is reduced on the device and a record moves a dozen numbers to the host, never
+the world. A record at step n describes the world after n updates and the update that follows it:
+
+    step           updates the world had gone through
+    mass           sum of the world
+    centroid       (y, x) centre of mass; circular means, so a pattern crossing the edge of the
+                   torus does not jump (None for a uniform world)
+    velocity       (vy, vx) cells per step since the previous record, wrapped to the shortest way
+    speed          length of velocity
+    activity       mean |change| of a cell during the update
+    live_fraction  fraction of cells above `live_threshold`
+    state          "empty", "stable", "periodic" or "changing"
+    period         steps after which the pattern repeats (None unless stable or periodic)
+
+The state compares a translation-invariant signature of the world (magnitudes of its lowest
+harmonics, scaled by its mass) with the signatures of the last `history` records. A moving
+glider is "stable"; periods are found only at multiples of `every`.
+"""
+import math
+from collections import deque
+import numpy
+
+
+class Metrics:
+    """Computes a dynamics record every `every` updates and passes it to `callback`."""
+
+    def __init__(self, every=10, callback=None, live_threshold=0.1, harmonics=4, history=32, tolerance=1e-3, start=0):
+        self.every = max(1, int(every))
+        self.callback = callback
+        self.live_threshold = live_threshold
+        self.harmonics = harmonics
+        self.tolerance = tolerance
+        # Updates seen so far: the next update starts from world number `step`
+        self.step = start
+        self.last = None
+        self._signatures = deque(maxlen=history)
+
+    def due(self):
+        """True when the coming update is sampled; engines only gather their intermediates then."""
+        return self.step % self.every == 0
+
+    def spectrum_harmonics(self, world_fft):
+        """Copies the harmonics the metrics need out of an rfft2 spectrum of the whole world.
+
+        The spectrum must cover exactly the world (no padding) and is read before anything
+        modifies it in place.
+        """
+        k = self.harmonics
+        return world_fft[0, :k + 1].copy(), world_fft[1:k + 1, 0].copy()
+
+    def _world_harmonics(self, xp, world):
+        # The same harmonics from the row and column sums, for engines without a world spectrum
+        k = self.harmonics
+        # Sums accumulate in float64: a float16 world overflows long before a large grid is summed
+        return (xp.fft.rfft(world.sum(axis=0, dtype=xp.float64))[:k + 1],
+                xp.fft.rfft(world.sum(axis=1, dtype=xp.float64))[1:k + 1])
+
+    def update(self, lenia, world, previous, harmonics=None):
+        """Called by the engine `lenia` after every update with the new and the previous world.
+
+        Engines that update in place only need to keep a copy of the previous world when due().
+        `harmonics` come from spectrum_harmonics() when the engine has the world spectrum.
+        Returns the record, or None on steps that are not sampled.
+        """
+        step = self.step
+        self.step += 1
+        if step % self.every:
+            return None
+        xp = lenia.xp
+        if harmonics is None:
+            harmonics = self._world_harmonics(xp, previous)
+        activity = xp.abs(world - previous).mean()
+        live = (previous > self.live_threshold).mean()
+        # One small transfer for the whole record
+        values = xp.concatenate([harmonics[0].astype(xp.complex128), harmonics[1].astype(xp.complex128),
+                                 xp.stack([live, activity]).astype(xp.complex128)])
+        record = self._record(step, previous.shape, lenia.backend.asnumpy(values))
+        self.last = record
+        if self.callback is not None:
+            self.callback(record)
+        return record
+
+    def _record(self, step, shape, values):
+        k = self.harmonics
+        height, width = shape
+        mass = float(values[0].real)
+        horizontal, vertical = values[1:k + 1], values[k + 1:2 * k + 1]
+        record = {
+            "step": step,
+            "mass": mass,
+            "centroid": None,
+            "velocity": None,
+            "speed": None,
+            "activity": float(values[-1].real),
+            "live_fraction": float(values[-2].real),
+            "state": "empty",
+            "period": None,
+        }
+        if mass <= 1e-6 * height * width:
+            self._signatures.clear()
+            return record
+
+        # The phase of the first harmonic along each axis is the circular mean of the mass
+        if min(abs(vertical[0]), abs(horizontal[0])) > 1e-6 * mass:
+            y = (-numpy.angle(vertical[0]) / (2 * math.pi) * height) % height
+            x = (-numpy.angle(horizontal[0]) / (2 * math.pi) * width) % width
+            record["centroid"] = (float(y), float(x))
+            last = self.last
+            if last is not None and last["centroid"] is not None and step > last["step"]:
+                elapsed = step - last["step"]
+                dy = (y - last["centroid"][0] + height / 2) % height - height / 2
+                dx = (x - last["centroid"][1] + width / 2) % width - width / 2
+                record["velocity"] = (float(dy / elapsed), float(dx / elapsed))
+                record["speed"] = float(math.hypot(dy, dx) / elapsed)
+
+        signature = numpy.abs(values[1:2 * k + 1]) / mass
+        for lag, past in enumerate(reversed(self._signatures), start=1):
+            if numpy.linalg.norm(signature - past) <= self.tolerance * max(numpy.linalg.norm(signature), 1e-12):
+                record["state"] = "stable" if lag == 1 else "periodic"
+                record["period"] = lag * self.every
+                break
+        else:
+            record["state"] = "changing"
+        self._signatures.append(signature)
+        return record
+
+
+def stream(lenia, steps, every=10, **options):
+    """Steps `lenia` `steps` times and yields a metrics record every `every` steps.
+
+    `options` are passed to Metrics. The engine's own metrics, if any, are restored afterwards.
+    """
+    records = deque()
+    attached = lenia.metrics
+    lenia.metrics = Metrics(every, callback=records.append, **options)
+    try:
+        for _ in range(steps):
+            lenia.update()
+            while records:
+                yield records.popleft()
+    finally:
+        lenia.metrics = attached
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+
+
+class SimulationPipeline:
+    """Decouples simulation stepping from display.
+
+    The simulation advances `steps_per_frame` steps per displayed frame, or free-runs on a
+    worker thread when `threaded`. After each batch of steps the world is copied into a host
+    buffer (pinned memory on CuPy) and published; the display only ever reads the latest
+    completed frame, so it never waits on the simulation or the device-to-host copy. Three host
+    buffers rotate so the worker never writes into the frame being displayed.
+
+    With `quantize`, frames are converted to uint8 levels (0..255) on the compute device before
+    the copy, which cuts the device-to-host transfer and texture upload to one byte per cell.
+
+    With `view`, a callable such as viewport.Viewport.extract, only the part of the world it
+    returns as (frame, placement) is copied; latest_placement() gives the frame's placement.
+
+    Engine setters must be called inside `with pipeline.lock:` while a worker thread is running.
+    The view is not covered by that lock: a Viewport guards its own state, so it can be moved
+    while the worker is stepping.
+    """
+
+    def __init__(self, lenia, steps_per_frame=1, threaded=False, quantize=False, view=None):
+        self.lenia = lenia
+        self.quantize = quantize
+        self.view = view
+        self.steps_per_frame = max(1, int(steps_per_frame))
+        self.threaded = threaded
+        self.lock = threading.RLock()
+        self.steps = 0
+
+        self._frames = [None, None, None]
+        self._placements = [None, None, None]
+        self._front = 0
+        self._reading = 0
+        self._frame_id = 0
+        self._publish_lock = threading.Lock()
+        # (time, total steps) samples for the steps/sec estimate
+        self._step_times = deque(maxlen=64)
+        self._running = False
+        self._thread = None
+        self._publish()
+
+    def _host_buffer(self, index, world):
+        frame = self._frames[index]
+        if frame is None or frame.shape != world.shape or frame.dtype != world.dtype:
+            frame = self._frames[index] = self.lenia.backend.empty_host(world.shape, world.dtype)
+        return frame
+
+    def _publish(self):
+        # Copy into a buffer that is neither published nor being read, then publish it
+        with self._publish_lock:
+            back = next(i for i in range(3) if i not in (self._front, self._reading))
+        world = self.lenia.get_world()
+        placement = None
+        if self.view is not None:
+            with self.lenia.profiler.phase("view"):
+                world, placement = self.view(world)
+        with self.lenia.profiler.phase("d2h"):
+            if self.quantize:
+                # Rounded like colormaps.apply_lut and lenia_export.render, so every view shows the same levels
+                xp = self.lenia.xp
+                world = xp.rint(xp.clip(world, 0, 1) * 255).astype(xp.uint8)
+            self.lenia.backend.asnumpy(world, out=self._host_buffer(back, world))
+        self._placements[back] = placement
+        with self._publish_lock:
+            self._front = back
+            self._frame_id += 1
+        self._step_times.append((time.perf_counter(), self.steps))
+
+    def _advance(self):
+        with self.lock:
+            for _ in range(self.steps_per_frame):
+                self.lenia.update()
+            self.steps += self.steps_per_frame
+            self._publish()
+
+    def step_frame(self):
+        """Runs one frame's worth of steps in the caller's thread (no-op while a worker is running)."""
+        if not self._running:
+            self._advance()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            self._advance()
+
+    def latest_frame(self):
+        """Returns (host world, frame id) for the most recently completed frame.
+
+        The returned array is not written to until the next call to latest_frame.
+        """
+        with self._publish_lock:
+            self._reading = self._front
+            return self._frames[self._front], self._frame_id
+
+    def latest_placement(self):
+        """Returns the view placement of the frame returned by the last call to latest_frame (None without a view)."""
+        with self._publish_lock:
+            return self._placements[self._reading]
+
+    def steps_per_second(self):
+        if len(self._step_times) < 2:
+            return 0.0
+        (t0, s0), (t1, s1) = self._step_times[0], self._step_times[-1]
+        return (s1 - s0) / (t1 - t0) if t1 > t0 else 0.0
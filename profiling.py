@@ -0,0 +1,135 @@
+"""Per-phase timing of the update loop and the display.
+
+Engines, the pipeline and main.py wrap each phase of their work in `profiler.phase(name)`.
+Engines start with the shared disabled profiler, whose phases are a single no-op context
+manager, so instrumentation costs next to nothing until a real `Profiler` is attached:
+
+    lenia.profiler = Profiler(synchronize=lenia.backend.synchronize)
+    ...
+    print(lenia.profiler.stats()["fft"]["p95"])
+
+With `synchronize`, the device is synchronized at both ends of every phase so asynchronous
+GPU work is charged to the phase that queued it (this serializes the GPU while profiling).
+"""
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+import numpy
+import config
+
+_NOOP = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.synchronize is not None:
+            self.profiler.synchronize()
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        if self.profiler.synchronize is not None:
+            self.profiler.synchronize()
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class Profiler:
+    """Keeps the last `size` durations (seconds) of every phase in a ring buffer, plus running totals."""
+
+    def __init__(self, enabled=True, size=None, synchronize=None):
+        self.enabled = enabled
+        self.size = config.PROFILE_SAMPLES if size is None else size
+        self.synchronize = synchronize
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = {}
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NOOP
+        return _Phase(self, name)
+
+    def record(self, name, seconds):
+        # Phases are recorded from both the simulation thread and the display thread
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.size)
+                self._totals[name] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def stats(self):
+        """Returns {phase: {count, total, last, mean, p50, p95, p99, max}}; all but count/total cover the ring buffer."""
+        with self._lock:
+            snapshot = {name: (numpy.array(samples), *self._totals[name]) for name, samples in self._samples.items()}
+        stats = {}
+        for name, (samples, count, total) in snapshot.items():
+            p50, p95, p99 = numpy.percentile(samples, [50, 95, 99])
+            stats[name] = {
+                "count": count,
+                "total": total,
+                "last": float(samples[-1]),
+                "mean": float(samples.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(samples.max()),
+            }
+        return stats
+
+    def summary_lines(self):
+        """One line per phase with its mean and p95 in milliseconds, for on-screen display."""
+        return [f"{name:<9}{s['mean'] * 1000:7.2f} ms  p95 {s['p95'] * 1000:6.2f}" for name, s in self.stats().items()]
+
+    def to_json(self):
+        return json.dumps({"time": time.time(), "phases": self.stats()})
+
+    def to_prometheus(self):
+        """The stats in the Prometheus text exposition format, as a summary per phase."""
+        lines = [
+            "# HELP lenia_phase_seconds Time spent in each phase of the Lenia update loop.",
+            "# TYPE lenia_phase_seconds summary",
+        ]
+        for name, s in self.stats().items():
+            for quantile in ("p50", "p95", "p99"):
+                lines.append(f'lenia_phase_seconds{{phase="{name}",quantile="0.{quantile[1:]}"}} {s[quantile]:.9f}')
+            lines.append(f'lenia_phase_seconds_sum{{phase="{name}"}} {s["total"]:.9f}')
+            lines.append(f'lenia_phase_seconds_count{{phase="{name}"}} {s["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Writes the stats to `path`: Prometheus text for .prom/.txt files, JSON otherwise."""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        # Write to a temporary file of this process, then replace in one step so a scraper never
+        # reads a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            # mkstemp makes the file private, but a scraper may run as another user
+            os.chmod(tmp_path, 0o644)
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+# Default profiler of every engine: records nothing
+DISABLED = Profiler(enabled=False, size=1)
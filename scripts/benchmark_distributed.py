@@ -0,0 +1,67 @@
+# This script measures strong and weak scaling of the distributed (strip-decomposed) engine.
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from lenia_core_distributed import LeniaDistributed
+
+
+def measure(workers, grid_shape, method, radius, steps):
+    """Returns mean seconds per step for `workers` processes on `grid_shape`."""
+    with LeniaDistributed(workers=workers, grid_shape=grid_shape, method=method, max_radius=radius,
+                          kernel_radius=radius) as lenia:
+        lenia.set_kernel_shape("ring")
+        # Warm up so every worker has built its kernel and FFT plans
+        lenia.update(steps=2)
+        start = time.perf_counter()
+        lenia.update(steps=steps)
+        return (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Strong and weak scaling of the distributed Lenia engine.')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count(), help='Largest worker count (default: all cores).')
+    parser.add_argument('--grid-size', type=int, default=2048, help='Grid size for strong scaling.')
+    parser.add_argument('--rows-per-worker', type=int, default=512, help='Strip height for weak scaling.')
+    parser.add_argument('--radius', type=int, default=13)
+    parser.add_argument('--method', choices=['fft', 'direct'], default='fft')
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--output', help='Also write the results as JSON here.')
+    args = parser.parse_args()
+
+    counts = [1]
+    while counts[-1] * 2 <= args.max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != args.max_workers:
+        counts.append(args.max_workers)
+
+    results = {"strong": [], "weak": []}
+    print(f"Strong scaling: {args.grid_size}x{args.grid_size}, radius {args.radius}, {args.method}")
+    print(f"{'workers':>8} {'ms/step':>10} {'speedup':>8} {'efficiency':>10}")
+    for workers in counts:
+        seconds = measure(workers, (args.grid_size, args.grid_size), args.method, args.radius, args.steps)
+        base = results["strong"][0]["seconds"] if results["strong"] else seconds
+        results["strong"].append({"workers": workers, "seconds": seconds})
+        print(f"{workers:>8} {seconds * 1000:>10.2f} {base / seconds:>8.2f} {base / seconds / workers:>10.0%}")
+
+    print(f"\nWeak scaling: {args.rows_per_worker} rows x {args.grid_size} columns per worker")
+    print(f"{'workers':>8} {'ms/step':>10} {'efficiency':>10}")
+    for workers in counts:
+        seconds = measure(workers, (args.rows_per_worker * workers, args.grid_size), args.method, args.radius, args.steps)
+        base = results["weak"][0]["seconds"] if results["weak"] else seconds
+        results["weak"].append({"workers": workers, "seconds": seconds})
+        print(f"{workers:>8} {seconds * 1000:>10.2f} {base / seconds:>10.0%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
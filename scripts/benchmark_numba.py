@@ -0,0 +1,64 @@
+# This script finds the kernel radius up to which the Numba direct convolution beats the FFT engine.
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from lenia_core import Lenia
+from lenia_core_numba import LeniaNumba
+
+
+def seconds_per_step(lenia, steps):
+    # The first update compiles (Numba) or plans (FFT); it is not timed
+    lenia.update()
+    start = time.perf_counter()
+    for _ in range(steps):
+        lenia.update()
+    return (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crossover between the Numba direct convolution and the FFT engine.')
+    parser.add_argument('--grid-size', type=int, nargs='+', default=[256, 800, 2048])
+    parser.add_argument('--radius', type=int, nargs='+', default=[2, 3, 5, 8, 13, 20, 25, 35, 50])
+    parser.add_argument('--shape', nargs='+', choices=['ring', 'gaussian', 'square'], default=['ring', 'gaussian'])
+    parser.add_argument('--threads', type=int, help='Numba threads (default: all cores).')
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--output', help='Also write the results as JSON here.')
+    args = parser.parse_args()
+
+    results = []
+    for grid_size in args.grid_size:
+        for shape in args.shape:
+            print(f"\n{grid_size}x{grid_size}, {shape} kernel")
+            print(f"{'radius':>7} {'numba ms':>9} {'fft ms':>8} {'speedup':>8}")
+            crossover = None
+            for radius in args.radius:
+                if 2 * radius + 1 > grid_size:
+                    continue
+                numba_lenia = LeniaNumba(grid_shape=grid_size, threads=args.threads, kernel_radius=radius)
+                # The in-place update is the fastest FFT path on the CPU
+                fft_lenia = Lenia(backend="numpy", inplace=True, grid_shape=grid_size, kernel_radius=radius)
+                for lenia in (numba_lenia, fft_lenia):
+                    lenia.set_kernel_shape(shape)
+                numba_seconds = seconds_per_step(numba_lenia, args.steps)
+                fft_seconds = seconds_per_step(fft_lenia, args.steps)
+                if numba_seconds < fft_seconds:
+                    crossover = radius
+                results.append({"grid_size": grid_size, "shape": shape, "radius": radius,
+                                "numba_seconds": numba_seconds, "fft_seconds": fft_seconds})
+                print(f"{radius:>7} {numba_seconds * 1000:>9.2f} {fft_seconds * 1000:>8.2f} {fft_seconds / numba_seconds:>8.2f}")
+            print(f"Numba is faster up to radius {crossover}" if crossover else "The FFT engine is faster at every radius")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
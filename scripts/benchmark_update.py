@@ -0,0 +1,56 @@
+# This script compares the default and in-place (preallocated, fused) Lenia update steps.
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# Add project root to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import config
+from lenia_core import Lenia
+
+
+def measure(inplace, backend, steps):
+    """Returns (mean seconds per step, peak temporary host bytes allocated during one step)."""
+    lenia = Lenia(backend=backend, inplace=inplace)
+    # Warm up so FFT plans and buffers exist before measuring
+    for _ in range(3):
+        lenia.update()
+    lenia.backend.synchronize()
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        lenia.update()
+    lenia.backend.synchronize()
+    seconds = (time.perf_counter() - start) / steps
+
+    # Host allocations are only visible to tracemalloc on the NumPy backend
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    lenia.update()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the default and in-place Lenia update steps.')
+    parser.add_argument('--backend', choices=['auto', 'cupy', 'numpy'], default=config.BACKEND)
+    parser.add_argument('--grid-size', type=int, default=config.GRID_SIZE)
+    parser.add_argument('--steps', type=int, default=50)
+    args = parser.parse_args()
+
+    config.GRID_SIZE = args.grid_size
+    print(f"Grid {args.grid_size}x{args.grid_size}, {args.steps} steps")
+    print(f"{'mode':<10} {'ms/step':>10} {'peak temp MB':>13}")
+    for inplace in (False, True):
+        seconds, peak = measure(inplace, args.backend, args.steps)
+        mode = "inplace" if inplace else "default"
+        print(f"{mode:<10} {seconds * 1000:>10.2f} {peak / 2**20:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@ import sys
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-import cupy
 import numpy
 from lenia_core import Lenia
 
@@ -22,7 +21,11 @@ def generate_golden_master():
     
     # Set fixed seeds for reproducibility
     numpy.random.seed(42)
-    cupy.random.seed(42)
+    try:
+        import cupy
+        cupy.random.seed(42)
+    except ImportError:
+        pass
 
     # Initialize Lenia. It will use the default config values.
     lenia = Lenia()
@@ -32,7 +35,7 @@ def generate_golden_master():
         lenia.update()
 
     # Get the final world state and save it
-    result = lenia.get_world().get()
+    result = lenia.backend.asnumpy(lenia.get_world())
     numpy.save(GOLDEN_MASTER_PATH, result)
     print("Golden master file generated successfully.")
 
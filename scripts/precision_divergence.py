@@ -0,0 +1,98 @@
+# This script measures how far the float32 and float16 precision modes drift from the float64 reference.
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to the Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy
+from lenia_core import PRECISIONS, Lenia
+
+
+def initial_world(grid_size, init, seed):
+    """Noise over the whole grid, or over a centred patch of half its size."""
+    rng = numpy.random.default_rng(seed)
+    if init == "noise":
+        return rng.random((grid_size, grid_size))
+    world = numpy.zeros((grid_size, grid_size))
+    start, size = grid_size // 4, grid_size // 2
+    world[start:start + size, start:start + size] = rng.random((size, size))
+    return world
+
+
+def divergence(world, reference):
+    world = world.astype(numpy.float64)
+    error = world - reference
+    return {
+        "max_abs": float(numpy.abs(error).max()),
+        "rms": float(numpy.sqrt(numpy.mean(error**2))),
+        # Relative error of the total mass, which patterns depend on more than on single cells
+        "mass_rel": float(abs(world.sum() - reference.sum()) / max(reference.sum(), 1e-12)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Divergence of the Lenia precision modes from the float64 reference.')
+    parser.add_argument('--backend', choices=['auto', 'cupy', 'numpy'], default='numpy')
+    parser.add_argument('--grid-size', type=int, default=256)
+    parser.add_argument('--radius', type=int, default=13)
+    parser.add_argument('--shape', choices=['ring', 'gaussian', 'square'], default='ring')
+    parser.add_argument('--mu', type=float, default=0.15)
+    parser.add_argument('--sigma', type=float, default=0.015)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--report-every', type=int, default=20)
+    parser.add_argument('--init', choices=['patch', 'noise'], default='patch')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--inplace', action='store_true', help='Use the in-place update.')
+    parser.add_argument('--output', help='Also write the results as JSON here.')
+    args = parser.parse_args()
+
+    start = initial_world(args.grid_size, args.init, args.seed)
+    engines = {}
+    for precision in ["float64", "float32", "float16"]:
+        lenia = Lenia(backend=args.backend, inplace=args.inplace, grid_shape=args.grid_size, precision=precision,
+                      kernel_radius=args.radius)
+        lenia.set_kernel_shape(args.shape)
+        lenia.set_mu(args.mu)
+        lenia.set_sigma(args.sigma)
+        lenia.world = lenia.xp.asarray(start, dtype=lenia.dtype)
+        engines[precision] = lenia
+
+    modes = ["float32", "float16"]
+    results = {"divergence": [], "modes": {}}
+    seconds = dict.fromkeys(engines, 0.0)
+    print(f"{'step':>6} " + " ".join(f"{mode + ' max':>13} {'rms':>9} {'mass':>9}" for mode in modes))
+    for step in range(1, args.steps + 1):
+        for precision, lenia in engines.items():
+            began = time.perf_counter()
+            lenia.update()
+            lenia.backend.synchronize()
+            seconds[precision] += time.perf_counter() - began
+        if step % args.report_every and step != args.steps:
+            continue
+        reference = engines["float64"].backend.asnumpy(engines["float64"].get_world())
+        row = {"step": step}
+        for mode in modes:
+            row[mode] = divergence(engines[mode].backend.asnumpy(engines[mode].get_world()), reference)
+        results["divergence"].append(row)
+        print(f"{step:>6} " + " ".join(f"{row[mode]['max_abs']:>13.3e} {row[mode]['rms']:>9.2e} {row[mode]['mass_rel']:>9.2e}" for mode in modes))
+
+    print(f"\n{'mode':<8} {'storage':>8} {'compute':>8} {'world MB':>9} {'ms/step':>8}")
+    for precision, lenia in engines.items():
+        storage, compute = PRECISIONS[precision]
+        megabytes = lenia.get_world().nbytes / 2**20
+        ms = seconds[precision] / args.steps * 1000
+        results["modes"][precision] = {"storage": storage, "compute": compute, "world_mb": megabytes, "ms_per_step": ms}
+        print(f"{precision:<8} {storage:>8} {compute:>8} {megabytes:>9.2f} {ms:>8.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Streaming snapshot storage for long runs.
+
+A snapshot store is a directory holding `meta.json` plus either zlib-compressed chunks of
+frames ("chunked") or a single `frames.npy` memory-mapped file used as a ring ("memmap").
+`SnapshotWriter` does the device-to-host copy, quantization and disk writes on a background
+thread fed by a bounded queue; `SnapshotReader` slices frames lazily.
+"""
+import json
+import os
+import queue
+import threading
+import zlib
+import numpy
+
+FORMATS = ["chunked", "memmap"]
+# Storage dtypes; uint8 maps [0, 1] onto 0..255
+QUANTIZE = {"float32": numpy.float32, "float16": numpy.float16, "uint8": numpy.uint8}
+
+
+def _quantize(frame, dtype):
+    if dtype == "uint8":
+        return numpy.rint(numpy.clip(frame, 0, 1) * 255).astype(numpy.uint8)
+    return frame.astype(QUANTIZE[dtype])
+
+
+def _dequantize(frames, dtype):
+    if dtype == "uint8":
+        return frames.astype(numpy.float32) / 255
+    return frames.astype(numpy.float32)
+
+
+class SnapshotWriter:
+    """Appends (H, W) frames to a snapshot store without blocking the simulation on disk I/O.
+
+    `append` copies the frame (on the device for CuPy arrays) and hands it to the writer thread;
+    it only blocks when `queue_size` frames are already waiting. With format="memmap" the store
+    keeps the last `capacity` frames as a ring.
+    """
+
+    def __init__(self, path, frame_shape, format="chunked", dtype="float32", chunk_frames=16,
+                 compression=1, capacity=1024, queue_size=8, asnumpy=numpy.asarray):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown snapshot format '{format}', expected one of {FORMATS}")
+        if dtype not in QUANTIZE:
+            raise ValueError(f"Unknown snapshot dtype '{dtype}', expected one of {list(QUANTIZE)}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.asnumpy = asnumpy
+        self.meta = {
+            "format": format,
+            "frame_shape": [int(n) for n in frame_shape],
+            "dtype": dtype,
+            "frames": 0,
+            "chunk_frames": int(chunk_frames),
+            "capacity": int(capacity),
+        }
+        self.compression = compression
+        self._pending = []
+        self._chunks = 0
+        self._frames = None
+        if format == "memmap":
+            self._frames = numpy.lib.format.open_memmap(
+                os.path.join(path, "frames.npy"), mode="w+", dtype=QUANTIZE[dtype],
+                shape=(self.meta["capacity"], *self.meta["frame_shape"]))
+        self._write_meta()
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, frame):
+        if self._error is not None:
+            raise self._error
+        if tuple(frame.shape) != tuple(self.meta["frame_shape"]):
+            raise ValueError(f"Frame shape {tuple(frame.shape)} does not match the store {tuple(self.meta['frame_shape'])}")
+        # Copy now: the engine may reuse the world buffer (in-place mode) before the writer gets to it
+        self._queue.put(frame.copy())
+
+    def close(self):
+        """Writes everything still queued and the final metadata, then stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                self._write(_quantize(self.asnumpy(frame), self.meta["dtype"]))
+            self._flush_chunk()
+            if self._frames is not None:
+                self._frames.flush()
+            self._write_meta()
+        except Exception as e:
+            self._error = e
+            # Keep draining so producers blocked on a full queue are released
+            while self._queue.get() is not None:
+                pass
+
+    def _write(self, frame):
+        if self._frames is not None:
+            self._frames[self.meta["frames"] % self.meta["capacity"]] = frame
+            self.meta["frames"] += 1
+            if self.meta["frames"] % self.meta["chunk_frames"] == 0:
+                self._write_meta()
+            return
+        self._pending.append(frame)
+        if len(self._pending) == self.meta["chunk_frames"]:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if not self._pending:
+            return
+        data = zlib.compress(numpy.stack(self._pending).tobytes(), self.compression)
+        with open(os.path.join(self.path, f"chunk_{self._chunks:06d}.bin"), "wb") as f:
+            f.write(data)
+        self._chunks += 1
+        self.meta["frames"] += len(self._pending)
+        self._pending = []
+        # Metadata follows every chunk, so a crashed run can still be read up to its last chunk
+        self._write_meta()
+
+    def _write_meta(self):
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+
+class SnapshotReader:
+    """Lazy (T, H, W) view of a snapshot store; indexing loads only the chunks it touches."""
+
+    def __init__(self, path, dequantize=True):
+        self.path = path
+        self.dequantize = dequantize
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self._cached_chunk = (None, None)
+        self._frames = None
+        if self.meta["format"] == "memmap":
+            self._frames = numpy.load(os.path.join(path, "frames.npy"), mmap_mode="r")
+
+    @property
+    def shape(self):
+        return (len(self), *self.meta["frame_shape"])
+
+    def __len__(self):
+        if self._frames is not None:
+            return min(self.meta["frames"], self.meta["capacity"])
+        return self.meta["frames"]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            frames = numpy.empty((0, *self.meta["frame_shape"]), dtype=QUANTIZE[self.meta["dtype"]])
+            indices = range(*index.indices(len(self)))
+            if len(indices):
+                frames = numpy.stack([self._frame(i) for i in indices])
+        else:
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError(f"Frame {index} out of range for {len(self)} frames")
+            frames = self._frame(index)
+        return _dequantize(frames, self.meta["dtype"]) if self.dequantize else frames
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _frame(self, index):
+        if self._frames is not None:
+            # In a ring that has wrapped, logical frame 0 is the oldest frame still stored
+            start = max(self.meta["frames"] - self.meta["capacity"], 0)
+            return self._frames[(start + index) % self.meta["capacity"]]
+        chunk, offset = divmod(index, self.meta["chunk_frames"])
+        return self._chunk(chunk)[offset]
+
+    def _chunk(self, chunk):
+        cached_index, cached = self._cached_chunk
+        if cached_index != chunk:
+            with open(os.path.join(self.path, f"chunk_{chunk:06d}.bin"), "rb") as f:
+                data = zlib.decompress(f.read())
+            cached = numpy.frombuffer(data, dtype=QUANTIZE[self.meta["dtype"]]).reshape(-1, *self.meta["frame_shape"])
+            self._cached_chunk = (chunk, cached)
+        return cached
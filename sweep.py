@@ -0,0 +1,361 @@
+"""Parameter sweeps: many short simulations in parallel, with their summaries kept in SQLite.
+
+    python sweep.py run --db sweep.db --mu 0.1:0.3 --sigma 0.01:0.04 --radius 13 --shape ring,gaussian \\
+        --sampling lhs --samples 200 --steps 500 --grid-size 128 --workers 4
+    python sweep.py list --db sweep.db --status survived --order-by mass
+
+Parameters are given as a range "low:high", a list "a,b,c" or a single value. Samples are
+batched into BatchedLenia instances (several worlds per worker process), and a world stops
+early once it dies out or explodes. Every run is identified by a hash of its parameters and
+the sweep settings, so re-running an interrupted sweep only runs what is missing.
+"""
+import argparse
+import hashlib
+import io
+import itertools
+import json
+import os
+import sqlite3
+import time
+import numpy
+import config
+
+PARAMETERS = ["mu", "sigma", "radius", "shape", "timestep"]
+INTEGER_PARAMETERS = {"radius"}
+TEXT_PARAMETERS = {"shape"}
+
+# Sweep settings and their defaults; they are part of every run's identity
+SETTINGS = {
+    "steps": 500,
+    "grid_size": "128",
+    "init": "patch",
+    "patch_fraction": 0.5,
+    "check_every": 10,
+    "dead_mass": 1e-4,
+    "explode_fraction": 0.5,
+    "seed": 0,
+}
+
+COLUMNS = {
+    "id": "TEXT PRIMARY KEY",
+    "mu": "REAL",
+    "sigma": "REAL",
+    "radius": "INTEGER",
+    "shape": "TEXT",
+    "timestep": "REAL",
+    "status": "TEXT",
+    "steps_run": "INTEGER",
+    "mass": "REAL",
+    "max_mass": "REAL",
+    "live_fraction": "REAL",
+    "mass_cv": "REAL",
+    "elapsed": "REAL",
+    "created": "REAL",
+    "settings": "TEXT",
+    "thumbnail": "BLOB",
+    "thumbnail_format": "TEXT",
+}
+
+
+def parse_spec(name, text):
+    """Parses "low:high" into ("range", low, high) and "a,b" or "a" into ("choice", [values])."""
+    convert = str if name in TEXT_PARAMETERS else int if name in INTEGER_PARAMETERS else float
+    if ":" in text and name not in TEXT_PARAMETERS:
+        low, high = (convert(value) for value in text.split(":"))
+        return ("range", low, high)
+    return ("choice", [convert(value) for value in text.split(",")])
+
+
+def _from_unit(name, spec, u):
+    # Maps u in [0, 1) onto the parameter's range or list
+    if spec[0] == "choice":
+        values = spec[1]
+        return values[min(int(u * len(values)), len(values) - 1)]
+    low, high = spec[1], spec[2]
+    if name in INTEGER_PARAMETERS:
+        return min(int(low + u * (high - low + 1)), high)
+    return float(low + u * (high - low))
+
+
+def sample(space, method="grid", count=None, grid_points=5, seed=0):
+    """Draws parameter dicts from `space` ({name: spec}) by "grid", "random" or "lhs" sampling."""
+    names = list(space)
+    if method == "grid":
+        axes = []
+        for name in names:
+            spec = space[name]
+            if spec[0] == "choice":
+                axes.append(spec[1])
+            elif name in INTEGER_PARAMETERS:
+                axes.append(sorted(set(numpy.linspace(spec[1], spec[2], grid_points).round().astype(int).tolist())))
+            else:
+                axes.append(numpy.linspace(spec[1], spec[2], grid_points).tolist())
+        return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+    rng = numpy.random.default_rng(seed)
+    if method == "random":
+        units = rng.random((count, len(names)))
+    elif method == "lhs":
+        # Latin hypercube: every parameter's range is split into `count` strata, each used once
+        units = (numpy.stack([rng.permutation(count) for _ in names], axis=1) + rng.random((count, len(names)))) / count
+    else:
+        raise ValueError(f"Unknown sampling '{method}', expected grid, random or lhs")
+    return [{name: _from_unit(name, space[name], u) for name, u in zip(names, row)} for row in units]
+
+
+def run_id(params, settings):
+    key = json.dumps({"params": params, "settings": settings}, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def initial_world(grid_shape, seed, settings):
+    """Random noise over the whole grid ("noise") or over a centred patch of the grid ("patch")."""
+    rng = numpy.random.default_rng(seed)
+    if settings["init"] == "noise":
+        return rng.random(grid_shape, dtype=numpy.float32)
+    world = numpy.zeros(grid_shape, dtype=numpy.float32)
+    height, width = (max(1, int(n * settings["patch_fraction"])) for n in grid_shape)
+    top, left = (grid_shape[0] - height) // 2, (grid_shape[1] - width) // 2
+    world[top:top + height, left:left + width] = rng.random((height, width), dtype=numpy.float32)
+    return world
+
+
+def thumbnail(world, size=64, colormap="viridis"):
+    """Returns (bytes, format): a colormapped PNG of the downsampled world, or raw .npy bytes without Pillow."""
+    import colormaps
+    step = max(1, max(world.shape) // size)
+    small = world[:world.shape[0] - world.shape[0] % step, :world.shape[1] - world.shape[1] % step]
+    small = small.reshape(small.shape[0] // step, step, small.shape[1] // step, step).mean(axis=(1, 3))
+    image = colormaps.apply_lut(small, colormaps.get_lut(colormap))
+    buffer = io.BytesIO()
+    try:
+        from PIL import Image
+    except ImportError:
+        numpy.save(buffer, image)
+        return buffer.getvalue(), "npy"
+    Image.fromarray(image).save(buffer, format="PNG")
+    return buffer.getvalue(), "png"
+
+
+def run_batch(batch, settings, backend="numpy", fft_workers=None):
+    """Runs a batch of (id, params) pairs as one BatchedLenia and returns a result row per run."""
+    import grid
+    from backend import NumpyBackend, get_backend
+    from lenia_core_batched import BatchedLenia
+
+    start = time.perf_counter()
+    if backend == "numpy" and fft_workers is not None:
+        backend = NumpyBackend(workers=fft_workers)
+    grid_shape = grid.grid_shape(settings["grid_size"])
+    params = [run_params for _, run_params in batch]
+    kernel_table = sorted({(run_params["radius"], run_params["shape"]) for run_params in params})
+    lenia = BatchedLenia(
+        len(batch),
+        mu=[run_params["mu"] for run_params in params],
+        sigma=[run_params["sigma"] for run_params in params],
+        timestep=[run_params["timestep"] for run_params in params],
+        kernels=kernel_table,
+        kernel_index=[kernel_table.index((run_params["radius"], run_params["shape"])) for run_params in params],
+        backend=get_backend(backend),
+        grid_shape=grid_shape,
+        # The engine builds its default kernel before the table; it must fit the grid too
+        kernel_radius=kernel_table[0][0],
+    )
+    for i, (identifier, _) in enumerate(batch):
+        # Seeded from the run id, so a run's world does not depend on its batch
+        lenia.set_world(i, initial_world(grid_shape, int(identifier[:8], 16) ^ settings["seed"], settings))
+
+    count = len(batch)
+    # The run behind each world of the engine; stopped runs are dropped from the batch
+    members = numpy.arange(count)
+    status = ["survived"] * count
+    steps_run = [settings["steps"]] * count
+    masses = [[] for _ in range(count)]
+    finals = [None] * count
+    for step in range(1, settings["steps"] + 1):
+        lenia.update()
+        if step % settings["check_every"] and step != settings["steps"]:
+            continue
+        world = lenia.backend.asnumpy(lenia.get_world())
+        mean = world.mean(axis=(1, 2))
+        live = (world > 0.1).mean(axis=(1, 2))
+        running = numpy.ones(len(members), dtype=bool)
+        for slot, i in enumerate(members):
+            masses[i].append(float(mean[slot]))
+            finals[i] = world[slot]
+            if mean[slot] < settings["dead_mass"]:
+                status[i] = "died"
+            elif live[slot] > settings["explode_fraction"]:
+                status[i] = "exploded"
+            else:
+                continue
+            running[slot] = False
+            steps_run[i] = step
+        if not running.any():
+            break
+        if not running.all():
+            # Later updates only step the worlds still running
+            lenia.keep(numpy.flatnonzero(running))
+            members = members[running]
+
+    elapsed = (time.perf_counter() - start) / count
+    rows = []
+    for i, (identifier, run_params) in enumerate(batch):
+        final = finals[i]
+        history = numpy.array(masses[i])
+        image, image_format = thumbnail(final)
+        rows.append(dict(
+            run_params,
+            id=identifier,
+            status=status[i],
+            steps_run=steps_run[i],
+            mass=float(final.mean()),
+            max_mass=float(history.max()),
+            live_fraction=float((final > 0.1).mean()),
+            # Relative variation of the mass over the run: near 0 for stable patterns
+            mass_cv=float(history.std() / history.mean()) if history.mean() > 0 else 0.0,
+            elapsed=elapsed,
+            created=time.time(),
+            settings=json.dumps(settings, sort_keys=True),
+            thumbnail=image,
+            thumbnail_format=image_format,
+        ))
+    return rows
+
+
+class ResultStore:
+    """SQLite table of finished runs, indexed by status and parameters."""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        columns = ", ".join(f"{name} {kind}" for name, kind in COLUMNS.items())
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS runs ({columns})")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS runs_status ON runs (status)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS runs_params ON runs (shape, radius, mu, sigma)")
+
+    def finished_ids(self):
+        return {row["id"] for row in self.connection.execute("SELECT id FROM runs")}
+
+    def add(self, rows):
+        names = list(COLUMNS)
+        # One transaction per batch: an interrupted sweep never leaves half a batch behind
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                [[row[name] for name in names] for row in rows])
+
+    def query(self, where=None, args=(), order_by=None, limit=None, thumbnails=False):
+        """Returns matching runs as dicts.
+
+        `where` is an SQL fragment with ? placeholders for `args`; `order_by` is a column name,
+        optionally followed by ASC or DESC.
+        """
+        names = [name for name in COLUMNS if thumbnails or not name.startswith("thumbnail")]
+        sql = f"SELECT {', '.join(names)} FROM runs"
+        if where:
+            sql += f" WHERE {where}"
+        if order_by:
+            column, *direction = order_by.split()
+            if column not in COLUMNS or [d.upper() for d in direction] not in ([], ["ASC"], ["DESC"]):
+                raise ValueError(f"Cannot order by '{order_by}', expected one of {list(COLUMNS)} and optionally ASC or DESC")
+            sql += f" ORDER BY {column} {' '.join(direction).upper()}".rstrip()
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.connection.execute(sql, args)]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def sweep(store, samples, settings, workers=1, batch_size=8, backend="numpy", log=print):
+    """Runs every sample not already in `store` and returns the number of runs done."""
+    finished = store.finished_ids()
+    pending = []
+    for params in samples:
+        identifier = run_id(params, settings)
+        if identifier not in finished:
+            finished.add(identifier)
+            pending.append((identifier, params))
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    log(f"{len(samples)} samples, {len(pending)} to run in {len(batches)} batches")
+
+    done = 0
+    if workers <= 1:
+        for batch in batches:
+            store.add(run_batch(batch, settings, backend))
+            done += len(batch)
+            log(f"{done}/{len(pending)} runs")
+        return done
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    # Spawned workers with one FFT thread each, so the processes do not oversubscribe the cores
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(run_batch, batch, settings, backend, 1) for batch in batches]
+        for future in as_completed(futures):
+            rows = future.result()
+            store.add(rows)
+            done += len(rows)
+            log(f"{done}/{len(pending)} runs")
+    return done
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run and query Lenia parameter sweeps.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Run a sweep (resumes if the database already has results).')
+    run.add_argument('--db', default='sweep.db', help='SQLite results database.')
+    run.add_argument('--mu', default='0.15', help='Range "low:high", list "a,b" or value.')
+    run.add_argument('--sigma', default='0.015')
+    run.add_argument('--radius', default=str(config.KERNEL_RADIUS))
+    run.add_argument('--shape', default='gaussian', help='List of kernel shapes, e.g. ring,gaussian.')
+    run.add_argument('--timestep', default=str(config.TIMESTEP))
+    run.add_argument('--sampling', choices=['grid', 'random', 'lhs'], default='grid')
+    run.add_argument('--samples', type=int, default=100, help='Number of samples for random/lhs sampling.')
+    run.add_argument('--grid-points', type=int, default=5, help='Points per range for grid sampling.')
+    run.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (1 runs in this process).')
+    run.add_argument('--batch-size', type=int, default=8, help='Worlds stepped together by each worker.')
+    run.add_argument('--backend', choices=['auto', 'cupy', 'numpy'], default='numpy')
+    for name, default in SETTINGS.items():
+        run.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+
+    show = commands.add_parser('list', help='Print finished runs.')
+    show.add_argument('--db', default='sweep.db')
+    show.add_argument('--status', choices=['survived', 'died', 'exploded'])
+    show.add_argument('--order-by', default='id', choices=[name for name in COLUMNS if not name.startswith('thumbnail')], help='Column to sort by (descending for mass, mass_cv, live_fraction).')
+    show.add_argument('--limit', type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'run':
+        space = {name: parse_spec(name, getattr(args, name)) for name in PARAMETERS}
+        samples = sample(space, args.sampling, args.samples, args.grid_points, args.seed)
+        settings = {name: getattr(args, name) for name in SETTINGS}
+        with ResultStore(args.db) as store:
+            sweep(store, samples, settings, args.workers, args.batch_size, args.backend)
+        return
+
+    with ResultStore(args.db) as store:
+        order = args.order_by + (" DESC" if args.order_by in ("mass", "mass_cv", "live_fraction") else "")
+        where, query_args = ("status = ?", (args.status,)) if args.status else (None, ())
+        rows = store.query(where, query_args, order_by=order, limit=args.limit)
+    print(f"{'id':<17}{'mu':>8}{'sigma':>8}{'radius':>7} {'shape':<9}{'status':<10}{'steps':>6}{'mass':>9}{'cv':>7}")
+    for row in rows:
+        print(f"{row['id']:<17}{row['mu']:>8.4f}{row['sigma']:>8.4f}{row['radius']:>7} {row['shape']:<9}"
+              f"{row['status']:<10}{row['steps_run']:>6}{row['mass']:>9.4f}{row['mass_cv']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
+import os
 import pytest
 import config
+from backend import available_backends
 
 @pytest.fixture(autouse=True)
 def restore_config():
@@ -7,4 +9,19 @@ def restore_config():
     original_kernel_radius = config.KERNEL_RADIUS
     yield
     config.GRID_SIZE = original_grid_size
-    config.KERNEL_RADIUS = original_kernel_radius
\ No newline at end of file
+    config.KERNEL_RADIUS = original_kernel_radius
+
+@pytest.fixture(autouse=True, scope="session")
+def fftw_wisdom_path(tmp_path_factory):
+    """Keeps the FFTW wisdom gathered by the tests out of the project directory."""
+    config.FFTW_WISDOM_PATH = str(tmp_path_factory.mktemp("fftw") / "wisdom.json")
+    # Subprocesses started by the tests read the path from the environment
+    os.environ["LENIA_FFTW_WISDOM_PATH"] = config.FFTW_WISDOM_PATH
+    yield
+    # The backends save their wisdom when the process exits, after the session
+    config.FFTW_WISDOM_PATH = ""
+
+@pytest.fixture(params=available_backends())
+def backend(request):
+    """Runs a test once per array backend installed on this machine."""
+    return request.param
@@ -0,0 +1,29 @@
+import config
+from benchmarks.run_benchmarks import compare, run_case
+
+
+def test_run_case_reports_throughput_and_latency(backend):
+    """Checks that a case reports its step rate, latency percentiles and kernel rebuild time."""
+    result = run_case(backend, "fft", 32, 3, "ring", min_steps=3, min_seconds=0)
+    assert result["steps"] >= 3
+    assert result["steps_per_sec"] > 0
+    assert result["latency_p50"] <= result["latency_p99"]
+    assert result["kernel_rebuild_seconds"] > 0
+
+
+def test_fixed_strategy_cases_do_not_autotune(backend, tmp_path, monkeypatch):
+    """Checks that timing a fixed strategy neither autotunes nor writes the strategy table."""
+    path = tmp_path / "strategies.json"
+    monkeypatch.setattr(config, "STRATEGY_TABLE_PATH", str(path))
+    monkeypatch.setattr(config, "AUTOTUNE", True)
+    run_case(backend, "box", 64, 5, "square", min_steps=1, min_seconds=0)
+    assert not path.exists()
+    assert config.AUTOTUNE and config.STRATEGY_TABLE_PATH == str(path)
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    """Checks that only cases slower than the baseline by more than the threshold are reported."""
+    case = {"backend": "numpy", "engine": "fft", "grid_size": 32, "radius": 3, "shape": "ring"}
+    baseline = {"results": [dict(case, steps_per_sec=100.0)]}
+    assert compare([dict(case, steps_per_sec=95.0)], baseline, 0.1) == []
+    assert compare([dict(case, steps_per_sec=80.0)], baseline, 0.1) == [("numpy:fft:32:r3:ring", 100.0, 80.0)]
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+import config
+from lenia_core import Lenia
+from lenia_core_batched import BatchedLenia
+from lenia_core_spatial import LeniaSpatial
+
+@pytest.fixture(autouse=True)
+def small_grid():
+    config.GRID_SIZE = 32
+    config.KERNEL_RADIUS = 4
+
+def test_resume_continues_identically(backend, tmp_path):
+    """Checks that a restored engine continues exactly like the original."""
+    path = tmp_path / "run.lenia"
+    lenia = Lenia(backend=backend)
+    lenia.set_kernel_shape("ring")
+    lenia.set_mu(0.2)
+    for _ in range(3):
+        lenia.update()
+    lenia.save_checkpoint(path, {"step": 3})
+    for _ in range(3):
+        lenia.update()
+
+    restored = Lenia(backend=backend)
+    assert restored.load_checkpoint(path) == {"step": 3}
+    assert restored.kernel_shape == "ring"
+    assert restored.mu == 0.2
+    for _ in range(3):
+        restored.update()
+    assert np.array_equal(lenia.backend.asnumpy(lenia.get_world()), restored.backend.asnumpy(restored.get_world()))
+
+def test_rng_state_is_restored(backend, tmp_path):
+    """Checks that randomizing after a restore draws the same world as after the save."""
+    path = tmp_path / "run.lenia"
+    lenia = Lenia(backend=backend)
+    lenia.save_checkpoint(path)
+    lenia.randomize_world()
+    expected = lenia.backend.asnumpy(lenia.get_world())
+
+    lenia.randomize_world()
+    lenia.load_checkpoint(path)
+    lenia.randomize_world()
+    assert np.array_equal(lenia.backend.asnumpy(lenia.get_world()), expected)
+
+def test_numpy_world_is_memory_mapped(tmp_path):
+    """Checks that the NumPy backend restores the world as a copy-on-write memory map."""
+    path = tmp_path / "run.lenia"
+    lenia = Lenia(backend="numpy")
+    lenia.save_checkpoint(path)
+    restored = Lenia(backend="numpy")
+    restored.load_checkpoint(path)
+    assert isinstance(restored.get_world(), np.memmap)
+    # Stepping the restored engine must not write back into the checkpoint file
+    restored.update()
+    reloaded = Lenia(backend="numpy")
+    reloaded.load_checkpoint(path)
+    assert np.array_equal(reloaded.get_world(), lenia.get_world())
+
+def test_batched_checkpoint_keeps_per_world_parameters(backend, tmp_path):
+    """Checks that a batched engine restores its per-world parameters and kernel table."""
+    path = tmp_path / "batch.lenia"
+    batched = BatchedLenia(2, mu=[0.1, 0.2], kernels=[(3, "ring"), (4, "square")], kernel_index=[1, 0], backend=backend)
+    batched.save_checkpoint(path)
+    restored = BatchedLenia(2, backend=backend)
+    restored.load_checkpoint(path)
+    assert np.allclose(restored.backend.asnumpy(restored.mu), [0.1, 0.2])
+    assert restored.kernels == [(3, "ring"), (4, "square")]
+    assert restored.backend.asnumpy(restored.kernel_index).tolist() == [1, 0]
+
+def test_checkpoint_rejects_other_engine(backend, tmp_path):
+    """Checks that a checkpoint only loads into the engine type that wrote it."""
+    path = tmp_path / "run.lenia"
+    Lenia(backend=backend).save_checkpoint(path)
+    with pytest.raises(ValueError):
+        LeniaSpatial(backend=backend).load_checkpoint(path)
+
+def test_checkpoint_rejects_other_grid(backend, tmp_path):
+    """Checks that a checkpoint only loads into an engine with the same grid."""
+    path = tmp_path / "run.lenia"
+    Lenia(backend=backend).save_checkpoint(path)
+    config.GRID_SIZE = 16
+    with pytest.raises(ValueError):
+        Lenia(backend=backend).load_checkpoint(path)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import colormaps
+
+@pytest.mark.parametrize("name", colormaps.COLORMAPS)
+def test_lut_shape_and_endpoints(name):
+    """Checks that every lookup table is 256 RGB entries matching the map's end colours."""
+    lut = colormaps.get_lut(name)
+    assert lut.shape == (256, 3)
+    assert lut.dtype == np.uint8
+    anchors = colormaps._ANCHORS[name]
+    assert np.abs(lut[0].astype(int) - anchors[0]).max() <= 1
+    assert np.abs(lut[-1].astype(int) - anchors[-1]).max() <= 1
+
+def test_fallback_matches_anchors(monkeypatch):
+    """Checks the interpolated tables used when matplotlib is not installed."""
+    import builtins
+    real_import = builtins.__import__
+
+    def no_matplotlib(name, *args, **kwargs):
+        if name == "matplotlib":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_matplotlib)
+    lut = colormaps.get_lut("viridis", size=17)
+    assert np.array_equal(lut, np.array(colormaps._ANCHORS["viridis"], dtype=np.uint8))
+
+def test_apply_lut():
+    """Checks that float and uint8 worlds map through the table the same way."""
+    lut = colormaps.get_lut("gray")
+    world = np.array([[0.0, 0.5], [1.0, 2.0]], dtype=np.float32)
+    image = colormaps.apply_lut(world, lut)
+    assert image.shape == (2, 2, 3)
+    assert image[0, 0].tolist() == [0, 0, 0]
+    assert image[1, 1].tolist() == [255, 255, 255]
+    levels = np.rint(np.clip(world, 0, 1) * 255).astype(np.uint8)
+    assert np.array_equal(colormaps.apply_lut(levels, lut), image)
+
+def test_unknown_colormap():
+    with pytest.raises(ValueError):
+        colormaps.get_lut("rainbow-unicorn")
@@ -0,0 +1,91 @@
+import json
+import pytest
+import numpy as np
+import config
+import convolution
+from convolution import STRATEGIES, autotune, make_convolution, select_strategy
+from lenia_core_auto import LeniaAuto
+
+@pytest.fixture(autouse=True)
+def strategy_table(tmp_path, monkeypatch):
+    """Keeps autotuning results out of the working directory."""
+    path = tmp_path / "strategies.json"
+    monkeypatch.setattr(config, "STRATEGY_TABLE_PATH", str(path))
+    return path
+
+@pytest.mark.parametrize("shape", ["ring", "gaussian", "square"])
+def test_strategies_agree(backend, shape):
+    """Checks that every strategy supporting a shape computes the same toroidal potential."""
+    from backend import get_backend
+    backend = get_backend(backend)
+    world = backend.random((48, 40))
+    reference = backend.asnumpy(make_convolution(4, shape, world.shape, backend, "direct").potential(world))
+    for name, strategy in STRATEGIES.items():
+        if shape not in strategy.shapes:
+            continue
+        potential = backend.asnumpy(make_convolution(4, shape, world.shape, backend, name).potential(world))
+        assert potential.shape == reference.shape
+        assert np.abs(potential - reference).max() < 1e-5, name
+
+def test_unsupported_strategy_is_rejected(backend):
+    """Checks that asking for a strategy that cannot handle the shape raises."""
+    with pytest.raises(ValueError):
+        make_convolution(4, "ring", (32, 32), backend, "separable")
+    with pytest.raises(ValueError):
+        make_convolution(4, "ring", (32, 32), backend, "winograd")
+
+def test_autotune_persists_winner(backend, strategy_table):
+    """Checks that autotuning records the fastest strategy and its timings on disk."""
+    best = autotune(3, "square", (32, 32), backend, repeats=1)
+    table = json.loads(strategy_table.read_text())
+    (entry,) = table.values()
+    assert entry["strategy"] == best
+    assert best in entry["seconds"]
+    assert min(entry["seconds"], key=entry["seconds"].get) == best
+
+def test_autotune_leaves_the_global_rng_alone(backend):
+    """Checks that autotuning does not advance the global RNG, so seeded runs stay reproducible."""
+    np.random.seed(7)
+    expected = np.random.rand(4)
+    np.random.seed(7)
+    autotune(3, "square", (32, 32), backend, repeats=1)
+    assert np.array_equal(np.random.rand(4), expected)
+
+def test_select_strategy_uses_table(backend, strategy_table, monkeypatch):
+    """Checks that a stored table entry is used without timing again."""
+    autotune(3, "gaussian", (32, 32), backend, repeats=1)
+    table = json.loads(strategy_table.read_text())
+    key = next(iter(table))
+    table[key]["strategy"] = "direct"
+    strategy_table.write_text(json.dumps(table))
+    monkeypatch.setattr(convolution, "autotune", lambda *args, **kwargs: pytest.fail("autotune should not run"))
+    assert select_strategy(3, "gaussian", (32, 32), backend) == "direct"
+
+def test_table_is_parsed_once(strategy_table):
+    """Checks that the table is kept in memory until the file changes."""
+    strategy_table.write_text(json.dumps({"a": {"strategy": "fft"}}))
+    table = convolution.load_table()
+    assert convolution.load_table() is table
+    strategy_table.write_text(json.dumps({"a": {"strategy": "direct"}, "b": {"strategy": "fft"}}))
+    assert convolution.load_table()["a"]["strategy"] == "direct"
+
+def test_select_strategy_cost_model_without_tuning(backend):
+    """Checks that the cost model picks an O(N) strategy for a large square kernel."""
+    assert select_strategy(50, "square", (512, 512), backend, tune=False) == "box"
+
+def test_lenia_auto_follows_fft_engine(backend):
+    """Checks that the automatic engine steps like the FFT engine."""
+    from lenia_core import Lenia
+    config.GRID_SIZE = 32
+    config.KERNEL_RADIUS = 4
+    lenia = Lenia(backend=backend)
+    auto = LeniaAuto(backend=backend, strategy="separable")
+    auto.world = lenia.world.copy()
+    for _ in range(3):
+        lenia.update()
+        auto.update()
+    diff = lenia.backend.asnumpy(lenia.get_world() - auto.get_world())
+    assert np.abs(diff).max() < 1e-5
+    # The ring kernel is not separable, so the engine falls back to automatic selection
+    auto.set_kernel_shape("ring")
+    assert auto.convolution.name in ("fft", "direct")
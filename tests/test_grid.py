@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+import config
+import grid
+from lenia_core import Lenia
+from lenia_core_auto import LeniaAuto
+from lenia_core_batched import BatchedLenia
+from lenia_core_spatial import LeniaSpatial
+
+# Both sides prime, so both axes are wrap-padded to fast FFT lengths
+PRIME_GRID = (37, 53)
+
+
+def test_grid_shape_normalization():
+    """Checks that sizes, pairs and HxW strings all become (height, width) tuples."""
+    config.GRID_SIZE = 24
+    assert grid.grid_shape() == (24, 24)
+    assert grid.grid_shape(16) == (16, 16)
+    assert grid.grid_shape((12, 20)) == (12, 20)
+    assert grid.grid_shape("12x20") == (12, 20)
+    assert grid.grid_shape("16") == (16, 16)
+    with pytest.raises(ValueError):
+        grid.grid_shape((0, 4))
+
+
+def test_fft_shape_pads_only_slow_axes():
+    """Checks that only axes with slow FFT lengths are padded to fast ones."""
+    assert grid.fft_shape((64, 37), 5) == (64, 48)
+    layout = grid.FFTLayout((64, 37), 5)
+    assert layout.padded and layout.offsets == (0, 5)
+    assert not grid.FFTLayout((64, 60), 5).padded
+
+
+def test_layout_pad_wraps_and_crop_inverts():
+    """Checks that padding wraps the torus and cropping gives the world back."""
+    world = np.random.rand(3, *PRIME_GRID).astype(np.float32)
+    layout = grid.FFTLayout(PRIME_GRID, 4)
+    padded = layout.pad(world)
+    assert padded.shape == (3, *layout.shape)
+    assert np.array_equal(layout.crop(padded), world)
+    # The cells left of the world are its last columns
+    assert np.array_equal(padded[:, 4:4 + PRIME_GRID[0], :4], world[:, :, -4:])
+
+
+def _patch_world(xp, lenia):
+    # A single off-centre patch, so a wrong wrap or crop shows up as a shift
+    world = xp.zeros(PRIME_GRID, dtype=xp.float32)
+    world[30:37, 2:14] = lenia.world[30:37, 2:14]
+    return world
+
+
+@pytest.mark.parametrize("make_engine", [
+    lambda backend: Lenia(backend=backend, grid_shape=PRIME_GRID),
+    lambda backend: Lenia(backend=backend, inplace=True, grid_shape=PRIME_GRID),
+    lambda backend: LeniaAuto(backend=backend, strategy="fft", grid_shape=PRIME_GRID),
+])
+def test_padded_fft_matches_spatial_convolution(backend, make_engine):
+    """Checks that the padded FFT engines compute the toroidal convolution on prime grids."""
+    config.KERNEL_RADIUS = 5
+    lenia = make_engine(backend)
+    spatial = LeniaSpatial(backend=backend, grid_shape=PRIME_GRID)
+    lenia.set_kernel_shape("ring")
+    spatial.set_kernel_shape("ring")
+    lenia.world = _patch_world(lenia.xp, lenia)
+    spatial.world = lenia.world.copy()
+    for _ in range(3):
+        lenia.update()
+        spatial.update()
+    assert lenia.get_world().shape == PRIME_GRID
+    diff = lenia.backend.asnumpy(lenia.get_world() - spatial.get_world())
+    assert np.abs(diff).max() < 1e-5
+
+
+def test_batched_padding_covers_largest_kernel(backend):
+    """Checks that a batch is padded for its largest kernel and matches the spatial engine."""
+    config.KERNEL_RADIUS = 3
+    batched = BatchedLenia(2, kernels=[(3, "ring"), (6, "ring")], kernel_index=[0, 1], backend=backend, grid_shape=PRIME_GRID)
+    assert batched.layout.offsets == (6, 6)
+    spatial = LeniaSpatial(backend=backend, grid_shape=PRIME_GRID)
+    spatial.set_kernel_shape("ring")
+    spatial.set_kernel_radius(6)
+    spatial.world = batched.get_world(1).copy()
+    batched.update()
+    spatial.update()
+    diff = batched.backend.asnumpy(batched.get_world(1) - spatial.get_world())
+    assert np.abs(diff).max() < 1e-5
+
+
+@pytest.mark.parametrize("resample", [True, False])
+def test_resize_keeps_engine_consistent(backend, resample):
+    """Checks that a resized engine keeps its layout in step and can still update."""
+    config.KERNEL_RADIUS = 4
+    lenia = Lenia(backend=backend, grid_shape=(32, 32))
+    world = lenia.backend.asnumpy(lenia.get_world()).copy()
+    lenia.resize((41, 48), resample=resample)
+    assert lenia.get_world().shape == (41, 48)
+    assert lenia.layout.grid_shape == (41, 48)
+    if not resample:
+        # Cropping and tiling keeps the cells of the old torus
+        assert np.array_equal(lenia.backend.asnumpy(lenia.get_world()), np.tile(world, (2, 2))[:41, :48])
+    lenia.update()
+    lenia.randomize_world()
+    assert lenia.get_world().shape == (41, 48)
@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+import config
+import kernels
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    kernels.clear_cache()
+    original_size = kernels.cache_info()["maxsize"]
+    yield
+    kernels.set_cache_size(original_size)
+    kernels.clear_cache()
+
+def test_kernel_is_normalized(backend):
+    """Checks that every kernel shape sums to one."""
+    for shape in kernels.KERNEL_SHAPES:
+        kernel = kernels.get_kernel(5, shape, backend)
+        assert kernel.shape == (11, 11)
+        assert kernel.dtype == np.float32
+        assert np.isclose(float(kernel.sum()), 1.0, atol=1e-5)
+
+def test_kernel_fft_is_cached(backend):
+    """Checks that a repeated lookup returns the memoized spectrum and counts a hit."""
+    first = kernels.get_kernel_fft(4, "ring", (32, 32), backend)
+    second = kernels.get_kernel_fft(4, "ring", (32, 32), backend)
+    assert first is second
+    info = kernels.cache_info()
+    assert info["hits"] == 1
+    assert info["misses"] == 1
+
+def test_kernel_fft_key_includes_grid_and_dtype(backend):
+    """Checks that different grids and dtypes get their own spectra."""
+    base = kernels.get_kernel_fft(4, "ring", (32, 32), backend)
+    assert kernels.get_kernel_fft(4, "ring", (32, 48), backend) is not base
+    assert kernels.get_kernel_fft(4, "ring", (32, 32), backend, dtype=np.float64) is not base
+    assert kernels.cache_info()["misses"] == 3
+
+def test_cache_evicts_least_recently_used(backend):
+    """Checks that the cache drops the least recently used spectrum when full."""
+    kernels.set_cache_size(2)
+    first = kernels.get_kernel_fft(2, "ring", (16, 16), backend)
+    kernels.get_kernel_fft(3, "ring", (16, 16), backend)
+    kernels.get_kernel_fft(2, "ring", (16, 16), backend)
+    kernels.get_kernel_fft(4, "ring", (16, 16), backend)
+    assert kernels.get_kernel_fft(2, "ring", (16, 16), backend) is first
+    assert kernels.cache_info()["spectra"] == 2
+    kernels.get_kernel_fft(3, "ring", (16, 16), backend)
+    assert kernels.cache_info()["misses"] == 4
+
+def test_precompute_fills_cache(backend):
+    """Checks that background precomputation fills the cache for a radius range."""
+    thread = kernels.precompute_kernels((16, 16), shapes=["ring", "square"], radii=range(1, 5), backend=backend)
+    thread.join()
+    assert kernels.cache_info()["spectra"] == 8
+    misses = kernels.cache_info()["misses"]
+    kernels.get_kernel_fft(3, "square", (16, 16), backend)
+    assert kernels.cache_info()["misses"] == misses
+
+def test_wrapped_layout_matches_rolled_kernel(backend):
+    """Checks that the wrapped kernel layout equals padding at the corner and rolling by -R."""
+    xp = kernels.get_backend(backend).xp
+    for radius, shape in [(4, "ring"), (6, "gaussian"), (3, "square"), (7, "shell")]:
+        kernel = kernels.create_kernel(radius, shape, xp)
+        rolled = xp.zeros((20, 17), dtype=kernel.dtype)
+        rolled[:kernel.shape[0], :kernel.shape[1]] = kernel
+        rolled = xp.roll(rolled, (-radius, -radius), axis=(0, 1))
+        wrapped = xp.zeros((20, 17), dtype=kernel.dtype)
+        kernels._wrap_kernel(kernel, wrapped, xp)
+        assert bool((wrapped == rolled).all())
+
+def test_batched_spectra_match_single(backend):
+    """Checks that a batch of spectra equals the spectra built one by one, and fills the cache."""
+    specs = [(3, "ring"), (5, "gaussian"), (4, "shell", [1, 0.5])]
+    stack = kernels.get_kernel_ffts(specs, (24, 30), backend)
+    assert stack.shape == (3, 24, 16)
+    assert kernels.cache_info()["misses"] == 3
+    for k, (radius, shape, *beta) in enumerate(specs):
+        single = kernels.create_kernel_fft(radius, shape, (24, 30), kernels.get_backend(backend), beta=beta[0] if beta else None)
+        assert np.allclose(kernels.get_backend(backend).asnumpy(stack[k] - single), 0, atol=1e-6)
+    kernels.get_kernel_ffts(specs[:2] + [(6, "square")], (24, 30), backend)
+    assert kernels.cache_info()["hits"] == 2
+    assert kernels.cache_info()["misses"] == 4
+
+def test_analytic_gaussian_spectrum(backend):
+    """Checks the closed-form gaussian spectrum against the transform of the spatial kernel."""
+    xp = kernels.get_backend(backend).xp
+    for radius in [2, 6, 12]:
+        analytic = kernels.get_kernel_fft(radius, "gaussian", (40, 44), backend, dtype=np.float64, analytic=True)
+        transformed = kernels.get_kernel_fft(radius, "gaussian", (40, 44), backend, dtype=np.float64)
+        assert analytic.shape == transformed.shape
+        # The spatial kernel is cut at 3 sigma, the analytic one is not
+        assert float(xp.abs(analytic - transformed).max()) < 1e-2
+    # Without a spatial footprint, radii wider than the grid are fine
+    assert kernels.get_kernel_fft(30, "gaussian", (16, 16), backend, analytic=True).shape == (16, 9)
+    with pytest.raises(ValueError):
+        kernels.get_kernel_fft(4, "ring", (16, 16), backend, analytic=True)
+
+def test_radius_is_validated_against_the_grid(backend):
+    """Checks that kernels wider than the grid are rejected instead of truncated."""
+    assert kernels.max_radius((21, 40)) == 10
+    kernels.get_kernel_fft(10, "ring", (21, 40), backend)
+    with pytest.raises(ValueError, match="at least 23 cells"):
+        kernels.get_kernel_fft(11, "ring", (21, 40), backend)
+    from lenia_core import Lenia
+    config.KERNEL_RADIUS = 4
+    lenia = Lenia(backend=backend, grid_shape=(21, 40))
+    with pytest.raises(ValueError):
+        lenia.set_kernel_radius(11)
+    assert lenia.kernel_radius == 4
+    with pytest.raises(ValueError):
+        lenia.resize((8, 8))
+    assert lenia.grid_shape == (21, 40)
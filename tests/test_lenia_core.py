@@ -1,41 +1,42 @@
+import json
 import pytest
-import cupy
 import numpy as np
+from backend import NumpyBackend
 from lenia_core import Lenia
+from lenia_core_spatial import LeniaSpatial
 import config
 
-def test_kernel_creation():
+def test_kernel_creation(backend):
     """Tests the creation of the kernel."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     # Test for gaussian kernel
     lenia.set_kernel_shape("gaussian")
     kernel_fft = lenia._create_kernel_fft(lenia.kernel_radius, lenia.kernel_shape)
-    assert isinstance(kernel_fft, cupy.ndarray)
+    assert isinstance(kernel_fft, lenia.xp.ndarray)
     # Test for ring kernel
     lenia.set_kernel_shape("ring")
     kernel_fft = lenia._create_kernel_fft(lenia.kernel_radius, lenia.kernel_shape)
-    assert isinstance(kernel_fft, cupy.ndarray)
+    assert isinstance(kernel_fft, lenia.xp.ndarray)
     # Test for square kernel
     lenia.set_kernel_shape("square")
     kernel_fft = lenia._create_kernel_fft(lenia.kernel_radius, lenia.kernel_shape)
-    assert isinstance(kernel_fft, cupy.ndarray)
+    assert isinstance(kernel_fft, lenia.xp.ndarray)
 
-def test_growth_function():
+def test_growth_function(backend):
     """Tests the growth function."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     # Test with mu
     assert np.isclose(lenia._growth(lenia.mu), 1.0)
     # Test with value far from mu
     assert lenia._growth(100) < 0
 
-def test_update_predictable():
+def test_update_predictable(backend):
     """Tests the update function with a predictable scenario."""
     # Use a small grid for predictability
-    config.GRID_SIZE = 5
     config.KERNEL_RADIUS = 2
-    lenia = Lenia()
+    lenia = Lenia(backend=backend, grid_shape=(5, 5))
     # Start with a blank world
-    lenia.world = cupy.zeros((5, 5), dtype=cupy.float32)
+    lenia.world = lenia.xp.zeros((5, 5), dtype=lenia.xp.float32)
     # Add a single pixel in the center
     lenia.world[2, 2] = 1.0
 
@@ -48,65 +49,158 @@ def test_update_predictable():
     # The corners should remain unchanged
     assert initial_world[0, 0] == updated_world[0, 0]
 
-def test_world_is_cupy_array():
-    """Checks that the Lenia world is a CuPy array."""
-    lenia = Lenia()
-    assert isinstance(lenia.get_world(), cupy.ndarray)
+def test_world_is_backend_array(backend):
+    """Checks that the Lenia world is an array of the selected backend (CuPy or NumPy)."""
+    lenia = Lenia(backend=backend)
+    assert isinstance(lenia.get_world(), lenia.xp.ndarray)
+    assert lenia.get_world().dtype == lenia.xp.float32
 
-def test_world_has_correct_shape():
+def test_world_has_correct_shape(backend):
     """Checks that the Lenia world has the expected dimensions."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     assert lenia.get_world().shape == (config.GRID_SIZE, config.GRID_SIZE)
 
-def test_world_values_are_in_range():
+def test_world_values_are_in_range(backend):
     """Checks that all values in the Lenia world are between 0 and 1."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     world = lenia.get_world()
-    assert cupy.all(world >= 0)
-    assert cupy.all(world <= 1)
+    assert lenia.xp.all(world >= 0)
+    assert lenia.xp.all(world <= 1)
 
-def test_update_changes_world():
+def test_update_changes_world(backend):
     """Checks that the update function modifies the world state."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     initial_world = lenia.get_world().copy()
     lenia.update()
     updated_world = lenia.get_world()
-    assert not cupy.all(initial_world == updated_world)
+    assert not lenia.xp.all(initial_world == updated_world)
 
-def test_set_kernel_radius():
+def test_set_kernel_radius(backend):
     """Checks that the kernel radius can be set correctly."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     lenia.set_kernel_radius(10)
     assert lenia.kernel_radius == 10
 
-def test_set_timestep():
+def test_set_timestep(backend):
     """Checks that the timestep can be set correctly."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     lenia.set_timestep(0.05)
     assert lenia.timestep == 0.05
 
-def test_set_kernel_shape():
+def test_set_kernel_shape(backend):
     """Checks that the kernel shape can be set correctly."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     lenia.set_kernel_shape("ring")
     assert lenia.kernel_shape == "ring"
 
-def test_set_mu():
+def test_set_mu(backend):
     """Checks that mu can be set correctly."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     lenia.set_mu(0.2)
     assert lenia.mu == 0.2
 
-def test_set_sigma():
+def test_set_sigma(backend):
     """Checks that sigma can be set correctly."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     lenia.set_sigma(0.02)
     assert lenia.sigma == 0.02
 
-def test_randomize_world():
+def test_randomize_world(backend):
     """Checks that the world is randomized."""
-    lenia = Lenia()
+    lenia = Lenia(backend=backend)
     initial_world = lenia.get_world().copy()
     lenia.randomize_world()
     randomized_world = lenia.get_world()
-    assert not cupy.all(initial_world == randomized_world)
\ No newline at end of file
+    assert not lenia.xp.all(initial_world == randomized_world)
+
+def test_fft_matches_spatial_convolution(backend):
+    """Checks that the FFT and spatial engines agree on a toroidal world."""
+    config.GRID_SIZE = 64
+    config.KERNEL_RADIUS = 5
+    for shape in ["ring", "gaussian", "square"]:
+        fft_lenia = Lenia(backend=backend)
+        spatial_lenia = LeniaSpatial(backend=backend)
+        fft_lenia.set_kernel_shape(shape)
+        spatial_lenia.set_kernel_shape(shape)
+        # A single off-centre patch, so any misplacement of the FFT kernel shows up as a shift
+        world = fft_lenia.xp.zeros((64, 64), dtype=fft_lenia.xp.float32)
+        world[3:15, 40:52] = fft_lenia.world[3:15, 40:52]
+        fft_lenia.world = world
+        spatial_lenia.world = world.copy()
+        fft_lenia.update()
+        spatial_lenia.update()
+        diff = fft_lenia.backend.asnumpy(fft_lenia.get_world() - spatial_lenia.get_world())
+        assert np.abs(diff).max() < 1e-5
+
+def test_inplace_update_matches_default(backend):
+    """Checks that the preallocated in-place update follows the default update."""
+    config.GRID_SIZE = 64
+    config.KERNEL_RADIUS = 5
+    lenia = Lenia(backend=backend)
+    inplace_lenia = Lenia(backend=backend, inplace=True)
+    inplace_lenia.world = lenia.world.copy()
+    for _ in range(5):
+        lenia.update()
+        inplace_lenia.update()
+    diff = lenia.backend.asnumpy(lenia.get_world() - inplace_lenia.get_world())
+    assert np.abs(diff).max() < 1e-5
+    assert inplace_lenia.get_world().dtype == inplace_lenia.xp.float32
+
+def test_inplace_update_reuses_buffers(backend):
+    """Checks that the in-place update alternates between two world buffers."""
+    config.GRID_SIZE = 32
+    config.KERNEL_RADIUS = 4
+    lenia = Lenia(backend=backend, inplace=True)
+    lenia.update()
+    first = lenia.get_world()
+    lenia.update()
+    second = lenia.get_world()
+    lenia.update()
+    assert lenia.get_world() is first
+    assert second is not first
+
+@pytest.mark.parametrize("inplace", [False, True])
+@pytest.mark.parametrize("grid_shape", [(48, 48), (47, 53)])
+def test_precision_modes(backend, inplace, grid_shape):
+    """Checks the dtypes of every precision mode and their distance from the float64 reference."""
+    config.KERNEL_RADIUS = 5
+    engines = {precision: Lenia(backend=backend, inplace=inplace, grid_shape=grid_shape, precision=precision)
+               for precision in ["float64", "float32", "float16"]}
+    start = engines["float64"].backend.asnumpy(engines["float64"].get_world())
+    for lenia in engines.values():
+        # A copy each: the in-place update writes into the world it was given
+        lenia.world = lenia.xp.array(start, dtype=lenia.dtype)
+    for lenia in engines.values():
+        for _ in range(3):
+            lenia.update()
+    xp = engines["float32"].xp
+    expected = {"float64": (xp.float64, xp.complex128), "float32": (xp.float32, xp.complex64), "float16": (xp.float16, xp.complex64)}
+    for precision, (world_dtype, spectrum_dtype) in expected.items():
+        assert engines[precision].get_world().dtype == world_dtype
+        assert engines[precision].kernel_fft.dtype == spectrum_dtype
+    reference = engines["float64"].backend.asnumpy(engines["float64"].get_world())
+    def error(precision):
+        return np.abs(engines[precision].backend.asnumpy(engines[precision].get_world()).astype(np.float64) - reference).max()
+    assert error("float32") < 1e-5
+    # Three roundings to float16 (about 5e-4 each near 1)
+    assert error("float16") < 5e-3
+
+def test_unknown_precision(backend):
+    """Checks that an unknown precision mode is rejected."""
+    with pytest.raises(ValueError, match="precision"):
+        Lenia(backend=backend, precision="bfloat16")
+
+def test_fftw_wisdom_round_trip(tmp_path, monkeypatch):
+    """Checks that FFTW wisdom is saved as JSON and imported by the next backend."""
+    pytest.importorskip("pyfftw")
+    path = tmp_path / "wisdom.json"
+    monkeypatch.setattr(config, "FFTW_WISDOM_PATH", str(path))
+    backend = NumpyBackend(workers=1, use_fftw=True)
+    world = backend.empty((24, 24), np.float32)
+    world[...] = 0
+    backend.rfft2(world, out=backend.empty((24, 13), np.complex64))
+    backend.save_wisdom()
+    with open(path) as f:
+        wisdom = json.load(f)
+    assert any("fftw" in w for w in wisdom)
+    assert NumpyBackend(workers=1, use_fftw=True).fftw.export_wisdom() == tuple(w.encode("latin-1") for w in wisdom)
@@ -0,0 +1,75 @@
+import pytest
+import numpy as np
+from lenia_core import Lenia
+from lenia_core_batched import BatchedLenia
+import config
+
+def test_batched_matches_single_worlds(backend):
+    """Checks that each batched world evolves exactly like its own single-world engine."""
+    config.GRID_SIZE = 32
+    config.KERNEL_RADIUS = 4
+    mus = [0.12, 0.15, 0.2]
+    sigmas = [0.01, 0.015, 0.03]
+    timesteps = [0.05, 0.1, 0.2]
+    kernels = [(4, "ring"), (6, "gaussian")]
+    kernel_index = [1, 0, 1]
+    batched = BatchedLenia(3, mu=mus, sigma=sigmas, timestep=timesteps, kernels=kernels, kernel_index=kernel_index, backend=backend)
+
+    singles = []
+    for i in range(3):
+        lenia = Lenia(backend=backend)
+        lenia.set_mu(mus[i])
+        lenia.set_sigma(sigmas[i])
+        lenia.set_timestep(timesteps[i])
+        lenia.kernel_radius, lenia.kernel_shape = kernels[kernel_index[i]]
+        lenia.set_kernel_radius(lenia.kernel_radius)
+        lenia.world = batched.get_world(i).copy()
+        singles.append(lenia)
+
+    for _ in range(3):
+        batched.update()
+        for lenia in singles:
+            lenia.update()
+
+    for i, lenia in enumerate(singles):
+        diff = lenia.backend.asnumpy(batched.get_world(i) - lenia.get_world())
+        assert np.abs(diff).max() < 1e-5
+
+def test_batched_world_shape(backend):
+    """Checks that the batch is stored as a (B, H, W) stack."""
+    config.GRID_SIZE = 32
+    config.KERNEL_RADIUS = 4
+    batched = BatchedLenia(4, backend=backend)
+    assert batched.get_world().shape == (4, config.GRID_SIZE, config.GRID_SIZE)
+
+def test_batched_scalar_parameters_broadcast(backend):
+    """Checks that scalar parameters are applied to every world."""
+    config.GRID_SIZE = 16
+    config.KERNEL_RADIUS = 4
+    batched = BatchedLenia(2, backend=backend)
+    batched.set_mu(0.2)
+    assert batched.mu.shape == (2,)
+    assert np.allclose(batched.backend.asnumpy(batched.mu), 0.2)
+
+def test_batched_rejects_wrong_parameter_length(backend):
+    """Checks that per-world arrays must have one value per world."""
+    config.GRID_SIZE = 16
+    config.KERNEL_RADIUS = 4
+    batched = BatchedLenia(2, backend=backend)
+    with pytest.raises(ValueError):
+        batched.set_sigma([0.01, 0.02, 0.03])
+    with pytest.raises(ValueError):
+        batched.set_kernel_index([0, 1])
+
+def test_batched_keep_selects_worlds(backend):
+    """Checks that keep() leaves only the chosen worlds, each with its own parameters and kernel."""
+    config.GRID_SIZE = 16
+    config.KERNEL_RADIUS = 4
+    batched = BatchedLenia(3, mu=[0.1, 0.2, 0.3], kernels=[(3, "ring"), (4, "gaussian")], kernel_index=[0, 1, 0], backend=backend)
+    worlds = batched.backend.asnumpy(batched.get_world()).copy()
+    batched.keep([2, 1])
+    assert batched.batch_size == 2 and batched.get_world().shape == (2, 16, 16)
+    assert np.allclose(batched.backend.asnumpy(batched.mu), [0.3, 0.2])
+    assert batched.backend.asnumpy(batched.kernel_index).tolist() == [0, 1]
+    assert np.array_equal(batched.backend.asnumpy(batched.get_world()), worlds[[2, 1]])
+    batched.update()
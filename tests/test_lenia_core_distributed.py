@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+import config
+from lenia_core import Lenia
+from lenia_core_distributed import LeniaDistributed, Transport
+from lenia_core_spatial import LeniaSpatial
+
+
+@pytest.fixture(autouse=True)
+def small_radius():
+    config.KERNEL_RADIUS = 4
+
+
+@pytest.mark.parametrize("method, reference, grid_shape", [
+    ("fft", Lenia, (48, 40)),
+    ("direct", LeniaSpatial, (48, 40)),
+    # Strips of 13 and 14 rows plus halos land on slow FFT lengths and a prime width
+    ("fft", Lenia, (40, 37)),
+])
+def test_matches_single_process(method, reference, grid_shape):
+    """Checks that the strips, their halo exchange and parameter changes match the single-process engines."""
+    single = reference(backend="numpy", grid_shape=grid_shape)
+    single.set_kernel_shape("ring")
+    with LeniaDistributed(workers=3, grid_shape=grid_shape, method=method, max_radius=8) as distributed:
+        distributed.set_kernel_shape("ring")
+        distributed.world = single.get_world()
+        distributed.update(steps=3)
+        for _ in range(3):
+            single.update()
+        assert np.abs(distributed.get_world() - single.get_world()).max() < 1e-5
+
+        # Parameter changes reach the workers
+        distributed.set_kernel_radius(6)
+        distributed.set_mu(0.2)
+        single.set_kernel_radius(6)
+        single.set_mu(0.2)
+        distributed.update()
+        single.update()
+        assert np.abs(distributed.get_world() - single.get_world()).max() < 1e-5
+
+
+def test_checkpoint_round_trip(tmp_path):
+    """Checks that a checkpoint gathers the strips and scatters them back."""
+    with LeniaDistributed(workers=2, grid_shape=(32, 32), max_radius=8) as distributed:
+        distributed.update()
+        distributed.save_checkpoint(str(tmp_path / "run.lenia"))
+        expected = distributed.get_world()
+        distributed.randomize_world()
+        distributed.load_checkpoint(str(tmp_path / "run.lenia"))
+        assert np.array_equal(distributed.get_world(), expected)
+
+
+def test_strips_must_cover_the_radius():
+    """Checks that strips thinner than the largest kernel radius are rejected."""
+    with pytest.raises(ValueError):
+        LeniaDistributed(workers=4, grid_shape=(32, 32), max_radius=10)
+
+
+def test_rejected_radius_leaves_the_engine_working():
+    """Checks that a radius above max_radius is refused without breaking later parameter changes."""
+    with LeniaDistributed(workers=2, grid_shape=(32, 32), max_radius=8) as distributed:
+        with pytest.raises(ValueError):
+            distributed.set_kernel_radius(5000)
+        assert distributed.kernel_radius == 4
+        distributed.set_mu(0.2)
+        distributed.set_kernel_radius(6)
+        distributed.update()
+        assert distributed.kernel_radius == 6
+
+
+def test_incomplete_transport_is_rejected():
+    """Checks that a transport missing one of the interface methods fails when it is created."""
+    class HaloOnly(Transport):
+        def exchange(self, top, bottom):
+            return top, bottom
+
+    with pytest.raises(TypeError):
+        HaloOnly()
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+import config
+from kernels import create_kernel
+from lenia_core import Lenia
+from lenia_core_multichannel import MultiChannelLenia
+
+
+@pytest.fixture(autouse=True)
+def small_grid():
+    config.GRID_SIZE = 32
+    config.KERNEL_RADIUS = 4
+
+
+def test_single_kernel_matches_lenia(backend):
+    """One channel and one ring kernel with weight 1 is the single-channel engine."""
+    lenia = Lenia(backend=backend)
+    lenia.set_kernel_shape("ring")
+    multi = MultiChannelLenia(1, [{"shape": "ring", "mu": lenia.mu, "sigma": lenia.sigma}], backend=backend)
+    multi.world = lenia.world[None].copy()
+    for _ in range(3):
+        lenia.update()
+        multi.update()
+    diff = lenia.backend.asnumpy(multi.get_world(0) - lenia.get_world())
+    assert np.abs(diff).max() < 1e-5
+
+
+def test_kernels_read_source_and_grow_target(backend):
+    """A kernel from channel 0 to channel 1 leaves channel 0 alone and grows channel 1 from channel 0."""
+    multi = MultiChannelLenia(2, [{"shape": "gaussian", "source": 0, "target": 1, "weight": 0.5}], backend=backend)
+    assert multi.kernel_ffts.shape == (1, 32, 17)
+    world = multi.world.copy()
+    multi.update()
+    assert multi.xp.array_equal(multi.get_world(0), world[0])
+
+    reference = Lenia(backend=backend)
+    reference.world = world[0].copy()
+    potential = reference.backend.irfft2(reference.backend.rfft2(world[0]) * reference.kernel_fft, s=(32, 32))
+    expected = reference.xp.clip(world[1] + multi.timestep * 0.5 * reference._growth(potential), 0, 1)
+    diff = multi.backend.asnumpy(multi.get_world(1) - expected)
+    assert np.abs(diff).max() < 1e-5
+
+
+def test_weights_sum_per_target(backend):
+    """Two identical kernels with weights a and b act like one kernel with weight a + b."""
+    pair = MultiChannelLenia(1, [{"weight": 0.25}, {"weight": 0.5}], backend=backend)
+    single = MultiChannelLenia(1, [{"weight": 0.75}], backend=backend)
+    single.world = pair.world.copy()
+    pair.update()
+    single.update()
+    diff = pair.backend.asnumpy(pair.get_world() - single.get_world())
+    assert np.abs(diff).max() < 1e-5
+
+
+def test_shell_kernel_rings():
+    """A shell kernel has one bump per beta entry, scaled by beta, and is zero at the centre and rim."""
+    kernel = create_kernel(12, "shell", np, beta=[1.0, 0.25])
+    profile = kernel[12, 12:]
+    assert np.isclose(kernel.sum(), 1.0)
+    assert profile[0] == 0 and profile[-1] == 0
+    inner, outer = profile[:7].max(), profile[6:].max()
+    assert np.isclose(outer / inner, 0.25, atol=0.02)
+
+
+def test_kernel_radius_scales_relative_radii(backend):
+    """Checks that kernel radii are relative to kernel_radius and follow set_kernel_radius."""
+    multi = MultiChannelLenia(1, [{"r": 1.0}, {"r": 0.5}], kernel_radius=8, backend=backend)
+    assert [multi._radius(kernel) for kernel in multi.kernels] == [8, 4]
+    multi.set_kernel_radius(6)
+    assert [multi._radius(kernel) for kernel in multi.kernels] == [6, 3]
+
+
+def test_invalid_kernels_are_rejected(backend):
+    """Checks that unknown channels and kernel keys raise."""
+    with pytest.raises(ValueError):
+        MultiChannelLenia(2, [{"target": 2}], backend=backend)
+    with pytest.raises(ValueError):
+        MultiChannelLenia(1, [{"radius": 3}], backend=backend)
+
+
+def test_checkpoint_round_trip(backend, tmp_path):
+    """Checks that a checkpoint restores the kernels and world and the same next step."""
+    kernels = [{"r": 1.0, "beta": [1.0, 0.5], "mu": 0.2, "target": 1}, {"r": 0.5, "shape": "ring", "weight": 2.0, "source": 1}]
+    multi = MultiChannelLenia(2, kernels, backend=backend)
+    multi.save_checkpoint(str(tmp_path / "multi.lenia"))
+    expected_world = multi.backend.asnumpy(multi.get_world()).copy()
+
+    restored = MultiChannelLenia(2, backend=backend)
+    restored.load_checkpoint(str(tmp_path / "multi.lenia"))
+    assert restored.kernels == multi.kernels
+    assert np.array_equal(restored.backend.asnumpy(restored.get_world()), expected_world)
+    multi.update()
+    restored.update()
+    assert np.array_equal(restored.backend.asnumpy(restored.get_world()), multi.backend.asnumpy(multi.get_world()))
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+import config
+import kernels
+from lenia_core_spatial import LeniaSpatial
+
+pytest.importorskip("numba")
+from lenia_core_numba import LeniaNumba, kernel_runs
+
+
+@pytest.fixture(autouse=True)
+def small_radius():
+    config.KERNEL_RADIUS = 5
+
+
+def test_kernel_runs_cover_the_nonzero_weights():
+    """Checks that the runs of a ring kernel hold exactly its non-zero weights."""
+    kernel = kernels.create_kernel(6, "ring", np)
+    rows, columns, starts, weights = kernel_runs(kernel)
+    rebuilt = np.zeros_like(kernel)
+    for row, column, start, stop in zip(rows, columns, starts[:-1], starts[1:]):
+        rebuilt[row + 6, column + 6:column + 6 + stop - start] = weights[start:stop]
+    assert np.array_equal(rebuilt, kernel)
+    assert weights.size == np.count_nonzero(kernel)
+    # A ring row crossing the hole is two runs
+    assert rows.size > len(set(rows.tolist()))
+
+
+@pytest.mark.parametrize("shape", ["ring", "gaussian", "square"])
+@pytest.mark.parametrize("grid_shape", [(40, 40), (37, 45)])
+def test_matches_spatial_engine(shape, grid_shape):
+    """Checks that the fused Numba update follows LeniaSpatial, including across the torus edges."""
+    lenia = LeniaNumba(grid_shape=grid_shape, threads=1)
+    reference = LeniaSpatial(backend="numpy", grid_shape=grid_shape)
+    for engine in (lenia, reference):
+        engine.set_kernel_shape(shape)
+        engine.set_mu(0.2)
+    reference.world = lenia.world.copy()
+    for _ in range(4):
+        lenia.update()
+        reference.update()
+    assert lenia.get_world().dtype == np.float32
+    assert np.abs(lenia.get_world() - reference.get_world()).max() < 1e-5
+
+
+def test_parameters_and_resize():
+    """Checks that radius, shape and grid changes reach the compiled kernel."""
+    lenia = LeniaNumba(grid_shape=32)
+    lenia.set_kernel_radius(3)
+    lenia.set_kernel_shape("ring")
+    lenia.resize((24, 40))
+    lenia.update()
+    reference = LeniaSpatial(backend="numpy", grid_shape=(24, 40))
+    reference.set_kernel_radius(3)
+    reference.set_kernel_shape("ring")
+    reference.world = lenia.world.copy()
+    lenia.update()
+    reference.update()
+    assert lenia.get_world().shape == (24, 40)
+    assert np.abs(lenia.get_world() - reference.get_world()).max() < 1e-5
+
+
+def test_cost_counts_nonzero_weights():
+    """Checks that the cost model counts one multiply-add per non-zero kernel weight per cell."""
+    assert LeniaNumba.cost(6, "ring", (10, 10)) < LeniaNumba.cost(6, "square", (10, 10)) == 2 * 100 * 13**2
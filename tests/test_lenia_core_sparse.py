@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+import config
+from lenia_core import Lenia
+from lenia_core_sparse import LeniaSparse
+
+
+@pytest.fixture(autouse=True)
+def small_radius():
+    config.KERNEL_RADIUS = 5
+
+
+def _sparse_world(xp, shape, patches):
+    rng = np.random.default_rng(0)
+    world = np.zeros(shape, dtype=np.float32)
+    for y, x in patches:
+        # Patches may wrap around the torus
+        world = np.roll(world, (-y, -x), axis=(0, 1))
+        world[:12, :12] = rng.random((12, 12))
+        world = np.roll(world, (y, x), axis=(0, 1))
+    return xp.asarray(world)
+
+
+@pytest.mark.parametrize("grid_shape, patches", [
+    ((128, 128), [(20, 30), (90, 70)]),
+    # A last row of tiles overlapping the one before, and a patch that wraps around the corner of the torus
+    ((180, 240), [(174, 234), (80, 100)]),
+    # Prime sides, whose only divisors are 1 and the side itself
+    ((251, 257), [(245, 250), (100, 40)]),
+])
+def test_sparse_matches_dense(backend, grid_shape, patches):
+    """Checks that stepping only the active tiles gives the dense result, including patches across the torus edges."""
+    sparse = LeniaSparse(backend=backend, grid_shape=grid_shape, tile_size=16)
+    dense = Lenia(backend=backend, grid_shape=grid_shape)
+    for lenia in (sparse, dense):
+        lenia.set_kernel_shape("ring")
+        lenia.set_mu(0.15)
+        lenia.set_sigma(0.03)
+    sparse.world = _sparse_world(sparse.xp, grid_shape, patches)
+    dense.world = sparse.world.copy()
+    for _ in range(10):
+        sparse.update()
+        dense.update()
+        assert sparse.last_mode == "sparse"
+    assert sparse.active_tiles < sparse.tile_counts[0] * sparse.tile_counts[1]
+    diff = sparse.backend.asnumpy(sparse.get_world() - dense.get_world())
+    assert np.abs(diff).max() < 1e-5
+
+
+def test_dense_world_falls_back_to_full_fft(backend):
+    """Checks that a world with live cells everywhere is stepped with the full FFT."""
+    sparse = LeniaSparse(backend=backend, grid_shape=(64, 64), tile_size=16)
+    dense = Lenia(backend=backend, grid_shape=(64, 64))
+    dense.world = sparse.world.copy()
+    sparse.update()
+    dense.update()
+    assert sparse.last_mode == "dense"
+    assert np.abs(sparse.backend.asnumpy(sparse.get_world() - dense.get_world())).max() < 1e-6
+
+
+def test_positive_growth_of_empty_cells_is_always_dense(backend):
+    """Checks that growth parameters that make empty cells grow force the dense update."""
+    sparse = LeniaSparse(backend=backend, grid_shape=(64, 64), tile_size=16)
+    sparse.set_mu(0.01)
+    sparse.world = _sparse_world(sparse.xp, (64, 64), [(10, 10)])
+    sparse.update()
+    assert sparse.last_mode == "dense"
+
+
+def test_tiles_keep_their_size_on_prime_grids():
+    """Checks that a grid side with no divisor near tile_size still gets tiles of tile_size cells."""
+    sparse = LeniaSparse(backend="numpy", grid_shape=(509, 1021), tile_size=64)
+    assert sparse.tile_shape == (64, 64) and sparse.tile_counts == (8, 16)
+
+
+def test_empty_world_stays_empty(backend):
+    """Checks that an empty world skips the convolution and stays empty."""
+    sparse = LeniaSparse(backend=backend, grid_shape=(64, 64), tile_size=16)
+    sparse.world = sparse.xp.zeros((64, 64), dtype=sparse.xp.float32)
+    sparse.update()
+    assert sparse.last_mode == "empty"
+    assert not sparse.xp.any(sparse.get_world())
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+import colormaps
+import config
+import lenia_export
+from backend import get_backend
+from lenia_core import Lenia
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def level_frames(count, shape=(12, 20), seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def read_frames(path):
+    image = Image.open(path)
+    frames = []
+    for index in range(image.n_frames):
+        image.seek(index)
+        frames.append(np.asarray(image.convert("RGB")))
+    return frames
+
+
+def test_render_pools_and_quantizes(backend):
+    """Checks mean pooling and quantization to levels on every backend."""
+    xp = get_backend(backend).xp
+    world = xp.zeros((9, 8), dtype=xp.float32)
+    world[:2, :2] = 1
+    world[2:4, :2] = 0.5
+    levels = get_backend(backend).asnumpy(lenia_export.render(world, 2, xp))
+    # The ninth row does not fill a block and is dropped
+    assert levels.shape == (4, 4) and levels.dtype == np.uint8
+    assert levels[0, 0] == 255 and levels[1, 0] == 128 and levels[2:, :].sum() == 0
+    assert np.array_equal(lenia_export.render(np.full((2, 2), 64, np.uint8), 1), np.full((2, 2), 64))
+
+
+@pytest.mark.parametrize("extension", [".gif", ".png"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pillow_writers_keep_every_frame(tmp_path, extension, workers):
+    """Checks that the streamed GIF/APNG holds every frame with the colormap's exact colours."""
+    frames = level_frames(5)
+    path = str(tmp_path / f"out{extension}")
+    written = lenia_export.export(frames, path, frames[0].shape, len(frames), colormap="magma",
+                                  encoder="pillow", workers=workers, fps=20)
+    assert written == 5
+    lut = colormaps.get_lut("magma")
+    decoded = read_frames(path)
+    assert len(decoded) == 5
+    for levels, rgb in zip(frames, decoded):
+        assert np.array_equal(rgb, lut[levels])
+    assert Image.open(path).info["duration"] == 50
+
+
+def test_apng_frame_count_is_checked(tmp_path):
+    """Checks that an APNG given fewer frames than it declared is reported."""
+    with pytest.raises(ValueError):
+        lenia_export.export(level_frames(2), str(tmp_path / "out.png"), (12, 20), 3, encoder="pillow", workers=1)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_frame_errors_are_not_hidden(tmp_path, workers):
+    """Checks that an error while making frames reaches the caller instead of the APNG frame count check."""
+    def failing_frames():
+        yield from level_frames(1)
+        raise RuntimeError("simulation failed")
+
+    with pytest.raises(RuntimeError, match="simulation failed"):
+        lenia_export.export(failing_frames(), str(tmp_path / "out.png"), (12, 20), 3, encoder="pillow", workers=workers)
+
+
+def test_unknown_format_and_mp4_without_ffmpeg(tmp_path, monkeypatch):
+    """Checks that unknown extensions, and MP4 without ffmpeg, are rejected before any frame is made."""
+    with pytest.raises(ValueError):
+        lenia_export.open_writer(str(tmp_path / "out.avi"), (4, 4), 1)
+    monkeypatch.setattr(lenia_export.shutil, "which", lambda name: None)
+    with pytest.raises(RuntimeError):
+        lenia_export.open_writer(str(tmp_path / "out.mp4"), (4, 4), 1)
+
+
+def test_engine_frames_follow_the_simulation():
+    """Checks that exported frames are the engine's worlds every `every` steps."""
+    config.KERNEL_RADIUS = 5
+    lenia = Lenia(backend="numpy", grid_shape=32)
+    reference = Lenia(backend="numpy", grid_shape=32)
+    reference.world = lenia.world.copy()
+    frames = list(lenia_export.engine_frames(lenia, 3, every=2))
+    assert len(frames) == 3
+    for _ in range(4):
+        reference.update()
+    assert np.array_equal(frames[2], lenia_export.render(reference.get_world(), 1))
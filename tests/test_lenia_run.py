@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import lenia_run
+from snapshots import SnapshotReader
+
+def test_headless_run_writes_outputs(backend, tmp_path):
+    """Runs a short headless simulation and checks its snapshots and metrics."""
+    output = tmp_path / "run"
+    lenia_run.main([
+        '--backend', backend, '--grid-size', '32', '--radius', '4', '--shape', 'ring',
+        '--steps', '6', '--seed', '3', '--snapshot-every', '3', '--metrics-every', '2',
+        '--output', str(output),
+    ])
+    final = np.load(output / "world_final.npy")
+    assert final.shape == (32, 32)
+    snapshots = SnapshotReader(str(output / "snapshots"))
+    assert snapshots.shape == (2, 32, 32)
+    assert np.array_equal(snapshots[-1], final)
+    records = [json.loads(line) for line in (output / "metrics.jsonl").read_text().splitlines()]
+    assert [record["step"] for record in records] == [2, 4, 6]
+    assert json.loads((output / "params.json").read_text())["shape"] == "ring"
+
+def test_npy_snapshots(tmp_path):
+    """Checks that the npy snapshot format writes one file per snapshot."""
+    output = tmp_path / "run"
+    lenia_run.main(['--backend', 'numpy', '--grid-size', '16', '--radius', '3', '--steps', '4',
+                    '--snapshot-every', '2', '--snapshot-format', 'npy', '--output', str(output)])
+    assert (output / "world_00000002.npy").exists()
+    assert (output / "world_00000004.npy").exists()
+
+def test_resume_from_checkpoint(tmp_path):
+    """Checks that a resumed run ends on the same world as an uninterrupted one."""
+    common = ['--backend', 'numpy', '--grid-size', '16', '--radius', '3', '--seed', '5', '--metrics-every', '1']
+    lenia_run.main(common + ['--steps', '6', '--output', str(tmp_path / "full")])
+    lenia_run.main(common + ['--steps', '4', '--checkpoint-every', '2', '--output', str(tmp_path / "resumed")])
+    lenia_run.main(['--resume', '--steps', '6', '--output', str(tmp_path / "resumed")])
+    assert np.array_equal(np.load(tmp_path / "full" / "world_final.npy"), np.load(tmp_path / "resumed" / "world_final.npy"))
+    records = [json.loads(line) for line in (tmp_path / "resumed" / "metrics.jsonl").read_text().splitlines()]
+    assert [record["step"] for record in records] == [1, 2, 3, 4, 5, 6]
+
+def test_resume_drops_records_after_the_checkpoint(tmp_path):
+    """Checks that resuming from a checkpoint older than the last records writes each step's records once."""
+    common = ['--backend', 'numpy', '--grid-size', '16', '--radius', '3', '--seed', '5', '--metrics-every', '1', '--dynamics']
+    output = str(tmp_path / "resumed")
+    lenia_run.main(common + ['--steps', '5', '--checkpoint-every', '2', '--output', output])
+    lenia_run.main(['--resume', '--steps', '7', '--output', output])
+    for name, steps in [("metrics.jsonl", range(1, 8)), ("dynamics.jsonl", range(0, 7))]:
+        records = [json.loads(line) for line in (tmp_path / "resumed" / name).read_text().splitlines()]
+        assert [record["step"] for record in records] == list(steps), name
+
+def test_config_file_is_overridden_by_cli(tmp_path):
+    """Checks that command line options take precedence over the config file."""
+    config_path = tmp_path / "run.json"
+    config_path.write_text(json.dumps({"mu": 0.2, "steps": 7}))
+    params = lenia_run.load_params(lenia_run.parse_args(['--config', str(config_path), '--steps', '3']))
+    assert params["mu"] == 0.2
+    assert params["steps"] == 3
+
+def test_seed_makes_runs_reproducible(backend, tmp_path):
+    """Checks that the same seed reproduces the same final world."""
+    worlds = []
+    for name in ("a", "b"):
+        lenia_run.main(['--backend', backend, '--grid-size', '16', '--radius', '3', '--steps', '2',
+                        '--seed', '11', '--output', str(tmp_path / name)])
+        worlds.append(np.load(tmp_path / name / "world_final.npy"))
+    assert np.array_equal(worlds[0], worlds[1])
+
+def test_headless_run_does_not_import_gui(tmp_path):
+    """Checks that the runner never pulls in the GUI stack."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        "import sys, lenia_run; "
+        f"lenia_run.main(['--backend', 'numpy', '--grid-size', '16', '--radius', '3', '--steps', '1', '--output', {str(tmp_path)!r}]); "
+        "assert not {'pygame', 'pygame_gui', 'moderngl', 'matplotlib'} & set(sys.modules)"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=project_root, capture_output=True, text=True)
+
+def test_non_square_grid(tmp_path):
+    """Checks that --grid-size accepts HxW."""
+    output = tmp_path / "run"
+    lenia_run.main(['--backend', 'numpy', '--grid-size', '24x37', '--radius', '3', '--steps', '2', '--output', str(output)])
+    assert np.load(output / "world_final.npy").shape == (24, 37)
+
+def test_build_engine_leaves_config_alone(tmp_path, monkeypatch):
+    """Checks that the run's radius goes to the engine without changing config.KERNEL_RADIUS."""
+    import config
+    # The auto engine tunes its strategy; the table goes to the test's directory
+    monkeypatch.setattr(config, "STRATEGY_TABLE_PATH", str(tmp_path / "strategies.json"))
+    default = config.KERNEL_RADIUS
+    for engine in ("fft", "spatial", "auto", "sparse"):
+        params = dict(lenia_run.DEFAULTS, backend="numpy", grid_size=16, radius=3, engine=engine)
+        assert lenia_run.build_engine(params).kernel_radius == 3
+    assert config.KERNEL_RADIUS == default
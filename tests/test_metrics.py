@@ -0,0 +1,113 @@
+import json
+import numpy as np
+import pytest
+import config
+import lenia_run
+import metrics
+from lenia_core import Lenia
+from lenia_core_auto import LeniaAuto
+from lenia_core_sparse import LeniaSparse
+from lenia_core_spatial import LeniaSpatial
+from metrics import Metrics
+
+
+@pytest.fixture(autouse=True)
+def small_radius():
+    config.KERNEL_RADIUS = 4
+
+
+def blob(shape, center, radius=3):
+    y, x = np.ogrid[:shape[0], :shape[1]]
+    dy = (y - center[0] + shape[0] / 2) % shape[0] - shape[0] / 2
+    dx = (x - center[1] + shape[1] / 2) % shape[1] - shape[1] / 2
+    return (dy**2 + dx**2 <= radius**2).astype(np.float32)
+
+
+class Static:
+    """Stands in for an engine when feeding Metrics hand-made worlds."""
+    xp = np
+    backend = type("Backend", (), {"asnumpy": staticmethod(np.asarray)})
+
+
+def test_centroid_wraps_and_velocity():
+    """Checks the toroidal centre of mass of a blob crossing the edge, and its velocity."""
+    shape = (40, 50)
+    tracker = Metrics(every=1)
+    records = []
+    for step in range(4):
+        # Moves 2 rows down and 3 columns left per step, starting on the corner of the torus
+        world = blob(shape, (2 * step - 1, -3 * step))
+        records.append(tracker.update(Static, world, world))
+    assert records[0]["centroid"] == pytest.approx((39, 0), abs=1e-6)
+    assert records[2]["centroid"] == pytest.approx((3, 44), abs=1e-6)
+    assert records[3]["velocity"] == pytest.approx((2, -3), abs=1e-6)
+    assert records[3]["speed"] == pytest.approx(np.hypot(2, 3))
+    assert records[0]["mass"] == pytest.approx(float(world.sum()))
+
+
+def test_stability_and_period():
+    """Checks the state detector on a translating, an alternating and an empty world."""
+    shape = (32, 32)
+    tracker = Metrics(every=5)
+    states = []
+    for step in range(3):
+        world = blob(shape, (10, 10 + step))
+        states.append(tracker.update(Static, world, world)["state"])
+        for _ in range(4):
+            assert tracker.update(Static, world, world) is None
+    assert states == ["changing", "stable", "stable"]
+
+    tracker = Metrics(every=1)
+    worlds = [blob(shape, (10, 10), 3), blob(shape, (10, 10), 5)]
+    records = [tracker.update(Static, worlds[i % 2], worlds[i % 2]) for i in range(4)]
+    assert [r["state"] for r in records] == ["changing", "changing", "periodic", "periodic"]
+    assert records[-1]["period"] == 2
+
+    empty = np.zeros(shape, np.float32)
+    assert tracker.update(Static, empty, empty)["state"] == "empty"
+
+
+@pytest.mark.parametrize("grid_shape", [(48, 48), (47, 53)])
+@pytest.mark.parametrize("inplace", [False, True])
+def test_spectrum_matches_projections(backend, grid_shape, inplace):
+    """Checks that metrics taken from the engine's spectrum match those of the world itself."""
+    lenia = Lenia(backend=backend, inplace=inplace, grid_shape=grid_shape)
+    worlds = []
+    lenia.metrics = Metrics(every=3, callback=lambda record: worlds.append(lenia.backend.asnumpy(lenia.get_world()).copy()))
+    records = []
+    reference = Metrics(every=1)
+    for step in range(7):
+        previous = lenia.backend.asnumpy(lenia.get_world()).copy()
+        lenia.update()
+        if step % 3 == 0:
+            record = lenia.metrics.last
+            expected = reference.update(Static, lenia.backend.asnumpy(lenia.get_world()), previous)
+            assert record["step"] == step
+            assert record["mass"] == pytest.approx(expected["mass"], rel=1e-4)
+            assert record["centroid"] == pytest.approx(expected["centroid"], abs=1e-3)
+            assert record["live_fraction"] == pytest.approx(expected["live_fraction"])
+            assert record["activity"] == pytest.approx(expected["activity"], rel=1e-4)
+            records.append(record)
+    assert [r["step"] for r in records] == [0, 3, 6]
+    assert len(worlds) == 3
+
+
+@pytest.mark.parametrize("engine", [LeniaSpatial, LeniaAuto, LeniaSparse])
+def test_other_engines_stream(backend, engine, tmp_path, monkeypatch):
+    """Checks that the other 2D engines report metrics, and that stream() restores the engine."""
+    # LeniaAuto autotunes; keep its results out of the shared strategy table
+    monkeypatch.setattr(config, "STRATEGY_TABLE_PATH", str(tmp_path / "strategies.json"))
+    lenia = engine(backend=backend, grid_shape=(32, 32))
+    records = list(metrics.stream(lenia, 9, every=4))
+    assert [r["step"] for r in records] == [0, 4, 8]
+    assert all(r["mass"] > 0 and 0 <= r["live_fraction"] <= 1 for r in records)
+    assert lenia.metrics is None
+
+
+def test_headless_dynamics(tmp_path):
+    """Checks that lenia_run --dynamics writes a record every --metrics-every steps."""
+    output = tmp_path / "run"
+    lenia_run.main(['--backend', 'numpy', '--grid-size', '24', '--radius', '3', '--steps', '9',
+                    '--metrics-every', '3', '--dynamics', '--output', str(output)])
+    records = [json.loads(line) for line in (output / "dynamics.jsonl").read_text().splitlines()]
+    assert [record["step"] for record in records] == [0, 3, 6]
@@ -0,0 +1,60 @@
+import time
+import numpy as np
+import config
+from lenia_core import Lenia
+from pipeline import SimulationPipeline
+
+def small_lenia(backend):
+    config.GRID_SIZE = 32
+    config.KERNEL_RADIUS = 4
+    return Lenia(backend=backend)
+
+def test_step_frame_runs_steps_per_frame(backend):
+    """Checks that each displayed frame advances the simulation K steps."""
+    lenia = small_lenia(backend)
+    reference = Lenia(backend=backend)
+    reference.world = lenia.world.copy()
+    pipeline = SimulationPipeline(lenia, steps_per_frame=3)
+    pipeline.step_frame()
+    for _ in range(3):
+        reference.update()
+    frame, frame_id = pipeline.latest_frame()
+    assert pipeline.steps == 3
+    assert frame_id == 2
+    assert np.array_equal(frame, reference.backend.asnumpy(reference.get_world()))
+
+def test_latest_frame_is_not_overwritten_while_read(backend):
+    """Checks that publishing new frames never writes into the frame the display holds."""
+    pipeline = SimulationPipeline(small_lenia(backend))
+    frame, _ = pipeline.latest_frame()
+    held = frame.copy()
+    for _ in range(5):
+        pipeline.step_frame()
+    assert np.array_equal(frame, held)
+
+def test_threaded_pipeline_free_runs(backend):
+    """Checks that the worker thread keeps stepping and publishing on its own."""
+    pipeline = SimulationPipeline(small_lenia(backend), threaded=True)
+    pipeline.start()
+    try:
+        deadline = time.time() + 5
+        while pipeline.steps < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        with pipeline.lock:
+            pipeline.lenia.set_mu(0.2)
+    finally:
+        pipeline.stop()
+    _, frame_id = pipeline.latest_frame()
+    assert pipeline.steps >= 10
+    assert frame_id > 1
+    assert pipeline.steps_per_second() > 0
+
+def test_quantized_frames(backend):
+    """Checks that quantized frames are uint8 levels of the world."""
+    lenia = small_lenia(backend)
+    pipeline = SimulationPipeline(lenia, quantize=True)
+    pipeline.step_frame()
+    frame, _ = pipeline.latest_frame()
+    assert frame.dtype == np.uint8
+    expected = np.rint(lenia.backend.asnumpy(lenia.get_world()) * 255).astype(np.uint8)
+    assert np.array_equal(frame, expected)
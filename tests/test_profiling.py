@@ -0,0 +1,92 @@
+import json
+import numpy
+import pytest
+import config
+from backend import get_backend
+from lenia_core import Lenia
+from lenia_core_spatial import LeniaSpatial
+from pipeline import SimulationPipeline
+from profiling import DISABLED, Profiler
+
+
+@pytest.fixture(autouse=True)
+def small_grid():
+    config.GRID_SIZE = 32
+    config.KERNEL_RADIUS = 4
+
+
+@pytest.mark.parametrize("inplace", [False, True])
+def test_lenia_records_each_phase(backend, inplace):
+    """Checks that the FFT engine records every phase of its update, once per step."""
+    lenia = Lenia(backend=backend, inplace=inplace)
+    lenia.profiler = Profiler(synchronize=lenia.backend.synchronize)
+    for _ in range(3):
+        lenia.update()
+    stats = lenia.profiler.stats()
+    expected = ["fft", "multiply", "ifft", "growth"] + ([] if inplace else ["clip"])
+    assert list(stats) == expected
+    assert all(stats[name]["count"] == 3 for name in expected)
+    assert all(0 <= stats[name]["p50"] <= stats[name]["max"] for name in expected)
+
+
+def test_spatial_and_pipeline_phases(backend):
+    """Checks that the spatial engine and the pipeline record their own phases."""
+    lenia = LeniaSpatial(backend=backend)
+    lenia.profiler = Profiler()
+    pipeline = SimulationPipeline(lenia)
+    pipeline.step_frame()
+    assert list(lenia.profiler.stats()) == ["d2h", "convolve", "growth", "clip"]
+
+
+def test_profiling_does_not_change_results(backend):
+    """Checks that a profiled engine computes exactly the same worlds."""
+    get_backend(backend).seed(3)
+    plain = Lenia(backend=backend)
+    profiled = Lenia(backend=backend)
+    profiled.world = plain.world.copy()
+    profiled.profiler = Profiler()
+    for _ in range(3):
+        plain.update()
+        profiled.update()
+    xp = plain.xp
+    assert xp.array_equal(plain.get_world(), profiled.get_world())
+
+
+def test_disabled_profiler_records_nothing(backend):
+    """Checks that engines start with the shared disabled profiler, which keeps no samples."""
+    lenia = Lenia(backend=backend)
+    assert lenia.profiler is DISABLED
+    lenia.update()
+    assert DISABLED.stats() == {}
+
+
+def test_ring_buffer_keeps_latest_samples():
+    """Checks that the mean and percentiles use the latest samples while count and total cover all of them."""
+    profiler = Profiler(size=4)
+    for i in range(10):
+        profiler.record("fft", float(i))
+    stats = profiler.stats()["fft"]
+    assert stats["count"] == 10
+    assert stats["total"] == sum(range(10))
+    assert stats["mean"] == 7.5
+    assert stats["last"] == 9.0
+
+
+def test_dump_formats(tmp_path):
+    """Checks the JSON and Prometheus text dumps."""
+    profiler = Profiler()
+    profiler.record("fft", 0.002)
+    profiler.record("fft", 0.004)
+
+    profiler.dump(str(tmp_path / "profile.json"))
+    with open(tmp_path / "profile.json") as f:
+        data = json.load(f)
+    assert data["phases"]["fft"]["count"] == 2
+
+    profiler.dump(str(tmp_path / "profile.prom"))
+    text = (tmp_path / "profile.prom").read_text()
+    assert "# TYPE lenia_phase_seconds summary" in text
+    assert 'lenia_phase_seconds_count{phase="fft"} 2' in text
+    assert 'lenia_phase_seconds{phase="fft",quantile="0.50"}' in text
+    sum_line = next(line for line in text.splitlines() if line.startswith("lenia_phase_seconds_sum"))
+    assert numpy.isclose(float(sum_line.split()[-1]), 0.006)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from snapshots import SnapshotReader, SnapshotWriter
+
+def frames(count, shape=(6, 5)):
+    rng = np.random.default_rng(0)
+    return [rng.random(shape, dtype=np.float32) for _ in range(count)]
+
+@pytest.mark.parametrize("format", ["chunked", "memmap"])
+def test_roundtrip(tmp_path, format):
+    """Checks that appended frames read back unchanged, whole and sliced."""
+    written = frames(10)
+    with SnapshotWriter(tmp_path, (6, 5), format=format, chunk_frames=4) as writer:
+        for frame in written:
+            writer.append(frame)
+    reader = SnapshotReader(tmp_path)
+    assert reader.shape == (10, 6, 5)
+    assert np.array_equal(reader[3], written[3])
+    assert np.array_equal(reader[-1], written[-1])
+    assert np.array_equal(reader[2:9:3], np.stack(written[2:9:3]))
+    assert reader[5:5].shape == (0, 6, 5)
+
+@pytest.mark.parametrize("dtype, tolerance", [("float16", 1e-3), ("uint8", 1 / 255)])
+def test_quantized_storage(tmp_path, dtype, tolerance):
+    """Checks that quantized stores come back as float32 within the quantization step."""
+    written = frames(3)
+    with SnapshotWriter(tmp_path, (6, 5), dtype=dtype) as writer:
+        for frame in written:
+            writer.append(frame)
+    reader = SnapshotReader(tmp_path)
+    assert reader[0].dtype == np.float32
+    assert np.abs(reader[0:3] - np.stack(written)).max() <= tolerance
+    assert SnapshotReader(tmp_path, dequantize=False)[0].dtype == np.dtype(dtype)
+
+def test_memmap_ring_keeps_latest_frames(tmp_path):
+    """Checks that a full memmap ring keeps the most recent `capacity` frames in order."""
+    written = frames(7)
+    with SnapshotWriter(tmp_path, (6, 5), format="memmap", capacity=4) as writer:
+        for frame in written:
+            writer.append(frame)
+    reader = SnapshotReader(tmp_path)
+    assert len(reader) == 4
+    assert np.array_equal(reader[0:4], np.stack(written[3:]))
+
+def test_append_copies_frame(tmp_path):
+    """Checks that changing a frame after appending it does not change the stored frame."""
+    frame = np.zeros((6, 5), dtype=np.float32)
+    with SnapshotWriter(tmp_path, (6, 5)) as writer:
+        writer.append(frame)
+        frame[:] = 1
+    assert np.all(SnapshotReader(tmp_path)[0] == 0)
+
+def test_rejects_wrong_frame_shape(tmp_path):
+    """Checks that frames must match the store's frame shape."""
+    with SnapshotWriter(tmp_path, (6, 5)) as writer:
+        with pytest.raises(ValueError):
+            writer.append(np.zeros((5, 6), dtype=np.float32))
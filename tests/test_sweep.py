@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+import config
+import sweep
+
+SETTINGS = dict(sweep.SETTINGS, steps=20, grid_size="32", check_every=5)
+
+def test_sampling():
+    """Checks grid, random and Latin-hypercube sampling of a parameter space."""
+    space = {"mu": sweep.parse_spec("mu", "0.1:0.3"), "radius": sweep.parse_spec("radius", "4,6"),
+             "shape": sweep.parse_spec("shape", "ring")}
+    grid = sweep.sample(space, "grid", grid_points=3)
+    assert len(grid) == 6
+    assert sorted({round(p["mu"], 6) for p in grid}) == [0.1, 0.2, 0.3]
+
+    lhs = sweep.sample(space, "lhs", count=10, seed=1)
+    mus = sorted(p["mu"] for p in lhs)
+    # One sample in each tenth of the range
+    assert [int((mu - 0.1) / 0.02) for mu in mus] == list(range(10))
+    assert {p["radius"] for p in lhs} == {4, 6}
+    assert sweep.sample(space, "random", count=5, seed=2) == sweep.sample(space, "random", count=5, seed=2)
+
+def test_batch_matches_single_runs():
+    """Checks that a run's result does not depend on the batch it ran in."""
+    runs = [{"mu": 0.15, "sigma": 0.015, "radius": 4, "shape": "ring", "timestep": 0.1},
+            {"mu": 0.3, "sigma": 0.01, "radius": 5, "shape": "gaussian", "timestep": 0.1}]
+    batch = [(sweep.run_id(params, SETTINGS), params) for params in runs]
+    together = sweep.run_batch(batch, SETTINGS)
+    alone = sweep.run_batch(batch[1:], SETTINGS)
+    assert together[1]["mass"] == alone[0]["mass"]
+    assert together[1]["thumbnail"] == alone[0]["thumbnail"]
+
+def test_batch_restores_kernel_radius():
+    """Checks that running a batch in this process leaves config.KERNEL_RADIUS as it was."""
+    config.KERNEL_RADIUS = 13
+    params = {"mu": 0.15, "sigma": 0.015, "radius": 4, "shape": "ring", "timestep": 0.1}
+    sweep.run_batch([(sweep.run_id(params, SETTINGS), params)], SETTINGS)
+    assert config.KERNEL_RADIUS == 13
+
+def test_early_stop():
+    """Checks that a world whose growth is negative everywhere is stopped as dead."""
+    params = {"mu": 0.9, "sigma": 0.01, "radius": 4, "shape": "ring", "timestep": 0.5}
+    settings = dict(SETTINGS, steps=200)
+    [row] = sweep.run_batch([(sweep.run_id(params, settings), params)], settings)
+    assert row["status"] == "died"
+    assert row["steps_run"] < 200
+
+def test_stopped_runs_leave_the_batch(monkeypatch):
+    """Checks that stopped worlds are no longer stepped and the others still match their single runs."""
+    from lenia_core_batched import BatchedLenia
+    sizes = []
+    update = BatchedLenia.update
+    monkeypatch.setattr(BatchedLenia, "update", lambda self: (sizes.append(self.batch_size), update(self)))
+    runs = [{"mu": 0.9, "sigma": 0.01, "radius": 4, "shape": "ring", "timestep": 0.5},
+            {"mu": 0.15, "sigma": 0.015, "radius": 4, "shape": "ring", "timestep": 0.1}]
+    batch = [(sweep.run_id(params, SETTINGS), params) for params in runs]
+    together = sweep.run_batch(batch, SETTINGS)
+    assert together[0]["status"] == "died" and together[1]["status"] != "died"
+    assert sizes[0] == 2 and sizes[-1] == 1
+    alone = sweep.run_batch(batch[1:], SETTINGS)
+    assert together[1]["mass"] == alone[0]["mass"]
+    assert together[1]["thumbnail"] == alone[0]["thumbnail"]
+
+def test_store_resumes(tmp_path):
+    """Checks that a sweep resumed on the same database only runs the missing samples."""
+    space = {name: sweep.parse_spec(name, text) for name, text in
+             [("mu", "0.1:0.3"), ("sigma", "0.015"), ("radius", "4"), ("shape", "ring,gaussian"), ("timestep", "0.1")]}
+    samples = sweep.sample(space, "grid", grid_points=2)
+    path = str(tmp_path / "sweep.db")
+    with sweep.ResultStore(path) as store:
+        assert sweep.sweep(store, samples[:2], SETTINGS, batch_size=2, log=lambda message: None) == 2
+    with sweep.ResultStore(path) as store:
+        assert sweep.sweep(store, samples, SETTINGS, batch_size=3, log=lambda message: None) == len(samples) - 2
+        rows = store.query("shape = ?", ("ring",), order_by="mu", thumbnails=True)
+    assert len(rows) == 2
+    assert rows[0]["mu"] < rows[1]["mu"]
+    assert rows[0]["status"] in ("survived", "died", "exploded")
+    assert rows[0]["thumbnail_format"] in ("png", "npy")
+    assert np.isfinite(rows[0]["mass_cv"])
+    with sweep.ResultStore(path) as store:
+        rows = store.query("shape = ?", ("ring",), order_by="mu DESC")
+        assert rows[0]["mu"] > rows[1]["mu"]
+        with pytest.raises(ValueError):
+            store.query(order_by="mu; DROP TABLE runs")
@@ -0,0 +1,114 @@
+import threading
+import numpy as np
+import pytest
+import config
+import viewport
+from backend import get_backend
+from lenia_core import Lenia
+from pipeline import SimulationPipeline
+from viewport import Viewport
+
+
+def block_reduce(world, factor, reduce):
+    height, width = world.shape[0] // factor, world.shape[1] // factor
+    blocks = world[:height * factor, :width * factor].reshape(height, factor, width, factor)
+    return reduce(blocks, axis=(1, 3))
+
+
+@pytest.mark.parametrize("mode, reduce", [("mean", np.mean), ("max", np.max)])
+def test_pyramid_levels_are_block_reductions(backend, mode, reduce):
+    """Checks that level L holds the mean or max of every 2^L x 2^L block, on every backend."""
+    b = get_backend(backend)
+    world = np.random.default_rng(0).random((37, 52)).astype(np.float32)
+    levels = viewport.pyramid(b.xp.asarray(world), 3, mode, b.xp)
+    assert [level.shape for level in levels] == [(37, 52), (18, 26), (9, 13), (4, 6)]
+    for index, level in enumerate(levels):
+        assert np.allclose(b.asnumpy(level), block_reduce(world, 2 ** index, reduce), atol=1e-6)
+
+
+def test_zoomed_out_frame_covers_the_world(backend):
+    """Checks that a fully zoomed-out view of a large world is the pooled world, and no larger than the view."""
+    b = get_backend(backend)
+    world = np.random.default_rng(1).random((256, 320)).astype(np.float32)
+    view = Viewport(world.shape, (64, 80), xp=b.xp)
+    assert view.zoom == 0.25 and view.level == 2
+    frame, placement = view.extract(b.xp.asarray(world))
+    factor, row, column, rows, columns = placement
+    assert (factor, rows, columns) == (4, 64, 80)
+    expected = block_reduce(np.roll(world, (-row, -column), axis=(0, 1)), 4, np.mean)
+    assert np.allclose(b.asnumpy(frame), expected, atol=1e-6)
+    origin, extent = view.texture_coordinates(placement)
+    assert extent == (64, 80)
+
+
+def test_frame_wraps_across_the_torus_edge(backend):
+    """Checks that a zoomed-in view straddling the world edge is cut with wrapping."""
+    b = get_backend(backend)
+    world = np.random.default_rng(2).random((100, 120)).astype(np.float32)
+    view = Viewport(world.shape, (40, 40), margin=0.0, xp=b.xp)
+    view.zoom = 4.0
+    view.origin = (95.0, 115.0)
+    frame, placement = view.extract(b.xp.asarray(world))
+    factor, row, column, rows, columns = placement
+    assert factor == 1 and (rows, columns) == (12, 12)
+    expected = np.roll(world, (-row, -column), axis=(0, 1))[:rows, :columns]
+    assert np.array_equal(b.asnumpy(frame), expected)
+    origin, extent = view.texture_coordinates(placement)
+    # The view starts inside the frame and spans 10 cells at 4 pixels per cell
+    assert 0 <= origin[0] <= rows - extent[0] and extent == (10, 10)
+
+
+def test_zoom_keeps_the_anchor_and_limits():
+    """Checks that zooming keeps the cell under the cursor in place and stays within the zoom limits."""
+    view = Viewport((4096, 4096), (512, 512))
+    view.pan(100, -30)
+    anchor = view.screen_to_world(200, 300)
+    view.zoom_at(3, 200, 300)
+    assert np.allclose(view.screen_to_world(200, 300), anchor)
+    view.zoom_at(1e6, 0, 0)
+    assert view.zoom == viewport.ZOOM_MAX
+    view.zoom_at(1e-6, 0, 0)
+    assert view.zoom == view.min_zoom == 0.125 and view.level == 3
+
+
+def test_frames_never_exceed_the_texture():
+    """Checks that frames stay within max_frame_shape at every zoom, so the transfer is bounded by the view."""
+    world = np.zeros((1000, 700), dtype=np.float32)
+    view = Viewport(world.shape, (300, 200))
+    limit = view.max_frame_shape()
+    while view.zoom < viewport.ZOOM_MAX:
+        view.zoom_at(1.3, 150, 100)
+        frame, _ = view.extract(world)
+        assert frame.shape[0] <= limit[0] and frame.shape[1] <= limit[1]
+
+
+def test_view_moves_while_the_pipeline_steps(backend):
+    """Checks that the view can be panned while a threaded pipeline holds its lock for a step."""
+    config.KERNEL_RADIUS = 4
+    lenia = Lenia(backend=backend, grid_shape=64)
+    view = Viewport((64, 64), (16, 16), xp=lenia.xp)
+    pipeline = SimulationPipeline(lenia, view=view.extract)
+    done = threading.Event()
+    with pipeline.lock:
+        # The lock is held as by a worker in the middle of a step
+        worker = threading.Thread(target=lambda: (view.pan(4, 4), view.zoom_at(2, 8, 8), done.set()))
+        worker.start()
+        assert done.wait(5)
+    worker.join()
+    assert view.zoom == 0.5
+
+
+def test_pipeline_publishes_the_view(backend):
+    """Checks that a pipeline with a view copies only the view's frame, with its placement."""
+    config.KERNEL_RADIUS = 4
+    lenia = Lenia(backend=backend, grid_shape=64)
+    view = Viewport((64, 64), (16, 16), xp=lenia.xp)
+    pipeline = SimulationPipeline(lenia, quantize=True, view=view.extract)
+    pipeline.step_frame()
+    frame, _ = pipeline.latest_frame()
+    placement = pipeline.latest_placement()
+    assert frame.shape == (16, 16) and frame.dtype == np.uint8
+    assert placement[0] == 4
+    world = lenia.backend.asnumpy(lenia.get_world())
+    expected = np.rint(block_reduce(world, 4, np.mean) * 255).astype(np.uint8)
+    assert np.array_equal(frame, expected)
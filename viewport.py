@@ -0,0 +1,163 @@
+"""Pan/zoom view of a world that may be much larger than the window.
+
+A `Viewport` shows a window of `view_shape` pixels onto a toroidal world of `world_shape` cells
+at `zoom` pixels per cell. Zoomed out, one pixel covers many cells: the view then uses pyramid
+level L = ceil(log2(1 / zoom)). Each cell of that level is the mean (or max) of a 2^L x 2^L
+block of cells, so a view never needs more cells than it has pixels.
+
+`extract` runs on the compute device. It cuts the visible cells, plus a `margin` around them,
+out of the world, wrapping across the torus edges, and pools them down to the view's level.
+Only that small frame goes to the host and the texture; cells outside the view are not read
+at all. The margin keeps small pans smooth: the display moves over the frame it already has
+until the next frame arrives. `texture_coordinates` maps the current view onto a frame.
+"""
+import math
+import threading
+import numpy
+
+POOLS = ["mean", "max"]
+# Largest zoom, in pixels per cell
+ZOOM_MAX = 32.0
+
+
+def pool2(world, mode="mean", xp=numpy):
+    """Halves both axes by taking the mean or max of 2x2 blocks (an odd last row or column is dropped)."""
+    height, width = world.shape[0] // 2 * 2, world.shape[1] // 2 * 2
+    # Strided slices combine far faster than a reshape and a reduction over two axes
+    if mode == "max":
+        rows = xp.maximum(world[0:height:2], world[1:height:2])
+        return xp.maximum(rows[:, 0:width:2], rows[:, 1:width:2])
+    rows = world[0:height:2].astype(xp.float32) + world[1:height:2]
+    return (rows[:, 0:width:2] + rows[:, 1:width:2]) * xp.float32(0.25)
+
+
+def pyramid(world, levels, mode="mean", xp=numpy):
+    """Returns [world, level 1, ..., level `levels`], each level pooled 2x from the one before."""
+    if mode not in POOLS:
+        raise ValueError(f"Unknown pooling '{mode}', expected one of {POOLS}")
+    result = [world]
+    for _ in range(levels):
+        result.append(pool2(result[-1], mode, xp))
+    return result
+
+
+def _level(zoom):
+    # Pyramid level whose cells are at least one pixel: ceil(log2(1 / zoom)), 0 when zoomed in
+    if zoom >= 1:
+        return 0
+    return max(0, math.ceil(math.log2(1 / zoom) - 1e-9))
+
+
+def _wrap_take(array, start, count, axis, xp):
+    # `count` consecutive rows/columns from `start`, wrapping around the end of the axis
+    size = array.shape[axis]
+    start %= size
+    index = [slice(None), slice(None)]
+    if start + count <= size:
+        index[axis] = slice(start, start + count)
+        return array[tuple(index)]
+    index[axis] = slice(start, size)
+    head = array[tuple(index)]
+    index[axis] = slice(0, count - (size - start))
+    return xp.concatenate([head, array[tuple(index)]], axis=axis)
+
+
+class Viewport:
+    """The visible part of the world and the pyramid level it is displayed at.
+
+    `origin` is the world position (row, column) at the view's pixel (0, 0); it is kept inside
+    the world, which wraps. Screen positions are (row, column) in view pixels, with rows in
+    the same direction as world rows.
+
+    pan and zoom_at may be called from the display thread while `extract` runs on a simulation
+    thread: the view has its own lock, held only while (origin, zoom) is read or changed.
+    """
+
+    def __init__(self, world_shape, view_shape, pool="mean", margin=0.25, xp=numpy):
+        if pool not in POOLS:
+            raise ValueError(f"Unknown pooling '{pool}', expected one of {POOLS}")
+        self.world_shape = tuple(world_shape)
+        self.view_shape = tuple(view_shape)
+        self.pool = pool
+        self.margin = margin
+        self.xp = xp
+        self.lock = threading.Lock()
+        self.zoom = self.min_zoom
+        self.origin = (0.0, 0.0)
+
+    @property
+    def min_zoom(self):
+        # Zoomed fully out, the world fills the view along its tighter axis
+        return max(v / w for v, w in zip(self.view_shape, self.world_shape))
+
+    @property
+    def level(self):
+        return _level(self.zoom)
+
+    def state(self):
+        """Returns (origin, zoom) as one consistent pair."""
+        with self.lock:
+            return self.origin, self.zoom
+
+    def pan(self, rows, columns):
+        """Drags the world by (rows, columns) screen pixels."""
+        with self.lock:
+            self.origin = tuple((o - d / self.zoom) % n for o, d, n in zip(self.origin, (rows, columns), self.world_shape))
+
+    def zoom_at(self, factor, row, column):
+        """Zooms by `factor`, keeping the world cell under the screen position (row, column) in place."""
+        with self.lock:
+            zoom = min(max(self.zoom * factor, self.min_zoom), ZOOM_MAX)
+            anchor = self._screen_to_world(self.origin, self.zoom, row, column)
+            self.zoom = zoom
+            self.origin = tuple((a - p / zoom) % n for a, p, n in zip(anchor, (row, column), self.world_shape))
+
+    def screen_to_world(self, row, column):
+        return self._screen_to_world(*self.state(), row, column)
+
+    def _screen_to_world(self, origin, zoom, row, column):
+        return tuple((o + p / zoom) % n for o, p, n in zip(origin, (row, column), self.world_shape))
+
+    def _frame_cells(self, zoom, factor, view, world):
+        # Level cells covering `view` pixels plus the margin on both sides, and partial cells at the edges
+        visible = min(view, view / (zoom * factor))
+        return min(math.ceil(visible * (1 + 2 * self.margin)) + 2, max(1, world // factor))
+
+    def max_frame_shape(self):
+        """The largest frame `extract` can return, which is at most the view plus its margin."""
+        return tuple(min(math.ceil(v * (1 + 2 * self.margin)) + 2, w) for v, w in zip(self.view_shape, self.world_shape))
+
+    def region(self):
+        """Returns (factor, row, column, rows, columns): the frame as level cells of `factor` x `factor`
+        world cells, starting at world cell (row, column)."""
+        origins, zoom = self.state()
+        factor = 2 ** _level(zoom)
+        region = [factor]
+        counts = []
+        for origin, view, world in zip(origins, self.view_shape, self.world_shape):
+            cells = self._frame_cells(zoom, factor, view, world)
+            margin = (cells - view / (zoom * factor)) / 2
+            region.append(int(math.floor(origin / factor - margin)) * factor % world)
+            counts.append(cells)
+        return tuple(region + counts)
+
+    def extract(self, world):
+        """Pools the visible part of `world` on its device; returns (frame, placement) where placement is region()."""
+        placement = self.region()
+        factor, row, column, rows, columns = placement
+        xp = self.xp
+        cells = _wrap_take(_wrap_take(world, row, rows * factor, 0, xp), column, columns * factor, 1, xp)
+        frame = pyramid(cells, factor.bit_length() - 1, self.pool, xp)[-1]
+        return xp.ascontiguousarray(frame), placement
+
+    def texture_coordinates(self, placement):
+        """Returns ((row, column) of the view origin, (rows, columns) spanned by the view), in cells of the frame."""
+        origins, zoom = self.state()
+        factor, row, column = placement[:3]
+        origin = []
+        for o, start, world in zip(origins, (row, column), self.world_shape):
+            # The view may have moved across the world edge since the frame was cut
+            offset = (o - start + world / 2) % world - world / 2
+            origin.append(offset / factor)
+        extent = tuple(v / (zoom * factor) for v in self.view_shape)
+        return tuple(origin), extent